@@ -0,0 +1,190 @@
+import hashlib
+import marshal
+import os
+import tempfile
+import zlib
+
+import brewlex
+import brewparse
+import element
+from element import Element
+
+# On-disk cache of parsed programs, keyed by a hash of the program source
+#   Each entry is the Element tree flattened into tuples/lists and marshalled, so loading it
+#   skips the lexer + yacc.parse entirely
+#   Entries are evicted least-recently-used first once the cache grows past MAX_CACHE_BYTES
+#   A cached tree is run as-is, so the cache lives in a per-user directory ($XDG_CACHE_HOME/brewin/ast or
+#   ~/.cache/brewin/ast, created 0700), and entries are only loaded from a directory + file this user owns
+#   that nobody else can write to
+
+CACHE_FORMAT_VERSION = 2
+CACHE_ENABLED = os.environ.get("BREWIN_AST_CACHE", "1") != "0"
+
+
+def _default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "brewin", "ast")
+
+
+CACHE_DIR = os.environ.get("BREWIN_AST_CACHE_DIR") or _default_cache_dir()
+MAX_CACHE_BYTES = int(os.environ.get("BREWIN_AST_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+CACHE_SUFFIX = ".ast"
+
+
+# Cached trees are only valid for the tokens, grammar + node layout that produced them
+FINGERPRINT_SOURCES = (brewlex.__file__, brewparse.__file__, element.__file__)
+
+
+def _grammar_fingerprint(sources=FINGERPRINT_SOURCES):
+    h = hashlib.sha256()
+    for path in sources:
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            return "unknown"
+    return h.hexdigest()[:16]
+
+
+GRAMMAR_FINGERPRINT = _grammar_fingerprint()
+
+
+def cache_key(program):
+    h = hashlib.sha256()
+    h.update(f"{CACHE_FORMAT_VERSION}:{GRAMMAR_FINGERPRINT}:".encode())
+    h.update(program.encode())
+    return h.hexdigest()
+
+
+''' ---- Element <-> marshal-able conversion ---- '''
+# Element -> (elem_type, {key: value}), list -> list, constants stay as-is
+def encode_tree(node):
+    if isinstance(node, Element):
+        return (node.elem_type, {key: encode_tree(value) for key, value in node.dict.items()})
+    if isinstance(node, list):
+        return [encode_tree(item) for item in node]
+    return node
+
+
+def decode_tree(data):
+    if isinstance(data, tuple):
+        elem_type, fields = data
+        return Element(elem_type, **{key: decode_tree(value) for key, value in fields.items()})
+    if isinstance(data, list):
+        return [decode_tree(item) for item in data]
+    return data
+
+
+''' ---- Cache files ---- '''
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key + CACHE_SUFFIX)
+
+
+def _trusted(path):
+    # Owned by this user + not writable by anyone else (no owners to check without os.getuid)
+    if not hasattr(os, "getuid"):
+        return True
+    st = os.stat(path)
+    return st.st_uid == os.getuid() and not (st.st_mode & 0o022)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def load_cached(key):
+    path = _entry_path(key)
+    try:
+        if not (_trusted(CACHE_DIR) and _trusted(path)):
+            return None
+        with open(path, "rb") as f:
+            payload = f.read()
+    except OSError:
+        return None
+
+    try:
+        ast = decode_tree(marshal.loads(zlib.decompress(payload)))
+    except (ValueError, EOFError, TypeError, AttributeError, zlib.error):
+        # Corrupt / truncated entry, or one from an older node layout: drop it + parse again
+        _remove(path)
+        return None
+
+    # Bump mtime so LRU eviction keeps recently used programs
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return ast
+
+
+def store_cached(key, ast):
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        if not _trusted(CACHE_DIR):
+            return
+        payload = zlib.compress(marshal.dumps(encode_tree(ast)))
+        # Write to a temp file + rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, _entry_path(key))
+    except OSError:
+        # Read-only or missing cache dir: just run uncached
+        return
+    evict_lru(MAX_CACHE_BYTES)
+
+
+def evict_lru(max_bytes):
+    try:
+        entries = []
+        for name in os.listdir(CACHE_DIR):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(CACHE_DIR, name)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return
+
+    # Oldest entries first
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def clear_cache():
+    try:
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(CACHE_SUFFIX):
+                os.remove(os.path.join(CACHE_DIR, name))
+    except OSError:
+        pass
+
+
+# exported function: drop-in replacement for brewparse.parse_program
+def parse_program(program):
+    if not CACHE_ENABLED:
+        return brewparse.parse_program(program)
+
+    key = cache_key(program)
+    ast = load_cached(key)
+    if ast is not None:
+        return ast
+
+    ast = brewparse.parse_program(program)
+    store_cached(key, ast)
+    return ast
@@ -0,0 +1,172 @@
+import argparse
+import importlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Benchmark harness for the Brewin interpreters
+#   Every .br file in this directory starts with a comment listing the versions that can run it:
+#       /* versions: 2 4 ... */
+#   Each program is run on every interpreter that supports it (v2 also through its bytecode VM,
+#   v3 also through its closure compiler + Python transpiler), timed over --repeat runs, then run once more under tracemalloc for peak memory
+#   Results are printed as a table and written as JSON (--json)
+#   --passes picks the optimizer passes v2-v4 run first (optimizer.py), to time them one at a time
+#
+#   usage: python benchmarks/run_benchmarks.py [--repeat N] [--versions 2 3] [--passes fold] [--json out.json] [program ...]
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+VERSIONS_HEADER = re.compile(r"/\*\s*versions:([\d\s]+)")
+
+# label -> (interpreter module, version, extra Interpreter() kwargs)
+INTERPRETERS = {
+    "v1": ("interpreterv1", "1", {}),
+    "v2": ("interpreterv2", "2", {}),
+    "v2-bytecode": ("interpreterv2", "2", {"use_bytecode": True}),
+    "v3": ("interpreterv3", "3", {}),
+    "v3-closures": ("interpreterv3", "3", {"use_closures": True}),
+    "v3-python": ("interpreterv3", "3", {"use_transpiler": True}),
+    "v4": ("interpreterv4", "4", {}),
+}
+
+# Versions that take the optimize= kwarg
+OPTIMIZED_VERSIONS = {"2", "3", "4"}
+
+
+''' ---- Loading programs ---- '''
+def program_versions(source):
+    match = VERSIONS_HEADER.match(source.lstrip())
+    if match is None:
+        return set()
+    return set(match.group(1).split())
+
+
+def load_programs(names=None):
+    programs = {}
+    for file_name in sorted(os.listdir(BENCHMARK_DIR)):
+        name, ext = os.path.splitext(file_name)
+        if ext != ".br" or (names and name not in names):
+            continue
+        with open(os.path.join(BENCHMARK_DIR, file_name)) as f:
+            source = f.read()
+        programs[name] = (source, program_versions(source))
+    return programs
+
+
+''' ---- Measuring ---- '''
+def run_once(label, source, passes=None):
+    module_name, version, kwargs = INTERPRETERS[label]
+    if passes is not None and version in OPTIMIZED_VERSIONS:
+        kwargs = dict(kwargs, optimize=passes)
+    interpreter = importlib.import_module(module_name).Interpreter(console_output=False, **kwargs)
+    interpreter.run(source)
+    return interpreter.get_output()
+
+
+def percentile(samples, fraction):
+    # Nearest-rank percentile (samples are few, no interpolation)
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def bench(label, source, repeat, warmup, passes=None):
+    for _ in range(warmup):
+        output = run_once(label, source, passes)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run_once(label, source, passes)
+        times.append(time.perf_counter() - start)
+
+    # Separate run for memory: tracemalloc slows everything down, so it can't share the timed runs
+    tracemalloc.start()
+    try:
+        run_once(label, source, passes)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "runs": repeat,
+        "median": statistics.median(times),
+        "p95": percentile(times, 0.95),
+        "min": min(times),
+        "peak_memory": peak,
+        "output": output,
+    }
+
+
+def run_benchmarks(programs, labels, repeat=5, warmup=1, passes=None):
+    results = {}
+    for name, (source, versions) in programs.items():
+        results[name] = {}
+        for label in labels:
+            if INTERPRETERS[label][1] not in versions:
+                continue
+            try:
+                results[name][label] = bench(label, source, repeat, warmup, passes)
+            except Exception as e:
+                results[name][label] = {"error": f"{type(e).__name__}: {e}"}
+
+        # Every interpreter that ran a program should agree on what it printed
+        outputs = {label: r["output"] for label, r in results[name].items() if "output" in r}
+        if len({tuple(output) for output in outputs.values()}) > 1:
+            for label in outputs:
+                results[name][label]["output_mismatch"] = True
+    return results
+
+
+''' ---- Reporting ---- '''
+def print_table(results):
+    print(f"{'program':<20} {'interpreter':<12} {'median ms':>10} {'p95 ms':>10} {'peak KiB':>10}")
+    for name, by_label in results.items():
+        for label, r in by_label.items():
+            if "error" in r:
+                print(f"{name:<20} {label:<12} {r['error']}")
+                continue
+            flag = "  (output differs)" if r.get("output_mismatch") else ""
+            print(f"{name:<20} {label:<12} {r['median'] * 1000:>10.2f} {r['p95'] * 1000:>10.2f} "
+                  f"{r['peak_memory'] / 1024:>10.1f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Brewin benchmark corpus across interpreter versions")
+    parser.add_argument("programs", nargs="*", help="benchmark names to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per program + interpreter")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs first (fills the parse cache)")
+    parser.add_argument("--versions", nargs="*", default=list(INTERPRETERS), choices=list(INTERPRETERS),
+                        metavar="LABEL", help=f"interpreters to run: {' '.join(INTERPRETERS)}")
+    parser.add_argument("--passes", nargs="*", metavar="PASS",
+                        help="optimizer passes for v2-v4 (default: all of them, none given: optimizer off)")
+    parser.add_argument("--json", metavar="FILE", help="write results as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    programs = load_programs(set(args.programs))
+    results = run_benchmarks(programs, args.versions, args.repeat, args.warmup, args.passes)
+
+    report = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "passes": args.passes,
+        "results": results,
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
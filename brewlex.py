@@ -132,5 +132,18 @@ def t_error(t):
 def reset_lineno():
     lexer.lineno = 1
 
+def frozen_lextab_available():
+    try:
+        import brewlextab
+    except ImportError:
+        return False
+    return True
+
 # Build the lexer
-lexer = lex.lex()
+#   Loads the frozen tables in brewlextab.py (generated by build_tables.py) straight away, if there are any,
+#   otherwise builds the master regex in memory. Either way nothing is written to disk
+#   build_tables.py --check (run by tests/test_tables.py) is what catches tables older than this file
+if frozen_lextab_available():
+    lexer = lex.lex(optimize=1, lextab="brewlextab")
+else:
+    lexer = lex.lex()
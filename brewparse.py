@@ -271,4 +271,6 @@ def parse_program(program):
 
 
 # generate our parser
-yacc.yacc() # yacc.yacc(debug=True, debuglog=open("parse.log", "w"))
+#   Loads the frozen tables in brewparsetab.py (generated by build_tables.py) without comparing their
+#   signature (build_tables.py --check does that), otherwise builds them in memory. Never writes parsetab/parser.out
+yacc.yacc(tabmodule="brewparsetab", write_tables=False, debug=False, optimize=True) # yacc.yacc(debug=True, debuglog=open("parse.log", "w"))
@@ -0,0 +1,90 @@
+# Build step: regenerate the frozen lexer + parser tables (brewlextab.py, brewparsetab.py)
+#   Run this after changing brewlex.py or brewparse.py:    python3 build_tables.py
+#   Check the committed tables are current:                python3 build_tables.py --check
+#   At import time brewlex/brewparse load these tables as they are (no signature check, they never write to
+#   disk), so the freshness check lives here: tests/test_tables.py runs it
+import hashlib
+import importlib
+import os
+import sys
+
+from ply import yacc
+
+OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+LEXTAB = "brewlextab"
+PARSETAB = "brewparsetab"
+
+
+def lextab_signature():
+    # Frozen lexer tables are only valid for the exact token rules they were built from
+    with open(os.path.join(OUTPUT_DIR, "brewlex.py"), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def parsetab_signature():
+    # PLY's own signature of the grammar in brewparse.py (what yacc compares _lr_signature against)
+    import brewparse
+
+    module = vars(brewparse)
+    info = yacc.ParserReflect(dict(module))
+    info.get_all()
+    return info.signature()
+
+
+def stale_tables():
+    # Names of the frozen table modules that are missing or don't match the current sources
+    stale = []
+    for module_name, attribute, signature in (
+        (LEXTAB, "_lexsignature", lextab_signature),
+        (PARSETAB, "_lr_signature", parsetab_signature),
+    ):
+        try:
+            table = importlib.import_module(module_name)
+        except ImportError:
+            stale.append(module_name)
+            continue
+        if getattr(table, attribute, None) != signature():
+            stale.append(module_name)
+    return stale
+
+
+def remove_stale(module_name):
+    path = os.path.join(OUTPUT_DIR, module_name + ".py")
+    if os.path.exists(path):
+        os.remove(path)
+    sys.modules.pop(module_name, None)
+
+
+def build_lexer_tables():
+    # With no table present, importing brewlex builds its lexer in memory from the module's own
+    #   globals. Reuse that lexer: lex.lex(module=...) would collect rules in alphabetical order,
+    #   which changes the priority of equal-length string rules (e.g. t_DOT vs t_SEMI)
+    import brewlex
+
+    brewlex.lexer.writetab(LEXTAB, OUTPUT_DIR)
+
+    # Stamp the table with the source signature so brewlex can tell if it's out of date
+    with open(os.path.join(OUTPUT_DIR, LEXTAB + ".py"), "a") as f:
+        f.write("_lexsignature = %r\n" % lextab_signature())
+
+
+def build_parser_tables():
+    import brewparse
+
+    yacc.yacc(module=brewparse, tabmodule=PARSETAB, outputdir=OUTPUT_DIR, write_tables=True, debug=False)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, OUTPUT_DIR)
+    if "--check" in sys.argv[1:]:
+        stale = stale_tables()
+        if stale:
+            print(f"Out of date: {', '.join(stale)} (run python3 build_tables.py)")
+            sys.exit(1)
+        print(f"{LEXTAB}.py and {PARSETAB}.py are current")
+        sys.exit(0)
+    remove_stale(LEXTAB)
+    remove_stale(PARSETAB)
+    build_lexer_tables()
+    build_parser_tables()
+    print(f"Wrote {LEXTAB}.py and {PARSETAB}.py to {OUTPUT_DIR}")
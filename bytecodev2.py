@@ -0,0 +1,787 @@
+from intbase import ErrorType
+from element import Element
+
+# Bytecode backend for interpreterv2
+#   Each function's AST is compiled once into a flat list of [opcode, arg, opcode, arg, ...]
+#   Constants live in a per-function pool, and local variables are resolved to slot indices at compile time
+#   (Brewin v2 scopes are per-function + per-block, so every variable reference can be resolved statically)
+#   The VM runs every Brewin call inside one dispatch loop with its own frame stack
+#
+#   Each compile_* method mirrors one evaluation function in interpreterv2.Interpreter, so the output log and
+#   error types match the tree-walker exactly (including errors that the tree-walker raises from type checks
+#   on operand nodes before evaluating them - those become ERROR instructions at the same point)
+
+
+''' ---- Opcodes ---- '''
+LOAD = 0            # push slots[arg]
+CONST = 1           # push consts[arg]
+STORE = 2           # slots[arg] = pop
+ADD = 3
+SUB = 4
+MUL = 5
+DIV = 6
+NEG = 7
+LT = 8
+LE = 9
+GT = 10
+GE = 11
+EQ = 12
+NE = 13
+NOT = 14
+AND = 15
+OR = 16
+OVERLOADED_ADD = 17     # '+' on two already-evaluated operands: same-type check, then int add or string concat
+ADD_DISPATCH = 18       # '+' whose operands have side effects: check types, then jump to the int or string re-evaluation
+JUMP = 19
+JUMP_IF_FALSE = 20      # pop condition, TYPE_ERROR if not a bool (check_condition)
+CHECK_INT = 21          # top must be an int (not a bool)
+CHECK_BOOL = 22         # top must be True/False
+CHECK_NOT_INT = 23      # top must not be an int (string operation operand)
+DEFINE = 24             # slots[arg] = initial variable value
+CALL = 25               # consts[arg] = (FunctionCode, argc)
+RETURN = 26
+POP = 27
+PRINT = 28              # consts[arg] = list of formatting kinds, one per evaluated argument
+INPUTI = 29             # consts[arg] = argument nodes of the call
+INPUTS = 30
+ERROR = 31              # consts[arg] = (ErrorType, description)
+ECHO = 32               # print consts[arg] to stdout (tree-walker debug message)
+CRASH = 33              # consts[arg] = message, raise AttributeError (malformed operand node)
+
+# Print formatting kinds (see Interpreter.printout)
+FMT_RAW = 0         # string constant
+FMT_TF = 1          # bool result: "true"/"false", anything else prints nothing
+FMT_VAR = 2         # variable: "true"/"false" for bools, str() otherwise
+FMT_STR = 3         # str()
+
+INITIAL_VARIABLE_VALUE = "DIS IS THE INITIAL VARIABLE VALUE"
+NIL_VALUE = Element("nil")
+
+INT_OPERATIONS = ['+', '-', '*', '/', 'neg']
+BOOL_OPERATIONS = ['!', '||', '&&']
+EQUALITY_COMPARISONS = ['==', '!=']
+INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
+OVERLOADED_OPERATIONS = ['+']
+BUILTIN_FUNCTIONS = ['inputi', 'inputs', 'print']
+
+INT_ALLOWABLE = ['int', 'var', 'fcall'] + INT_OPERATIONS
+BOOL_ALLOWABLE = ['bool', 'var', 'fcall'] + BOOL_OPERATIONS + EQUALITY_COMPARISONS + INTEGER_COMPARISONS
+
+ARITH_OPCODES = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+COMPARE_OPCODES = {'<': LT, '<=': LE, '>': GT, '>=': GE}
+
+
+class FunctionCode:
+    def __init__(self, func_node):
+        self.func_node = func_node
+        self.name = func_node.name
+        self.code = []
+        self.consts = []
+        self.nslots = 0
+        self.param_slots = []
+
+
+''' ---- Compiler ---- '''
+class BytecodeCompiler:
+    def __init__(self, defined_functions):
+        self.defined_functions = defined_functions
+        # Create every FunctionCode first so call sites can point directly at their targets
+        self.compiled = {}
+        for funcs in defined_functions.values():
+            for func in funcs:
+                self.compiled[id(func)] = FunctionCode(func)
+
+    def compile_all(self):
+        for func_code in self.compiled.values():
+            self.compile_function(func_code)
+
+    def code_for(self, func_node):
+        return self.compiled[id(func_node)]
+
+    def compile_function(self, func_code):
+        self.fc = func_code
+        self.code = func_code.code
+        self.const_index = {}
+        self.blocks = []
+
+        # Parameters live in the function-level block (duplicate names share a slot, last argument wins)
+        self.push_block()
+        for param in func_code.func_node.args:
+            name = param.name
+            if name not in self.blocks[-1]:
+                self.blocks[-1][name] = self.new_slot()
+            func_code.param_slots.append(self.blocks[-1][name])
+
+        for statement in func_code.func_node.statements:
+            self.compile_statement(statement)
+        self.pop_block()
+
+        # Falling off the end of a function returns nil
+        self.emit(CONST, self.const(NIL_VALUE))
+        self.emit(RETURN)
+
+    ''' ---- Helpers ---- '''
+    def emit(self, op, arg=None):
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def patch(self, at, target):
+        self.code[at + 1] = target
+
+    def here(self):
+        return len(self.code)
+
+    def const(self, value):
+        # Pool hashable constants, everything else gets its own entry
+        try:
+            key = (type(value), value)
+            if key in self.const_index:
+                return self.const_index[key]
+        except TypeError:
+            key = None
+        self.fc.consts.append(value)
+        index = len(self.fc.consts) - 1
+        if key is not None:
+            self.const_index[key] = index
+        return index
+
+    def error(self, error_type, description):
+        self.emit(ERROR, self.const((error_type, description)))
+
+    def crash(self, node, field):
+        self.emit(CRASH, self.const(f"'{type(node).__name__}' object has no attribute '{field}'"))
+
+    def new_slot(self):
+        self.fc.nslots += 1
+        return self.fc.nslots - 1
+
+    def push_block(self):
+        self.blocks.append({})
+
+    def pop_block(self):
+        self.blocks.pop()
+
+    def resolve(self, name):
+        for block in reversed(self.blocks):
+            if name in block:
+                return block[name]
+        return None
+
+    def load_var(self, node):
+        slot = self.resolve(node.name)
+        if slot is None:
+            self.error(ErrorType.NAME_ERROR, f"Variable {node.name} has not been declared w/in function scope")
+        else:
+            self.emit(LOAD, slot)
+
+    def has_call(self, node):
+        # True if evaluating this expression could have side effects (only function calls do)
+        if not isinstance(node, Element):
+            return False
+        if node.elem_type == 'fcall':
+            return True
+        for field in ('op1', 'op2'):
+            if self.has_call(node.get(field)):
+                return True
+        return False
+
+    ''' ---- Statements ---- '''
+    def compile_statements(self, statements):
+        for statement in statements:
+            self.compile_statement(statement)
+
+    def compile_statement(self, node):
+        node_type = node.elem_type
+        if node_type == 'vardef':
+            block = self.blocks[-1]
+            if node.name in block:
+                self.error(ErrorType.NAME_ERROR, f"Variable {node.name} defined more than once")
+                return
+            block[node.name] = self.new_slot()
+            self.emit(DEFINE, block[node.name])
+        elif node_type == '=':
+            self.compile_assign(node)
+        elif node_type == 'fcall':
+            self.compile_fcall(node)
+            self.emit(POP)
+        elif node_type == 'if':
+            self.compile_if(node)
+        elif node_type == 'for':
+            self.compile_for(node)
+        elif node_type == 'return':
+            self.compile_return(node)
+        else:
+            self.error(ErrorType.NAME_ERROR, f"Unrecognized statement of type {node_type}")
+
+    def compile_assign(self, node):
+        slot = self.resolve(node.name)
+        if slot is None:
+            self.error(ErrorType.NAME_ERROR, f"Variable { {node.name} } not found in any scope")
+            return
+        expression = node.expression
+        if not self.compile_value(expression):
+            self.error(ErrorType.TYPE_ERROR, f"Unrecognized expression \"{expression.elem_type}\" in variable assignment for {node.name}")
+            return
+        self.emit(STORE, slot)
+
+    def compile_if(self, node):
+        self.push_block()
+        self.compile_condition(node.condition)
+        jump_else = self.emit(JUMP_IF_FALSE)
+        self.compile_statements(node.statements)
+        self.pop_block()
+        jump_end = self.emit(JUMP)
+        self.patch(jump_else, self.here())
+        if node.else_statements is not None:
+            self.push_block()
+            self.compile_statements(node.else_statements)
+            self.pop_block()
+        self.patch(jump_end, self.here())
+
+    def compile_for(self, node):
+        self.compile_assign(node.init)
+        loop_start = self.here()
+        self.compile_condition(node.condition)
+        jump_end = self.emit(JUMP_IF_FALSE)
+        self.push_block()
+        self.compile_statements(node.statements)
+        self.pop_block()
+        self.compile_assign(node.update)
+        self.emit(JUMP, loop_start)
+        self.patch(jump_end, self.here())
+
+    def compile_return(self, node):
+        expression = node.expression
+        if expression is None or expression.elem_type == 'nil':
+            self.emit(CONST, self.const(NIL_VALUE))
+        elif not self.compile_value(expression):
+            self.emit(ECHO, self.const("ERR: no return value set"))
+            self.emit(CONST, self.const(None))
+        self.emit(RETURN)
+
+    ''' ---- Expressions ---- '''
+    # Shared dispatch of run_assign / return / run_fcall arguments, returns False if the node type isn't handled
+    def compile_value(self, node):
+        node_type = node.elem_type
+        if node_type in ['string', 'int', 'bool']:
+            self.emit(CONST, self.const(node.val))
+        elif node_type == 'var':
+            self.load_var(node)
+        elif node_type in OVERLOADED_OPERATIONS:
+            self.compile_overloaded(node)
+        elif node_type in INT_OPERATIONS:
+            self.compile_int(node)
+        elif node_type in BOOL_OPERATIONS:
+            self.compile_bool(node)
+        elif node_type in EQUALITY_COMPARISONS:
+            self.compile_equality(node)
+        elif node_type in INTEGER_COMPARISONS:
+            self.compile_integer_compare(node)
+        elif node_type == 'fcall':
+            self.compile_fcall(node)
+        elif node_type == 'nil':
+            self.emit(CONST, self.const(NIL_VALUE))
+        else:
+            return False
+        return True
+
+    # eval_op
+    def compile_eval_op(self, node):
+        node_type = node.elem_type
+        if node_type == 'var':
+            self.load_var(node)
+        elif node_type in ['int', 'string', 'bool']:
+            self.emit(CONST, self.const(node.val))
+        elif node_type == 'fcall':
+            self.compile_fcall(node)
+        elif node_type == 'nil':
+            self.emit(CONST, self.const(NIL_VALUE))
+        elif node_type in OVERLOADED_OPERATIONS:
+            self.compile_overloaded(node)
+        elif node_type in INT_OPERATIONS:
+            self.compile_int(node)
+        elif node_type in BOOL_OPERATIONS:
+            self.compile_bool(node)
+        elif node_type in EQUALITY_COMPARISONS:
+            self.compile_equality(node)
+        else:
+            self.emit(CONST, self.const(None))
+
+    # overloaded_operator
+    def compile_overloaded(self, node):
+        self.compile_eval_op(node.op1)
+        self.compile_eval_op(node.op2)
+        if not (self.has_call(node.op1) or self.has_call(node.op2)):
+            # Re-evaluating side-effect-free operands gives the same values, so add them directly
+            self.emit(OVERLOADED_ADD)
+            return
+
+        # The tree-walker evaluates the operands once to pick int vs string, then again to compute the result
+        dispatch = self.emit(ADD_DISPATCH)
+        int_start = self.here()
+        self.compile_int(node)
+        jump_end = self.emit(JUMP)
+        string_start = self.here()
+        self.compile_string(node)
+        self.patch(jump_end, self.here())
+        self.patch(dispatch, (int_start, string_start))
+
+    # run_int_operation
+    def compile_int(self, node):
+        node_type = node.elem_type
+        if node_type in ['string', 'bool', 'nil']:
+            self.error(ErrorType.TYPE_ERROR, "Attempted to use string or bool constant in integer operation")
+            return
+        if node_type == 'int':
+            self.emit(CONST, self.const(node.val))
+            return
+        if node_type == 'var':
+            self.load_var(node)
+            self.emit(CHECK_INT, self.const(f"Attempted to use string or bool or nil via existing variable {node.name} in integer operation"))
+            return
+        if node_type == 'fcall':
+            self.compile_fcall(node)
+            self.emit(CHECK_INT, self.const("Attempted to use string or bool or nil via fcall in integer operation"))
+            return
+
+        if node_type == 'neg':
+            if node.op1.elem_type not in INT_ALLOWABLE:
+                self.error(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for integer operation: op1 = {node.op1}")
+                return
+            self.compile_int(node.op1)
+            self.emit(NEG)
+            return
+
+        if node.get('op1') is None:
+            self.crash(node, 'op1')
+            return
+        if node.get('op2') is None:
+            self.crash(node, 'op2')
+            return
+        if node.op1.elem_type not in INT_ALLOWABLE:
+            self.error(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for integer operation: op1 = {node.op1}")
+            return
+        if node.op2.elem_type not in INT_ALLOWABLE:
+            self.error(ErrorType.TYPE_ERROR, f"Operand 2 is NOT of an allowable type for integer operation: op2 = {node.op2}")
+            return
+        if node_type not in ARITH_OPCODES:
+            # Not an arithmetic node: the tree-walker returns None without evaluating the operands
+            self.emit(CONST, self.const(None))
+            return
+        self.compile_int(node.op1)
+        self.compile_int(node.op2)
+        self.emit(ARITH_OPCODES[node_type])
+
+    # run_string_operation
+    def compile_string(self, node):
+        node_type = node.elem_type
+        if node_type == 'var':
+            self.load_var(node)
+            self.emit(CHECK_NOT_INT, self.const(f"Incompatible types for STRING operation, attempted to use INTEGER (via existing variable {node.name} value)"))
+        elif node_type in ['bool', 'int']:
+            self.error(ErrorType.TYPE_ERROR, "Incompatible types for STRING operation, attempted to use boolean or integer constant value)")
+        elif node_type == 'string':
+            self.emit(CONST, self.const(node.val))
+        elif node_type == 'fcall':
+            self.compile_fcall(node)
+        elif node_type == '+':
+            self.compile_string(node.op1)
+            self.compile_string(node.op2)
+            self.emit(ADD)
+        else:
+            self.emit(CONST, self.const(None))
+
+    # run_bool_operation
+    def compile_bool(self, node):
+        node_type = node.elem_type
+        if node_type in ['int', 'string', 'nil']:
+            self.error(ErrorType.TYPE_ERROR, "Attempted to use int, string, or nil constant in bool operation")
+            return
+        if node_type == 'bool':
+            self.emit(CONST, self.const(node.val))
+            return
+        if node_type == 'var':
+            self.load_var(node)
+            self.emit(CHECK_BOOL, self.const(f"Attempted to use int, string, or nil via existing variable {node.name} in BOOL operation"))
+            return
+        if node_type == 'fcall':
+            self.compile_fcall(node)
+            self.emit(CHECK_BOOL, self.const("Attempted to use int, string, or nil via FCALL RETURN in BOOL operation"))
+            return
+
+        if node_type == '!':
+            if node.op1.elem_type not in BOOL_ALLOWABLE:
+                self.error(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = {node.op1}")
+                return
+            self.compile_bool(node.op1)
+            self.emit(NOT)
+            return
+
+        if node.get('op1') is None:
+            self.crash(node, 'op1')
+            return
+        if node.get('op2') is None:
+            self.crash(node, 'op2')
+            return
+        if node.op1.elem_type not in BOOL_ALLOWABLE:
+            self.error(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = {node.op1}")
+            return
+        if node.op2.elem_type not in BOOL_ALLOWABLE:
+            self.error(ErrorType.TYPE_ERROR, f"Operand 2 is NOT of an allowable type for BOOL operation: op2 = {node.op2}")
+            return
+        if node_type == '||':
+            self.compile_bool(node.op1)
+            self.compile_bool(node.op2)
+            self.emit(OR)
+        elif node_type == '&&':
+            self.compile_bool(node.op1)
+            self.compile_bool(node.op2)
+            self.emit(AND)
+        else:
+            # Comparison nodes reaching run_bool_operation directly evaluate to None
+            self.emit(CONST, self.const(None))
+
+    # check_equality
+    def compile_equality(self, node):
+        self.compile_eval_op(node.op1)
+        self.compile_eval_op(node.op2)
+        self.emit(EQ if node.elem_type == '==' else NE)
+
+    # integer_compare
+    def compile_integer_compare(self, node):
+        self.compile_int(node.op1)
+        self.compile_int(node.op2)
+        self.emit(COMPARE_OPCODES[node.elem_type])
+
+    # check_condition
+    def compile_condition(self, condition):
+        condition_type = condition.elem_type
+        if condition_type == 'bool':
+            self.emit(CONST, self.const(condition.val))
+        elif condition_type in ['int', 'string', 'nil']:
+            self.error(ErrorType.TYPE_ERROR, "Cannot evaluate STRING or INT or NIL in 'if' statement condition")
+        elif condition_type == 'var':
+            self.load_var(condition)
+            self.emit(CHECK_BOOL, self.const(f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted (via existing variable {condition.name} value)"))
+        elif condition_type == 'fcall':
+            self.compile_fcall(condition)
+            self.emit(CHECK_BOOL, self.const(f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted via fcall to {condition.name}"))
+        elif condition_type in EQUALITY_COMPARISONS:
+            self.compile_equality(condition)
+        elif condition_type in INTEGER_COMPARISONS:
+            self.compile_integer_compare(condition)
+        elif condition_type in BOOL_OPERATIONS:
+            self.compile_bool(condition)
+        else:
+            self.error(ErrorType.TYPE_ERROR, f"Unrecognized expression type { {condition_type} } for 'if' condition: { {condition} }")
+
+    ''' ---- Function calls ---- '''
+    # run_fcall
+    def compile_fcall(self, node):
+        func_name = node.name
+        func_args = node.args
+
+        if func_name in BUILTIN_FUNCTIONS:
+            self.compile_builtin(node)
+            return
+
+        if func_name not in self.defined_functions:
+            self.error(ErrorType.NAME_ERROR, f"Function {func_name} was not found / defined ")
+            return
+
+        # Overload with a matching argument count was bound by linker.py
+        func_to_run = node.target
+        if func_to_run is None:
+            self.error(ErrorType.NAME_ERROR, f"Function { {func_name} } with { len(func_args)} parameters was not found")
+            return
+
+        for arg in func_args:
+            if not self.compile_value(arg):
+                # Unrecognized argument expressions are passed through as the node itself
+                self.emit(CONST, self.const(arg))
+        self.emit(CALL, self.const((self.code_for(func_to_run), len(func_args))))
+
+    def compile_builtin(self, node):
+        func_name = node.name
+        if func_name == 'inputi' or func_name == 'inputs':
+            if len(node.args) > 1:
+                self.error(ErrorType.NAME_ERROR, f"No {func_name}() function found that takes more than 1 parameter")
+                return
+            self.emit(INPUTI if func_name == 'inputi' else INPUTS, self.const(node.args))
+            return
+
+        # print: evaluate every argument, then format them together
+        formats = []
+        for element in node.args:
+            node_type = element.elem_type
+            if node_type == 'string':
+                self.emit(CONST, self.const(element.val))
+                formats.append(FMT_RAW)
+            elif node_type == 'bool':
+                self.emit(CONST, self.const(element.val))
+                formats.append(FMT_TF)
+            elif node_type == 'int':
+                self.emit(CONST, self.const(element.val))
+                formats.append(FMT_STR)
+            elif node_type == 'var':
+                self.load_var(element)
+                formats.append(FMT_VAR)
+            elif node_type in OVERLOADED_OPERATIONS:
+                self.compile_overloaded(element)
+                formats.append(FMT_STR)
+            elif node_type in INT_OPERATIONS:
+                self.compile_int(element)
+                formats.append(FMT_STR)
+            elif node_type in BOOL_OPERATIONS:
+                self.compile_bool(element)
+                formats.append(FMT_TF)
+            elif node_type in EQUALITY_COMPARISONS:
+                self.compile_equality(element)
+                formats.append(FMT_TF)
+            elif node_type in INTEGER_COMPARISONS:
+                self.compile_integer_compare(element)
+                formats.append(FMT_TF)
+            elif node_type == 'fcall':
+                self.compile_fcall(element)
+                formats.append(FMT_STR)
+        self.emit(PRINT, self.const(formats))
+
+
+''' ---- Virtual machine ---- '''
+def values_equal(op1_value, op2_value):
+    # Same rules as Interpreter.check_equality
+    if ((op1_value is True) and (op2_value is True)) or ((op1_value is False) and (op2_value is False)):
+        same = True
+    elif ((op1_value is True) and (op2_value is False)) or ((op1_value is False) and (op2_value is True)):
+        same = False
+    elif type(op1_value) != type(op2_value):
+        same = False
+    else:
+        same = (op1_value == op2_value)
+
+    op1_type = getattr(op1_value, 'elem_type', None)
+    op2_type = getattr(op2_value, 'elem_type', None)
+    if op1_type == 'nil' and op2_type == 'nil':
+        same = True
+    elif op1_type == 'nil' or op2_type == 'nil':
+        same = False
+    return same
+
+
+def format_print_value(value, fmt):
+    if fmt == FMT_RAW:
+        return value
+    if fmt == FMT_STR:
+        return str(value)
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if fmt == FMT_VAR:
+        return str(value)
+    return ""
+
+
+def execute(interpreter, func_code, arg_values):
+    error = interpreter.error
+    profiler = interpreter.profiler     # None unless Interpreter(profile=True)
+
+    code = func_code.code
+    consts = func_code.consts
+    slots = [None] * func_code.nslots
+    for slot, value in zip(func_code.param_slots, arg_values):
+        slots[slot] = value
+    stack = []
+    pc = 0
+    frames = []     # saved (code, consts, slots, stack, pc) of callers
+
+    while True:
+        op = code[pc]
+        arg = code[pc + 1]
+        pc += 2
+
+        if op == LOAD:
+            stack.append(slots[arg])
+        elif op == CONST:
+            stack.append(consts[arg])
+        elif op == STORE:
+            slots[arg] = stack.pop()
+        elif op == OVERLOADED_ADD:
+            op2_value = stack.pop()
+            op1_value = stack[-1]
+            if type(op1_value) != type(op2_value):
+                error(ErrorType.TYPE_ERROR, f"Attempted to use + on different types { type(op1_value)} and { type(op2_value)}")
+            if type(op1_value) != int and type(op1_value) != str:
+                error(ErrorType.TYPE_ERROR, f"No + operation defined for { type(op1_value) }")
+            stack[-1] = op1_value + op2_value
+        elif op == JUMP_IF_FALSE:
+            condition = stack.pop()
+            if condition is not True and condition is not False:
+                error(ErrorType.TYPE_ERROR, f"Condition did not evaluate to boolean value { { condition } }")
+            if not condition:
+                pc = arg
+        elif op == LT:
+            op2_value = stack.pop()
+            op1_value = stack[-1]
+            if type(op1_value) != int or type(op2_value) != int:
+                error(ErrorType.TYPE_ERROR, f"Can't use operation < on non-integer values {op1_value} and {op2_value}")
+            stack[-1] = op1_value < op2_value
+        elif op == JUMP:
+            pc = arg
+        elif op == ADD:
+            op2_value = stack.pop()
+            stack[-1] = stack[-1] + op2_value
+        elif op == SUB:
+            op2_value = stack.pop()
+            stack[-1] = stack[-1] - op2_value
+        elif op == MUL:
+            op2_value = stack.pop()
+            stack[-1] = stack[-1] * op2_value
+        elif op == DIV:
+            op2_value = stack.pop()
+            stack[-1] = stack[-1] // op2_value
+        elif op == CHECK_INT:
+            value = stack[-1]
+            if not isinstance(value, int) or value is True or value is False:
+                error(ErrorType.TYPE_ERROR, consts[arg])
+        elif op == CHECK_BOOL:
+            value = stack[-1]
+            if value is not True and value is not False:
+                error(ErrorType.TYPE_ERROR, consts[arg])
+        elif op == CALL:
+            callee, argc = consts[arg]
+            if argc:
+                arg_values = stack[-argc:]
+                del stack[-argc:]
+            else:
+                arg_values = ()
+            frames.append((code, consts, slots, stack, pc))
+            if profiler is not None:
+                profiler.enter(callee.name, len(callee.param_slots))
+            code = callee.code
+            consts = callee.consts
+            slots = [None] * callee.nslots
+            for slot, value in zip(callee.param_slots, arg_values):
+                slots[slot] = value
+            stack = []
+            pc = 0
+        elif op == RETURN:
+            return_value = stack.pop()
+            if profiler is not None:
+                profiler.exit()
+            if not frames:
+                return return_value
+            code, consts, slots, stack, pc = frames.pop()
+            stack.append(return_value)
+        elif op == POP:
+            stack.pop()
+        elif op == DEFINE:
+            slots[arg] = INITIAL_VARIABLE_VALUE
+        elif op == LE or op == GT or op == GE:
+            op2_value = stack.pop()
+            op1_value = stack[-1]
+            if type(op1_value) != int or type(op2_value) != int:
+                symbol = {LE: '<=', GT: '>', GE: '>='}[op]
+                error(ErrorType.TYPE_ERROR, f"Can't use operation {symbol} on non-integer values {op1_value} and {op2_value}")
+            if op == LE:
+                stack[-1] = op1_value <= op2_value
+            elif op == GT:
+                stack[-1] = op1_value > op2_value
+            else:
+                stack[-1] = op1_value >= op2_value
+        elif op == EQ:
+            op2_value = stack.pop()
+            stack[-1] = values_equal(stack[-1], op2_value)
+        elif op == NE:
+            op2_value = stack.pop()
+            stack[-1] = not values_equal(stack[-1], op2_value)
+        elif op == NOT:
+            stack[-1] = not stack[-1]
+        elif op == AND:
+            op2_value = stack.pop()
+            stack[-1] = stack[-1] and op2_value
+        elif op == OR:
+            op2_value = stack.pop()
+            stack[-1] = stack[-1] or op2_value
+        elif op == NEG:
+            stack[-1] = -stack[-1]
+        elif op == ADD_DISPATCH:
+            op2_value = stack.pop()
+            op1_value = stack.pop()
+            if type(op1_value) != type(op2_value):
+                error(ErrorType.TYPE_ERROR, f"Attempted to use + on different types { type(op1_value)} and { type(op2_value)}")
+            if type(op1_value) == int:
+                pc = arg[0]
+            elif type(op1_value) == str:
+                pc = arg[1]
+            else:
+                error(ErrorType.TYPE_ERROR, f"No + operation defined for { type(op1_value) }")
+        elif op == CHECK_NOT_INT:
+            if isinstance(stack[-1], int):
+                error(ErrorType.TYPE_ERROR, consts[arg])
+        elif op == PRINT:
+            formats = consts[arg]
+            if formats:
+                values = stack[-len(formats):]
+                del stack[-len(formats):]
+            else:
+                values = ()
+            interpreter.output("".join(format_print_value(value, fmt) for value, fmt in zip(values, formats)))
+            stack.append(NIL_VALUE)
+        elif op == INPUTI:
+            stack.append(interpreter.inputi(consts[arg]))
+        elif op == INPUTS:
+            stack.append(interpreter.inputs(consts[arg]))
+        elif op == ERROR:
+            error_type, description = consts[arg]
+            error(error_type, description)
+        elif op == ECHO:
+            print(consts[arg])
+        elif op == CRASH:
+            raise AttributeError(consts[arg])
+        else:
+            raise RuntimeError(f"Unknown opcode {op}")
+
+
+# Compile every function once, then run main
+def run_program(interpreter, main_node):
+    compiler = BytecodeCompiler(interpreter.defined_functions)
+    compiler.compile_all()
+    profiler = interpreter.profiler
+    if profiler is None:
+        return execute(interpreter, compiler.code_for(main_node), [])
+
+    profiler.enter(main_node.name, len(main_node.args))
+    try:
+        return execute(interpreter, compiler.code_for(main_node), [])
+    finally:
+        # main's RETURN already closed its own entry unless an error stopped the program
+        profiler.unwind()
+
+
+''' ---- Debugging ---- '''
+OPCODE_NAMES = {value: name for name, value in list(globals().items())
+                if name.isupper() and isinstance(value, int) and not name.startswith('FMT_')}
+
+
+def disassemble(func_code):
+    lines = [f"func {func_code.name}  (slots: {func_code.nslots})"]
+    code = func_code.code
+    for pc in range(0, len(code), 2):
+        op, arg = code[pc], code[pc + 1]
+        line = f"{pc:5d}  {OPCODE_NAMES.get(op, op):<15}"
+        if arg is not None:
+            line += f" {arg}"
+            if op in (CONST, ERROR, CHECK_INT, CHECK_BOOL, CHECK_NOT_INT, ECHO, CRASH):
+                line += f"    ({consts_repr(func_code.consts[arg])})"
+            elif op == CALL:
+                line += f"    ({func_code.consts[arg][0].name}/{func_code.consts[arg][1]})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def consts_repr(value):
+    if isinstance(value, Element):
+        return str(value)
+    return repr(value)
@@ -0,0 +1,1394 @@
+import operator
+
+from intbase import ErrorType
+from element import Element
+from resolver import UNDECLARED, find_slot
+
+# Closure-compilation backend for interpreterv3
+#   interpreterv3 re-checks elem_type strings + allowable_types lists every time it evaluates a node.
+#   Here every node is compiled once, for the evaluator that will run it, into a Python closure
+#   that takes the scope stack: an int '+' on two local variables becomes
+#       lambda scope_stack: <slot a>['val'] + <slot b>['val']     (plus the type checks the tree-walker does)
+#   and the program runs by calling the closures. Node types that decide an error are checked at compile time,
+#   the error itself is still raised when the node would have been evaluated
+#
+#   Each compile_* method mirrors one evaluation function in interpreterv3.Interpreter, so the output log and
+#   error types match the tree-walker exactly (including the double evaluation of '+' operands in
+#   overloaded_operator). Scopes are the same resolver-slot arrays of {'type', 'val'} dicts, so the few shapes
+#   that aren't worth specializing just call the tree-walker's method for that node
+#   Closures are cached per (evaluator, node), so each node is compiled at most once per evaluator
+#
+#   The load-time annotations are compiled in too: nodes typecheck.py marked .checked get closures that mirror
+#   eval_checked (no type checks at all), and counted for loops (countedloop.py) run on a plain int the same
+#   way run_counted_loop does
+
+INT_OPERATIONS = ['+', '-', '*', '/', 'neg']
+BOOL_OPERATIONS = ['!', '||', '&&']
+EQUALITY_COMPARISONS = ['==', '!=']
+INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
+OVERLOADED_OPERATIONS = ['+']
+STRING_OPERATIONS = ['+']
+
+INT_ALLOWABLE = ['int', 'var', 'fcall'] + INT_OPERATIONS
+BOOL_ALLOWABLE = ['bool', 'var', 'fcall', 'int'] + BOOL_OPERATIONS + EQUALITY_COMPARISONS + INTEGER_COMPARISONS + INT_OPERATIONS
+PRIMITIVE_DEFAULTS = {'int': 0, 'bool': False, 'string': ""}
+
+ARITH_OPERATORS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.floordiv}
+COMPARE_OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+NO_VALUE_DEFINED = object()     # eval_op() on a node it doesn't handle (same as interpreterv3's)
+NO_VALUE_MESSAGE = "** ERR: EVAL_OP did not return anything\n___________________________\n"
+
+
+def memoized(compile_method):
+    def compile_cached(self, node):
+        key = (compile_method.__name__, id(node))
+        closure = self.cache.get(key)
+        if closure is None:
+            closure = self.cache[key] = compile_method(self, node)
+        return closure
+    return compile_cached
+
+
+# (scope index, slot) for a plain variable that can only live in one place, else None
+def local_slot(node):
+    if node.elem_type != 'var' or '.' in node.name or len(node.addr) != 1:
+        return None
+    depth, slot = node.addr[0]
+    return -1 - depth, slot
+
+
+def print_bool(result):
+    # printout() only appends something for actual True / False
+    if result is True:
+        return "true"
+    if result is False:
+        return "false"
+    return ""
+
+
+''' ---- Compiler ---- '''
+class ClosureCompiler:
+    def __init__(self, interpreter, return_value_class):
+        self.interp = interpreter
+        self.ReturnValue = return_value_class
+        self.defined_structs = interpreter.defined_structs
+        self.cache = {}
+        self.functions = {}     # id(func node) -> compiled run_func(args)
+
+    ''' ---- Helpers ---- '''
+    def fail(self, error_type, description):
+        interp = self.interp
+
+        def fail(scope_stack):
+            interp.error(error_type, description)
+        return fail
+
+    def walk(self, method, node):
+        # Unspecialized shape: evaluate it with the tree-walker's own method
+        def walk(scope_stack):
+            return method(node, scope_stack)
+        return walk
+
+    def compile_block(self, statements):
+        compiled = [self.compile_statement(statement_node) for statement_node in statements]
+
+        def block(scope_stack):
+            for statement in compiled:
+                signal = statement(scope_stack)
+                if signal is not None:
+                    return signal
+            return None
+        if len(compiled) == 1:
+            return compiled[0]
+        return block
+
+    ''' ---- Functions ---- '''
+    def compile_function(self, func_node):
+        run_func = self.functions.get(id(func_node))
+        if run_func is not None:
+            return run_func
+
+        interp = self.interp
+        ReturnValue = self.ReturnValue
+        nslots = func_node.nslots
+        params = [(param.slot, param.var_type) for param in func_node.args]
+        expected_return_type = func_node.return_type
+        body = None     # compiled below, after run_func is registered (so recursive calls can find it)
+
+        def run_func(func_args):
+            func_vars = [UNDECLARED] * nslots
+            for (slot, var_type), var_value in zip(params, func_args):
+                func_vars[slot] = {'type': var_type, 'val': var_value['val']}
+
+            rval = body([func_vars])
+            if rval is not None:
+                if expected_return_type == 'void':
+                    if rval.return_type is not None or rval.return_value is not None:
+                        interp.error(ErrorType.TYPE_ERROR, f"Attempted to return a value from a VOID function")
+                    return None
+                if rval.return_type is None and rval.return_value is None:
+                    return ReturnValue(interp.default_values(expected_return_type), expected_return_type)
+                if rval.return_type == 'int' and expected_return_type == 'bool':
+                    return ReturnValue(bool(rval.return_value), expected_return_type)
+                if rval.return_type != expected_return_type:
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Returned value { {rval.return_value} } does not match expected type \"{expected_return_type}\" "
+                    )
+                return rval
+
+            if expected_return_type == 'void':
+                return None
+            return ReturnValue(interp.default_values(expected_return_type), expected_return_type)
+
+        profiler = interp.profiler
+        if profiler is not None:
+            unprofiled = run_func
+            name, arity = func_node.name, len(func_node.args)
+
+            def run_func(func_args):
+                profiler.enter(name, arity)
+                try:
+                    return unprofiled(func_args)
+                finally:
+                    profiler.exit()
+
+        self.functions[id(func_node)] = run_func
+        body = self.compile_block(func_node.statements)
+        return run_func
+
+    ''' ---- Statements ---- '''
+    def compile_statement(self, node):
+        node_type = node.elem_type
+        if node_type == 'vardef':
+            return self.compile_vardef(node)
+        if node_type == '=':
+            return self.compile_assign(node)
+        if node_type == 'fcall':
+            call = self.compile_fcall(node)
+
+            def fcall_statement(scope_stack):
+                call(scope_stack)
+            return fcall_statement
+        if node_type == 'if':
+            return self.compile_if(node)
+        if node_type == 'for':
+            return self.compile_for(node)
+        if node_type == 'return':
+            return self.compile_return(node)
+        return self.fail(ErrorType.NAME_ERROR, f"Unrecognized statement of type {node_type}")
+
+    def compile_vardef(self, node):
+        interp = self.interp
+        slot = node.slot
+        var_name = node.name
+        var_type = node.var_type
+        known_type = var_type in ['int', 'bool', 'string'] + list(self.defined_structs.keys())
+        default = PRIMITIVE_DEFAULTS.get(var_type)
+
+        def vardef(scope_stack):
+            latest_scope = scope_stack[-1]
+            if latest_scope[slot] is not UNDECLARED:
+                interp.error(ErrorType.NAME_ERROR, f"Variable {var_name} defined more than once")
+            if not known_type:
+                interp.error(ErrorType.TYPE_ERROR, f"Unrecognized type for variable definition: { {var_type} }")
+            latest_scope[slot] = {'type': var_type, 'val': Element("nil") if default is None else default}
+        return vardef
+
+    def compile_assign(self, node):
+        interp = self.interp
+        var_name = node.name
+
+        if '.' in var_name:
+            # struct_update(): check the base variable, then find the struct + slot to overwrite
+            base_name = var_name.split('.')[0]
+            defined_structs = self.defined_structs
+            field_slot = self.compile_field_slot(node)
+
+            def target(scope_stack):
+                scope, slot = find_slot(node, scope_stack)
+                if scope is None:
+                    interp.error(ErrorType.NAME_ERROR, f"Struct variable { {base_name} } not found in any scope")
+                base_type = scope[slot]['type']
+                if base_type not in defined_structs:
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Attempted to use dot operator on NON-STRUCT variable { {base_name} } of type \"{base_type}\""
+                    )
+                return field_slot(scope_stack)
+            value = self.compile_assigned_value(node, var_name, base_name)
+
+            def assign_field(scope_stack):
+                struct, slot = target(scope_stack)
+                struct.values[slot] = value(scope_stack, struct.shape.types[slot])
+            return assign_field
+
+        location = local_slot(node)
+        message = f"Variable { {var_name} } not found in any scope"
+        if location is not None:
+            index, slot = location
+
+            def target(scope_stack):
+                var_dict = scope_stack[index][slot]
+                if var_dict is UNDECLARED:
+                    interp.error(ErrorType.NAME_ERROR, message)
+                return var_dict
+        else:
+            def target(scope_stack):
+                scope, slot = find_slot(node, scope_stack)
+                if scope is None:
+                    interp.error(ErrorType.NAME_ERROR, message)
+                return scope[slot]
+        value = self.compile_assigned_value(node, var_name, var_name)
+
+        def assign(scope_stack):
+            var_dict = target(scope_stack)
+            var_dict['val'] = value(scope_stack, var_dict['type'])
+        return assign
+
+    def compile_assigned_value(self, node, var_access, var_name):
+        # run_assign() / struct_update(): value(scope_stack, var_type) -> value to store
+        #   var_access = name used in most messages, var_name = the one used in the fcall + nil messages
+        interp = self.interp
+        expression = node.expression
+        node_type = expression.elem_type
+
+        if node.checked:
+            # Proven to fit the variable (typecheck.py): only the int -> bool coercion is left
+            checked = self.compile_checked(expression)
+
+            def value(scope_stack, var_type):
+                if var_type == 'bool':
+                    return bool(checked(scope_stack))
+                return checked(scope_stack)
+            return value
+
+        if node_type in ('string', 'int', 'bool'):
+            constant = expression.val
+
+            def value(scope_stack, var_type):
+                if node_type != var_type:
+                    if var_type == 'bool' and node_type == 'int':
+                        return bool(constant)
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign type { { node_type} } to variable \"{var_access}\" of type { {var_type} }"
+                    )
+                return constant
+            return value
+
+        if node_type == 'var':
+            variable = self.compile_variable(expression)
+            other_name = expression.name
+
+            def value(scope_stack, var_type):
+                other_var_val = variable(scope_stack)
+                other_var_type = other_var_val['type']
+                if other_var_type != var_type:
+                    if var_type == 'bool' and other_var_type == 'int':
+                        return bool(other_var_val['val'])
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign type of variable  { { other_var_type} } of variable \"{other_name}\" to variable \"{var_access}\" of type { {var_type} }"
+                    )
+                return other_var_val['val']
+            return value
+
+        if node_type == 'fcall':
+            call = self.compile_fcall(expression)
+            struct_field = var_access != var_name
+
+            def value(scope_stack, var_type):
+                fcall_ret = call(scope_stack)
+                if fcall_ret is None:
+                    if struct_field:
+                        interp.error(
+                            ErrorType.TYPE_ERROR,
+                            f"Cannot assign fcall return value of type NONE to variable \"{var_name}\" of type { {var_type} }"
+                        )
+                    interp.error(ErrorType.TYPE_ERROR, f"Cannot assign VOID function { {expression.name} } to variable \"{var_name}\"")
+                if fcall_ret['type'] != var_type:
+                    if var_type == 'bool' and fcall_ret['type'] == 'int':
+                        return bool(fcall_ret['val'])
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign fcall return value of type  { { fcall_ret['val']} } to variable \"{var_name}\" of type { {var_type} }"
+                    )
+                return fcall_ret['val']
+            return value
+
+        # Anything else goes through the evaluator for the variable's type
+        typed = {
+            'int': self.compile_int_types(expression),
+            'bool': self.compile_bool_types(expression),
+            'string': self.compile_string_types(expression),
+        }
+        defined_structs = self.defined_structs
+        BrewinStruct = interp.BrewinStruct
+
+        def value(scope_stack, var_type):
+            evaluate = typed.get(var_type)
+            if evaluate is not None:
+                return evaluate(scope_stack)
+            if node_type == 'nil':
+                if var_type not in defined_structs:
+                    interp.error(ErrorType.TYPE_ERROR, f"Cannot assign non-struct variable \"{var_name}\" to NIL value")
+                return Element("nil")
+            if node_type == 'new':
+                struct_type = expression.var_type
+                if struct_type != var_type:
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign non-struct variable \"{var_access}\" to STRUCT of type { {struct_type} } value"
+                    )
+                return BrewinStruct(interp, expression)
+            interp.error(ErrorType.TYPE_ERROR, f"Unrecognized expression \"{node_type}\" in variable assignment for {var_access}")
+        return value
+
+    def compile_if(self, node):
+        nslots = node.nslots
+        condition = self.compile_statement_condition(node)
+        then_block = self.compile_block(node.statements)
+        else_block = None
+        if node.else_statements is not None:
+            else_block = self.compile_block(node.else_statements)
+
+        def evaluate_if(scope_stack):
+            scope_stack.append([UNDECLARED] * nslots)
+            signal = None
+            if condition(scope_stack):
+                signal = then_block(scope_stack)
+            elif else_block is not None:
+                signal = else_block(scope_stack)
+            scope_stack.pop()
+            return signal
+        return evaluate_if
+
+    def compile_for(self, node):
+        nslots = node.nslots
+        initialize = self.compile_assign(node.init)
+        condition = self.compile_statement_condition(node)
+        update = self.compile_assign(node.update)
+        body = self.compile_block(node.statements)
+
+        def run_for_loop(scope_stack):
+            initialize(scope_stack)
+            while condition(scope_stack):
+                scope_stack.append([UNDECLARED] * nslots)
+                signal = body(scope_stack)
+                scope_stack.pop()
+                if signal is not None:
+                    return signal
+                update(scope_stack)
+            return None
+
+        if node.counted is None:
+            return run_for_loop
+
+        # for (i = a; i < b; i = i + c) (countedloop.py): once the first check saw two ints, run_counted_loop
+        loop = node.counted
+        counted_value = self.interp.counted_value
+        compare = loop.compare
+        step = loop.step
+
+        def run_counted_loop(scope_stack):
+            initialize(scope_stack)
+            if not condition(scope_stack):
+                return None
+            counter = counted_value(loop.var, scope_stack)
+            bound = counted_value(loop.bound, scope_stack)
+            if counter is None or bound is None:
+                while True:
+                    scope_stack.append([UNDECLARED] * nslots)
+                    signal = body(scope_stack)
+                    scope_stack.pop()
+                    if signal is not None:
+                        return signal
+                    update(scope_stack)
+                    if not condition(scope_stack):
+                        return None
+
+            scope, slot = find_slot(loop.var, scope_stack)
+            variable = scope[slot]
+            while True:
+                scope_stack.append([UNDECLARED] * nslots)
+                signal = body(scope_stack)
+                scope_stack.pop()
+                if signal is not None:
+                    return signal
+                counter += step
+                variable['val'] = counter
+                if not compare(counter, bound):
+                    return None
+        return run_counted_loop
+
+    def compile_statement_condition(self, node):
+        # if / for condition: eval_checked if it was proven at load time (typecheck.py), else check_condition
+        if node.checked:
+            return self.compile_checked(node.condition)
+        return self.compile_condition(node.condition)
+
+    def compile_return(self, node):
+        interp = self.interp
+        ReturnValue = self.ReturnValue
+        expression = node.expression
+
+        if expression is None:
+            return lambda scope_stack: ReturnValue(None, None)
+
+        if node.checked:
+            # Expression + the type it gives were decided at load time (typecheck.py)
+            checked = self.compile_checked(expression)
+            value_type = node.value_type
+            return lambda scope_stack: ReturnValue(checked(scope_stack), value_type)
+
+        return_type = expression.elem_type
+        if return_type == 'nil':
+            return lambda scope_stack: ReturnValue(Element("nil"), None)
+
+        if return_type in ('int', 'string', 'bool'):
+            constant = expression.val
+            return lambda scope_stack: ReturnValue(constant, return_type)
+
+        if return_type == 'var':
+            variable = self.compile_variable(expression)
+
+            def return_var(scope_stack):
+                var_dict = variable(scope_stack)
+                return ReturnValue(var_dict['val'], var_dict['type'])
+            return return_var
+
+        if return_type == 'new':
+            struct_type = str(expression.var_type)
+            BrewinStruct = interp.BrewinStruct
+            return lambda scope_stack: ReturnValue(BrewinStruct(interp, expression), struct_type)
+
+        if return_type in OVERLOADED_OPERATIONS:
+            overloaded = self.compile_overloaded(expression)
+
+            def return_overloaded(scope_stack):
+                value = overloaded(scope_stack)
+                if type(value) == int:
+                    return ReturnValue(value, 'int')
+                if type(value) == str:
+                    return ReturnValue(value, 'string')
+                return ReturnValue(value, None)
+            return return_overloaded
+
+        if return_type in INT_OPERATIONS:
+            evaluate, result_type = self.compile_int(expression), 'int'
+        elif return_type in BOOL_OPERATIONS:
+            evaluate, result_type = self.compile_bool(expression), 'bool'
+        elif return_type in EQUALITY_COMPARISONS:
+            evaluate, result_type = self.compile_equality(expression), 'bool'
+        elif return_type in INTEGER_COMPARISONS:
+            evaluate, result_type = self.compile_compare(expression), 'bool'
+        elif return_type == 'fcall':
+            call = self.compile_fcall(expression)
+
+            def return_fcall(scope_stack):
+                fcall_ret = call(scope_stack)
+                if fcall_ret is None:
+                    return ReturnValue(None, None)
+                return ReturnValue(fcall_ret['val'], fcall_ret['type'])
+            return return_fcall
+        else:
+            return lambda scope_stack: ReturnValue(None, None)
+
+        return lambda scope_stack: ReturnValue(evaluate(scope_stack), result_type)
+
+    ''' ---- Function calls ---- '''
+    @memoized
+    def compile_fcall(self, node):
+        # Closure returns the {'val', 'type'} of the call, or None for void functions (run_fcall)
+        interp = self.interp
+        func_name = node.name
+
+        if node.builtin is not None:
+            if func_name == 'print':
+                if node.checked:
+                    return self.compile_print_checked(node.args)
+                return self.compile_print(node.args)
+            return self.walk(node.builtin, node)
+
+        func_to_run = node.target
+        if func_to_run is None:
+            if func_name not in interp.defined_functions:
+                return self.fail(ErrorType.NAME_ERROR, f"Function {func_name} was not found / defined ")
+            return self.fail(ErrorType.NAME_ERROR, f"Function { {func_name} } with { len(node.args)} parameters was not found")
+
+        if node.checked:
+            # Every argument was proven to match its parameter (typecheck.py)
+            arguments = [self.compile_checked_argument(param, arg) for param, arg in zip(func_to_run.args, node.args)]
+        else:
+            arguments = [self.compile_argument(node, param, arg) for param, arg in zip(func_to_run.args, node.args)]
+        run_func = self.compile_function(func_to_run)
+
+        def run_fcall(scope_stack):
+            function_ret_val = run_func([argument(scope_stack) for argument in arguments])
+            if function_ret_val is None:
+                return None
+            return {'val': function_ret_val.return_value, 'type': function_ret_val.return_type}
+        return run_fcall
+
+    def compile_checked_argument(self, param, arg):
+        param_type = param.var_type
+        checked = self.compile_checked(arg)
+        if param_type == 'bool':
+            return lambda scope_stack: {'type': 'bool', 'val': bool(checked(scope_stack))}
+        return lambda scope_stack: {'type': param_type, 'val': checked(scope_stack)}
+
+    def compile_argument(self, node, param, arg):
+        # Closure returning the argument's {'type', 'val'} (run_func copies 'val' into the new scope)
+        interp = self.interp
+        param_type = param.var_type
+        arg_type = arg.elem_type
+
+        if arg_type in ('string', 'int', 'bool'):
+            if param_type != arg_type:
+                if param_type == 'bool' and arg_type == 'int':
+                    coerced = {'type': 'bool', 'val': bool(arg.val)}
+                    return lambda scope_stack: coerced
+                return self.fail(
+                    ErrorType.TYPE_ERROR,
+                    f"Cannot assign type { { arg_type} } to parameter \"{param.name}\" of type { {param_type} }"
+                )
+            constant = {'type': arg_type, 'val': arg.val}
+            return lambda scope_stack: constant
+
+        if arg_type == 'var':
+            variable = self.compile_variable(arg)
+
+            def var_argument(scope_stack):
+                other_var_val = variable(scope_stack)
+                other_var_type = other_var_val['type']
+                if other_var_type != param_type:
+                    if param_type == 'bool' and other_var_type == 'int':
+                        return {'type': 'bool', 'val': bool(other_var_val['val'])}
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign type { { other_var_type } } to PARAMETER \"{param.name}\" of type { {param_type} }"
+                    )
+                return other_var_val
+            return var_argument
+
+        if arg_type == 'fcall':
+            call = self.compile_fcall(arg)
+
+            def fcall_argument(scope_stack):
+                fcall_ret = call(scope_stack)
+                if fcall_ret is None:
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign type NONE to PARAMETER \"{param.name}\" of type { {param_type} } via FUNCTION CALL RETURN VALUE"
+                    )
+                if fcall_ret['type'] != param_type:
+                    if param_type == 'bool' and fcall_ret['type'] == 'int':
+                        return {'type': 'bool', 'val': bool(fcall_ret['val'])}
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Cannot assign type { { fcall_ret['type'] } } to PARAMETER \"{param.name}\" of type { {param_type} } via FUNCTION CALL RETURN VALUE"
+                    )
+                return fcall_ret
+            return fcall_argument
+
+        if param_type in ('int', 'string', 'bool'):
+            if param_type == 'int':
+                evaluate = self.compile_int_types(arg)
+            elif param_type == 'string':
+                evaluate = self.compile_string_types(arg)
+            else:
+                evaluate = self.compile_bool_types(arg)
+            return lambda scope_stack: {'type': param_type, 'val': evaluate(scope_stack)}
+
+        if arg_type == 'nil':
+            if param_type not in self.defined_structs:
+                return self.fail(
+                    ErrorType.TYPE_ERROR,
+                    f"Attempted to pass in NIL argument as type { {param_type} } to function \"{node.name}\""
+                )
+            return lambda scope_stack: {'type': 'nil', 'val': Element("nil")}
+
+        if arg_type == 'new':
+            struct_type = arg.var_type
+            if struct_type != param_type:
+                return self.fail(
+                    ErrorType.TYPE_ERROR,
+                    f"Cannot assign different STRUCT type {struct_type} to parameter \"{param_type}\" "
+                )
+            BrewinStruct = interp.BrewinStruct
+            return lambda scope_stack: {'type': struct_type, 'val': BrewinStruct(interp, arg)}
+
+        # run_fcall() passes the node itself here, which run_func() then fails to read
+        return lambda scope_stack: arg
+
+    ''' ---- Variables ---- '''
+    @memoized
+    def compile_variable(self, node):
+        # Closure returning the variable's {'type', 'val'} dictionary (get_variable_value)
+        if '.' in node.name:
+            return self.compile_struct_access(node)
+
+        interp = self.interp
+        message = f"Variable {node.name} has not been declared w/in function scope"
+        location = local_slot(node)
+        if location is not None:
+            index, slot = location
+
+            def variable(scope_stack):
+                var_dict = scope_stack[index][slot]
+                if var_dict is UNDECLARED:
+                    interp.error(ErrorType.NAME_ERROR, message)
+                return var_dict
+            return variable
+
+        def variable(scope_stack):
+            scope, slot = find_slot(node, scope_stack)
+            if scope is None:
+                interp.error(ErrorType.NAME_ERROR, message)
+            return scope[slot]
+        return variable
+
+    @memoized
+    def compile_field_slot(self, node):
+        # field_slot(): (struct, slot) at the end of the a.b.c path, through the node's inline cache
+        interp = self.interp
+        var_name = node.name.split('.')[0]
+        defined_structs = self.defined_structs
+        BrewinStruct = interp.BrewinStruct
+        cache = node.field_cache
+        steps = list(enumerate(cache.fields))
+        shapes = cache.shapes
+        slots = cache.slots
+
+        def field_slot(scope_stack):
+            scope, slot = find_slot(node, scope_stack)
+            if scope is None:
+                interp.error(ErrorType.NAME_ERROR, f"Variable {var_name} has not been declared w/in function scope")
+            var_value = scope[slot]
+            if var_value['type'] not in defined_structs:
+                interp.error(
+                    ErrorType.TYPE_ERROR,
+                    f"Attempted to use dot operator on NON-STRUCT variable { {var_name} } of type \"{var_value['type']}\""
+                )
+
+            accessing_from = var_value['val']
+            struct = None
+            field = 0
+            for step, field_access in steps:
+                if type(accessing_from) != BrewinStruct:
+                    if isinstance(accessing_from, Element) and accessing_from.elem_type == 'nil':
+                        interp.error(
+                            ErrorType.FAULT_ERROR,
+                            f"Attempting to use dot operator on uninitialized struct via field \"{field_access}\""
+                        )
+                    interp.error(
+                        ErrorType.TYPE_ERROR,
+                        f"Attempted to use dot operator on NON-STRUCT variable { {field_access} } of type \"{type(accessing_from)}\""
+                    )
+                shape = accessing_from.shape
+                if shape is shapes[step]:
+                    field = slots[step]
+                else:
+                    field = shape.index.get(field_access)
+                    if field is None:
+                        interp.error(ErrorType.NAME_ERROR, f"Field \"{field_access}\" isn't defined for struct { {var_name} }")
+                    shapes[step] = shape
+                    slots[step] = field
+                struct = accessing_from
+                accessing_from = struct.values[field]
+            return struct, field
+        return field_slot
+
+    @memoized
+    def compile_struct_access(self, node):
+        # struct_access(): the field's {'type', 'val'}
+        field_slot = self.compile_field_slot(node)
+
+        def struct_access(scope_stack):
+            struct, slot = field_slot(scope_stack)
+            return {'type': struct.shape.types[slot], 'val': struct.values[slot]}
+        return struct_access
+
+    def compile_typed_var(self, node, allowed, message):
+        # Variable value, TYPE_ERROR unless its type is in allowed
+        interp = self.interp
+        location = local_slot(node)
+        if location is not None:
+            index, slot = location
+            undeclared = f"Variable {node.name} has not been declared w/in function scope"
+
+            def typed_var(scope_stack):
+                var_dict = scope_stack[index][slot]
+                if var_dict is UNDECLARED:
+                    interp.error(ErrorType.NAME_ERROR, undeclared)
+                if var_dict['type'] not in allowed:
+                    interp.error(ErrorType.TYPE_ERROR, message(var_dict['type']))
+                return var_dict['val']
+            return typed_var
+
+        variable = self.compile_variable(node)
+
+        def typed_var(scope_stack):
+            var_dict = variable(scope_stack)
+            if var_dict['type'] not in allowed:
+                interp.error(ErrorType.TYPE_ERROR, message(var_dict['type']))
+            return var_dict['val']
+        return typed_var
+
+    def compile_typed_fcall(self, node, allowed, void_message, type_message):
+        # Call result value: TYPE_ERROR for void calls (void_message None -> crash on the None like the tree-walker)
+        interp = self.interp
+        call = self.compile_fcall(node)
+
+        def typed_fcall(scope_stack):
+            fcall_ret = call(scope_stack)
+            if fcall_ret is None and void_message is not None:
+                interp.error(ErrorType.TYPE_ERROR, void_message)
+            if fcall_ret is None or fcall_ret['type'] not in allowed:
+                interp.error(ErrorType.TYPE_ERROR, type_message(fcall_ret['type']))
+            return fcall_ret['val']
+        return typed_fcall
+
+    ''' ---- Operations allowed for specific types (int_types / bool_types / string_types) ---- '''
+    @memoized
+    def compile_int_types(self, node):
+        node_type = node.elem_type
+        if node_type == 'int':
+            constant = node.val
+            return lambda scope_stack: constant
+        if node_type == 'var':
+            return self.compile_typed_var(node, ('int',), lambda other_var_type: (
+                f"Cannot assign type of variable { { other_var_type} } of variable \"{node.name}\" INT variable  (Inside INT_TYPES)"))
+        if node_type in INT_OPERATIONS:
+            return self.compile_int(node)
+        if node_type == 'fcall':
+            return self.compile_typed_fcall(node, ('int',), None, lambda fcall_type: (
+                f"Cannot use FCALL to \"{node.name} \" w/ return type { { fcall_type }} in INT_TYPES"))
+        return self.fail(
+            ErrorType.TYPE_ERROR,
+            f"INSIDE INT_TYPES: Cannot perform non-integer operation { {node_type} } and return int value"
+        )
+
+    @memoized
+    def compile_bool_types(self, node):
+        node_type = node.elem_type
+        if node_type in ('bool', 'int'):
+            constant = bool(node.val)
+            return lambda scope_stack: constant
+        if node_type == 'var':
+            typed_var = self.compile_typed_var(node, ('bool', 'int'), lambda other_var_type: (
+                f"Cannot assign type of variable { { other_var_type} } of variable \"{node.name}\" BOOL variable  (Inside BOOL_TYPES)"))
+            return lambda scope_stack: bool(typed_var(scope_stack))
+        if node_type in BOOL_OPERATIONS:
+            return self.compile_bool(node)
+        if node_type in EQUALITY_COMPARISONS:
+            return self.compile_equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compile_compare(node)
+        if node_type == 'fcall':
+            typed_fcall = self.compile_typed_fcall(
+                node, ('bool', 'int'),
+                f"Cannot use FCALL to \"{node.name} \" w/ return type NONE in BOOL_TYPES",
+                lambda fcall_type: f"Cannot use FCALL to \"{node.name} \" w/ return type { { fcall_type }} in BOOL_TYPES"
+            )
+            return lambda scope_stack: bool(typed_fcall(scope_stack))
+        if node_type in INT_OPERATIONS:
+            evaluate = self.compile_int(node)
+            return lambda scope_stack: bool(evaluate(scope_stack))
+        return self.fail(
+            ErrorType.TYPE_ERROR,
+            f"INSIDE BOOL_TYPES: Cannot perform non-boolean operation { {node_type} } and return BOOL value"
+        )
+
+    @memoized
+    def compile_string_types(self, node):
+        node_type = node.elem_type
+        if node_type == 'string':
+            constant = node.val
+            return lambda scope_stack: constant
+        if node_type == 'var':
+            return self.compile_typed_var(node, ('string',), lambda other_var_type: (
+                f"Cannot assign type of variable { { other_var_type} } of variable \"{node.name}\" STRING variable  (Inside STRING_TYPES)"))
+        if node_type == 'fcall':
+            return self.compile_typed_fcall(
+                node, ('string',),
+                f"Cannot use FCALL to \"{node.name} \" w/ return type NONE in STRING_TYPES",
+                lambda fcall_type: f"Cannot use FCALL to \"{node.name} \" w/ return type { { fcall_type }} in STRING_TYPES"
+            )
+        if node_type in STRING_OPERATIONS:
+            return self.compile_string(node)
+        return self.fail(
+            ErrorType.TYPE_ERROR,
+            f"INSIDE STRING_TYPES: Cannot perform non-string operation { {node_type} } and return STRING value"
+        )
+
+    ''' ---- Integer / string / bool operations ---- '''
+    @memoized
+    def compile_int(self, node):
+        # run_int_operation
+        node_type = node.elem_type
+        if node_type in ('string', 'bool', 'nil'):
+            return self.fail(ErrorType.TYPE_ERROR, f"Attempted to use string or bool constant in integer operation")
+        if node_type == 'int':
+            constant = node.val
+            return lambda scope_stack: constant
+        if node_type == 'var':
+            return self.compile_typed_var(node, ('int',), lambda var_type: (
+                f"Attempted to use string or bool or nil via existing variable {node.name} in integer operation"))
+        if node_type == 'fcall':
+            return self.compile_typed_fcall(
+                node, ('int',),
+                f"Attempted to use NONE via fcall to \" {node.name} \" in INTEGER operation",
+                lambda fcall_type: f"Attempted to use TYPE \"{fcall_type }\"  via fcall to \" {node.name} \" in INTEGER operation"
+            )
+
+        if node_type == 'neg':
+            op1 = node.op1
+            if op1.elem_type not in INT_ALLOWABLE:
+                return self.fail(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for integer operation: op1 = {op1}")
+            operand = self.compile_int(op1)
+            return lambda scope_stack: -operand(scope_stack)
+
+        if node_type not in ARITH_OPERATORS:
+            # Comparisons / && / || fall off the end (None), ! and new crash on their missing fields
+            return self.walk(self.interp.run_int_operation, node)
+
+        op1 = node.op1
+        op2 = node.op2
+        if op1.elem_type not in INT_ALLOWABLE:
+            return self.fail(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for integer operation: op1 = {op1}")
+        if op2.elem_type not in INT_ALLOWABLE:
+            return self.fail(ErrorType.TYPE_ERROR, f"Operand 2 is NOT of an allowable type for integer operation: op2 = {op2}")
+
+        arith = ARITH_OPERATORS[node_type]
+        local_pair = self.compile_local_pair(op1, op2, f"in integer operation")
+        if local_pair is not None:
+            def local_arith(scope_stack):
+                value1, value2 = local_pair(scope_stack)
+                return arith(value1, value2)
+            return local_arith
+
+        evaluate1 = self.compile_int(op1)
+        if op2.elem_type == 'int':
+            constant = op2.val
+            return lambda scope_stack: arith(evaluate1(scope_stack), constant)
+        evaluate2 = self.compile_int(op2)
+        return lambda scope_stack: arith(evaluate1(scope_stack), evaluate2(scope_stack))
+
+    def compile_local_pair(self, op1, op2, context):
+        # Both operands are plain local variables: read both slots in one closure (same checks, same order)
+        location1 = local_slot(op1)
+        location2 = local_slot(op2)
+        if location1 is None or location2 is None:
+            return None
+        interp = self.interp
+        index1, slot1 = location1
+        index2, slot2 = location2
+        undeclared1 = f"Variable {op1.name} has not been declared w/in function scope"
+        undeclared2 = f"Variable {op2.name} has not been declared w/in function scope"
+        wrong_type1 = f"Attempted to use string or bool or nil via existing variable {op1.name} {context}"
+        wrong_type2 = f"Attempted to use string or bool or nil via existing variable {op2.name} {context}"
+
+        def local_pair(scope_stack):
+            var1 = scope_stack[index1][slot1]
+            if var1 is UNDECLARED:
+                interp.error(ErrorType.NAME_ERROR, undeclared1)
+            if var1['type'] != 'int':
+                interp.error(ErrorType.TYPE_ERROR, wrong_type1)
+            var2 = scope_stack[index2][slot2]
+            if var2 is UNDECLARED:
+                interp.error(ErrorType.NAME_ERROR, undeclared2)
+            if var2['type'] != 'int':
+                interp.error(ErrorType.TYPE_ERROR, wrong_type2)
+            return var1['val'], var2['val']
+        return local_pair
+
+    @memoized
+    def compile_string(self, node):
+        # run_string_operation
+        node_type = node.elem_type
+        if node_type == 'var':
+            return self.compile_typed_var(node, ('string',), lambda var_type: (
+                f"Incompatible types for STRING operation, attempted to use INTEGER or BOOL (via existing variable {node.name} value)"))
+        if node_type in ('bool', 'int', 'nil'):
+            return self.fail(
+                ErrorType.TYPE_ERROR,
+                f"Incompatible types for STRING operation, attempted to use boolean or integer (or nil) constant value"
+            )
+        if node_type == 'string':
+            constant = node.val
+            return lambda scope_stack: constant
+        if node_type == 'fcall':
+            return self.compile_typed_fcall(
+                node, ('string',),
+                f"Attempted to use NONE via fcall to \"{node.name}\" in STRING operation",
+                lambda fcall_type: f"Attempted to use TYPE \"{fcall_type }\"  via fcall to \" {node.name} \" in STRING operation"
+            )
+        if node_type == '+':
+            evaluate1 = self.compile_string(node.op1)
+            evaluate2 = self.compile_string(node.op2)
+            return lambda scope_stack: evaluate1(scope_stack) + evaluate2(scope_stack)
+        # Every other node falls off the end of run_string_operation
+        return lambda scope_stack: None
+
+    @memoized
+    def compile_bool(self, node):
+        # run_bool_operation (&& and || evaluate both sides, no short-circuiting)
+        node_type = node.elem_type
+        if node_type in ('string', 'nil'):
+            return self.fail(ErrorType.TYPE_ERROR, f"Attempted to use int, string, or nil constant in bool operation")
+        if node_type in ('bool', 'int'):
+            constant = bool(node.val)
+            return lambda scope_stack: constant
+        if node_type == 'var':
+            typed_var = self.compile_typed_var(node, ('bool', 'int'), lambda var_type: (
+                f"Attempted to use string, or nil via existing variable {node.name} in BOOL operation"))
+            return lambda scope_stack: bool(typed_var(scope_stack))
+        if node_type == 'fcall':
+            typed_fcall = self.compile_typed_fcall(
+                node, ('bool', 'int'),
+                f"Attempted to use NONE via fcall to \"{node.name}\" in BOOL operation",
+                lambda fcall_type: f"Attempted to use TYPE \"{fcall_type }\"  via fcall to \" {node.name} \" in BOOL operation"
+            )
+            return lambda scope_stack: bool(typed_fcall(scope_stack))
+        if node_type in INT_OPERATIONS:
+            evaluate = self.compile_int(node)
+            return lambda scope_stack: bool(evaluate(scope_stack))
+        if node_type in EQUALITY_COMPARISONS:
+            return self.compile_equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compile_compare(node)
+
+        if node_type == '!':
+            op1 = node.op1
+            if op1.elem_type not in BOOL_ALLOWABLE:
+                return self.fail(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = {op1}")
+            operand = self.compile_bool(op1)
+            return lambda scope_stack: not operand(scope_stack)
+
+        if node_type not in ('||', '&&'):
+            return self.walk(self.interp.run_bool_operation, node)
+
+        op1 = node.op1
+        op2 = node.op2
+        if op1.elem_type not in BOOL_ALLOWABLE:
+            return self.fail(ErrorType.TYPE_ERROR, f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = \"{op1}\"")
+        if op2.elem_type not in BOOL_ALLOWABLE:
+            return self.fail(ErrorType.TYPE_ERROR, f"Operand 2 is NOT of an allowable type for BOOL operation: op2 = \"{op2}\"")
+        evaluate1 = self.compile_bool(op1)
+        evaluate2 = self.compile_bool(op2)
+        if node_type == '||':
+            def bool_or(scope_stack):
+                value1 = evaluate1(scope_stack)
+                value2 = evaluate2(scope_stack)
+                return value1 or value2
+            return bool_or
+
+        def bool_and(scope_stack):
+            value1 = evaluate1(scope_stack)
+            value2 = evaluate2(scope_stack)
+            return value1 and value2
+        return bool_and
+
+    ''' ---- Comparisons + overloaded operators ---- '''
+    @memoized
+    def compile_eval_op(self, node):
+        # Closure returning a {'type', 'val'} dictionary, None (void call) or NO_VALUE_DEFINED
+        op_type = node.elem_type
+        if op_type == 'var':
+            return self.compile_variable(node)
+        if op_type in ('int', 'string', 'bool'):
+            constant = node.val
+            return lambda scope_stack: {'type': op_type, 'val': constant}
+        if op_type == 'fcall':
+            return self.compile_fcall(node)
+        if op_type == 'nil':
+            return lambda scope_stack: {'type': 'nil', 'val': Element("nil")}
+        if op_type in OVERLOADED_OPERATIONS:
+            overloaded = self.compile_overloaded(node)
+
+            def overloaded_op(scope_stack):
+                value = overloaded(scope_stack)
+                return {'type': str(type(value)), 'val': value}
+            return overloaded_op
+
+        if op_type in INT_OPERATIONS:
+            evaluate, result_type = self.compile_int(node), 'int'
+        elif op_type in BOOL_OPERATIONS:
+            evaluate, result_type = self.compile_bool(node), 'bool'
+        elif op_type in EQUALITY_COMPARISONS:
+            evaluate, result_type = self.compile_equality(node), 'bool'
+        elif op_type in INTEGER_COMPARISONS:
+            evaluate, result_type = self.compile_compare(node), 'bool'
+        else:
+            return lambda scope_stack: NO_VALUE_DEFINED
+        return lambda scope_stack: {'type': result_type, 'val': evaluate(scope_stack)}
+
+    def compile_operand_pair(self, node, none_message):
+        # eval_op() both operands + the checks overloaded_operator / check_equality do before comparing types
+        interp = self.interp
+        operand1 = self.compile_eval_op(node.op1)
+        operand2 = self.compile_eval_op(node.op2)
+
+        def operand_pair(scope_stack):
+            op1 = operand1(scope_stack)
+            op2 = operand2(scope_stack)
+            if op1 is None or op2 is None:
+                interp.error(ErrorType.TYPE_ERROR, none_message)
+            if op1 is NO_VALUE_DEFINED or op2 is NO_VALUE_DEFINED:
+                print(NO_VALUE_MESSAGE)
+            # (a NO_VALUE_DEFINED operand fails right here, same as the tree-walker)
+            op1['val'], op2['val']
+            return op1, op2
+        return operand_pair
+
+    @memoized
+    def compile_overloaded(self, node):
+        # overloaded_operator: evaluates both operands to check their types, then evaluates the whole node
+        # again as an int or string operation
+        interp = self.interp
+        node_type = node.elem_type
+        operand_pair = self.compile_operand_pair(node, f"Attempted to use NONE in equality comparison")
+        as_int = self.compile_int(node)
+        as_string = self.compile_string(node)
+
+        def overloaded_operator(scope_stack):
+            op1, op2 = operand_pair(scope_stack)
+            op1_type = op1['type']
+            op2_type = op2['type']
+            if op1_type != op2_type:
+                interp.error(ErrorType.TYPE_ERROR, f"Attempted to use {node_type} on different types { op1_type } and { op2_type }")
+            if op1_type == 'int':
+                return as_int(scope_stack)
+            if op1_type == 'string':
+                return as_string(scope_stack)
+            interp.error(ErrorType.TYPE_ERROR, f"No {node_type} operation defined for { op1_type }\t(Overloaded Op function)")
+        return overloaded_operator
+
+    @memoized
+    def compile_equality(self, node):
+        interp = self.interp
+        node_type = node.elem_type
+        operand_pair = self.compile_operand_pair(node, f"Attempted to use NONE in equality comparison")
+        defined_structs = self.defined_structs
+
+        def check_equality(scope_stack):
+            op1, op2 = operand_pair(scope_stack)
+            same = values_equal(interp, defined_structs, op1['type'], op1['val'], op2['type'], op2['val'])
+            if node_type == '==':
+                return same
+            return not same
+        return check_equality
+
+    @memoized
+    def compile_compare(self, node):
+        # integer_compare
+        interp = self.interp
+        node_type = node.elem_type
+        compare = COMPARE_OPERATORS.get(node_type)
+        local_pair = self.compile_local_pair(node.op1, node.op2, f"in integer operation")
+        if local_pair is not None:
+            operands = local_pair
+        else:
+            evaluate1 = self.compile_int(node.op1)
+            evaluate2 = self.compile_int(node.op2)
+
+            def operands(scope_stack):
+                return evaluate1(scope_stack), evaluate2(scope_stack)
+
+        def integer_compare(scope_stack):
+            op1_value, op2_value = operands(scope_stack)
+            if op1_value is None or op2_value is None:
+                interp.error(ErrorType.TYPE_ERROR, f"Attempted to use NONE in integer comparison operation")
+            if type(op1_value) != int or type(op2_value) != int:
+                interp.error(
+                    ErrorType.TYPE_ERROR,
+                    f"Can't use operation {node_type} on non-integer values {op1_value} and {op2_value}"
+                )
+            if compare is not None:
+                return compare(op1_value, op2_value)
+            return None
+        return integer_compare
+
+    @memoized
+    def compile_condition(self, node):
+        # check_condition
+        interp = self.interp
+        condition_type = node.elem_type
+        if condition_type in ('bool', 'int'):
+            constant = bool(node.val)
+            return lambda scope_stack: constant
+        if condition_type in ('string', 'nil'):
+            return self.fail(ErrorType.TYPE_ERROR, f"Cannot evaluate STRING or INT or NIL in 'if' statement condition")
+        if condition_type == 'var':
+            typed_var = self.compile_typed_var(node, ('bool', 'int'), lambda var_type: (
+                f"Cannot evaluate non bool/int in 'if' statement condition, attempted (via existing variable {node.name} value)"))
+            return lambda scope_stack: bool(typed_var(scope_stack))
+        if condition_type == 'fcall':
+            typed_fcall = self.compile_typed_fcall(
+                node, ('bool', 'int'),
+                f"Cannot use VOID function { {node.name} } in CONDITION",
+                lambda fcall_type: f"Cannot evaluate NON-BOOL in 'if' statement condition, attempted via fcall to \" {node.name} \""
+            )
+            return lambda scope_stack: bool(typed_fcall(scope_stack))
+        if condition_type in EQUALITY_COMPARISONS:
+            return self.compile_equality(node)
+        if condition_type in INTEGER_COMPARISONS:
+            return self.compile_compare(node)
+        if condition_type in BOOL_OPERATIONS:
+            return self.compile_bool(node)
+        if condition_type in INT_OPERATIONS:
+            evaluate = self.compile_int(node)
+            return lambda scope_stack: bool(evaluate(scope_stack))
+        return self.fail(
+            ErrorType.TYPE_ERROR,
+            f"Unrecognized expression type { {condition_type} } for 'if' condition: { {node} }"
+        )
+
+    ''' ---- print ---- '''
+    def compile_print(self, args):
+        # One closure per argument returning the text it adds, output once every argument is evaluated
+        interp = self.interp
+        parts = [self.compile_print_arg(arg) for arg in args]
+
+        def printout(scope_stack):
+            interp.output("".join([part(scope_stack) for part in parts]))
+            return None
+        return printout
+
+    def compile_print_arg(self, node):
+        interp = self.interp
+        node_type = node.elem_type
+        if node_type == 'string':
+            text = node.val
+        elif node_type == 'bool':
+            text = print_bool(node.val)
+        elif node_type == 'int':
+            text = str(node.val)
+        elif node_type == 'var':
+            variable = self.compile_variable(node)
+
+            def print_var(scope_stack):
+                val = variable(scope_stack)['val']
+                if val is True:
+                    return "true"
+                if val is False:
+                    return "false"
+                return str(val)
+            return print_var
+        elif node_type in OVERLOADED_OPERATIONS:
+            overloaded = self.compile_overloaded(node)
+            return lambda scope_stack: str(overloaded(scope_stack))
+        elif node_type in INT_OPERATIONS:
+            evaluate = self.compile_int(node)
+            return lambda scope_stack: str(evaluate(scope_stack))
+        elif node_type in BOOL_OPERATIONS + EQUALITY_COMPARISONS + INTEGER_COMPARISONS:
+            if node_type in BOOL_OPERATIONS:
+                evaluate = self.compile_bool(node)
+            elif node_type in EQUALITY_COMPARISONS:
+                evaluate = self.compile_equality(node)
+            else:
+                evaluate = self.compile_compare(node)
+            return lambda scope_stack: print_bool(evaluate(scope_stack))
+        elif node_type == 'fcall':
+            call = self.compile_fcall(node)
+
+            def print_fcall(scope_stack):
+                fcall_ret = call(scope_stack)
+                if fcall_ret is None:
+                    interp.error(ErrorType.TYPE_ERROR, f"Cannot print NONE return type from function \"{node.name}\"")
+                if fcall_ret['type'] == 'bool':
+                    return print_bool(fcall_ret['val'])
+                return str(fcall_ret['val'])
+            return print_fcall
+        else:
+            # nil / new arguments print nothing
+            text = ""
+        return lambda scope_stack: text
+
+    def compile_print_checked(self, args):
+        # print_checked(): nil / new arguments print nothing (and aren't evaluated)
+        interp = self.interp
+        parts = [self.compile_checked_print_arg(arg) for arg in args if arg.elem_type not in ('nil', 'new')]
+
+        def print_checked(scope_stack):
+            interp.output("".join([part(scope_stack) for part in parts]))
+            return None
+        return print_checked
+
+    def compile_checked_print_arg(self, node):
+        node_type = node.elem_type
+        if node_type in ('string', 'int', 'bool'):
+            text = print_bool(node.val) if node_type == 'bool' else str(node.val)
+            return lambda scope_stack: text
+        checked = self.compile_checked(node)
+
+        def print_value(scope_stack):
+            val = checked(scope_stack)
+            if val is True:
+                return "true"
+            if val is False:
+                return "false"
+            return str(val)
+        return print_value
+
+    ''' ---- Expressions proven type-safe (typecheck.py) ---- '''
+    @memoized
+    def compile_checked(self, node):
+        # eval_checked(): closure returning the expression's value, no type checks
+        interp = self.interp
+        node_type = node.elem_type
+
+        if node_type == 'var':
+            if '.' in node.name:
+                # Can still be a FAULT_ERROR (nil struct), field_slot raises it
+                field_slot = self.compile_field_slot(node)
+
+                def field_value(scope_stack):
+                    struct, slot = field_slot(scope_stack)
+                    return struct.values[slot]
+                return field_value
+            location = local_slot(node)
+            if location is not None:
+                index, slot = location
+                return lambda scope_stack: scope_stack[index][slot]['val']
+
+            def variable_value(scope_stack):
+                scope, slot = find_slot(node, scope_stack)
+                return scope[slot]['val']
+            return variable_value
+
+        if node_type in ('int', 'string', 'bool'):
+            constant = node.val
+            return lambda scope_stack: constant
+
+        if node_type == 'fcall':
+            call = self.compile_fcall(node)
+            return lambda scope_stack: call(scope_stack)['val']
+
+        if node_type == 'nil':
+            return lambda scope_stack: Element("nil")
+
+        if node_type == 'new':
+            BrewinStruct = interp.BrewinStruct
+            return lambda scope_stack: BrewinStruct(interp, node)
+
+        if node_type == 'neg':
+            op1 = self.compile_checked(node.op1)
+            return lambda scope_stack: -op1(scope_stack)
+
+        if node_type == '!':
+            op1 = self.compile_checked(node.op1)
+            return lambda scope_stack: not op1(scope_stack)
+
+        if node_type not in ARITH_OPERATORS and node_type not in COMPARE_OPERATORS \
+                and node_type not in EQUALITY_COMPARISONS and node_type not in ('&&', '||'):
+            return lambda scope_stack: None
+
+        op1 = self.compile_checked(node.op1)
+        op2 = self.compile_checked(node.op2)
+
+        # Arithmetic (+ is also string concatenation)
+        if node_type == '+':
+            if node.eval_twice:
+                # overloaded_operator evaluates both operands once just to find their types
+                def add_twice(scope_stack):
+                    op1(scope_stack)
+                    op2(scope_stack)
+                    return op1(scope_stack) + op2(scope_stack)
+                return add_twice
+            return lambda scope_stack: op1(scope_stack) + op2(scope_stack)
+        if node_type == '-':
+            return lambda scope_stack: op1(scope_stack) - op2(scope_stack)
+        if node_type == '*':
+            return lambda scope_stack: op1(scope_stack) * op2(scope_stack)
+        if node_type == '/':
+            return lambda scope_stack: op1(scope_stack) // op2(scope_stack)
+
+        # Integer comparisons
+        if node_type == '<':
+            return lambda scope_stack: op1(scope_stack) < op2(scope_stack)
+        if node_type == '<=':
+            return lambda scope_stack: op1(scope_stack) <= op2(scope_stack)
+        if node_type == '>':
+            return lambda scope_stack: op1(scope_stack) > op2(scope_stack)
+        if node_type == '>=':
+            return lambda scope_stack: op1(scope_stack) >= op2(scope_stack)
+
+        # Boolean operations (no short-circuiting, same as run_bool_operation)
+        if node_type == '&&':
+            def bool_and(scope_stack):
+                op1_value = bool(op1(scope_stack))
+                op2_value = bool(op2(scope_stack))
+                return op1_value and op2_value
+            return bool_and
+        if node_type == '||':
+            def bool_or(scope_stack):
+                op1_value = bool(op1(scope_stack))
+                op2_value = bool(op2(scope_stack))
+                return op1_value or op2_value
+            return bool_or
+
+        # Equality: node.compare_as says how check_equality would compare these operand types
+        negate = node_type == '!='
+        compare_as = node.compare_as
+        if compare_as == 'value':
+            if negate:
+                return lambda scope_stack: op1(scope_stack) != op2(scope_stack)
+            return lambda scope_stack: op1(scope_stack) == op2(scope_stack)
+        if compare_as == 'bool':
+            def bool_equality(scope_stack):
+                same = bool(op1(scope_stack)) == bool(op2(scope_stack))
+                return same != negate
+            return bool_equality
+        if compare_as == 'struct':
+            def struct_equality(scope_stack):
+                op1_value = op1(scope_stack)
+                op2_value = op2(scope_stack)
+                # Same object, or both nil
+                same = (op1_value is op2_value) or (isinstance(op1_value, Element) and isinstance(op2_value, Element))
+                return same != negate
+            return struct_equality
+
+        def never_equal(scope_stack):
+            op1(scope_stack)
+            op2(scope_stack)
+            return negate
+        return never_equal
+
+
+# check_equality's comparison, once both operands are evaluated
+def values_equal(interp, defined_structs, op1_type, op1_value, op2_type, op2_value):
+    if op1_type == 'nil':
+        if op2_type == 'nil':
+            return True
+        if op2_type in defined_structs:
+            return isinstance(op2_value, Element) and op2_value.elem_type == 'nil'
+        interp.error(ErrorType.TYPE_ERROR, f"Attempt to compare NIL to non-struct element { {op2_value} }")
+    if op2_type == 'nil':
+        if op1_type in defined_structs:
+            return isinstance(op1_value, Element) and op1_value.elem_type == 'nil'
+        interp.error(ErrorType.TYPE_ERROR, f"Attempt to compare NIL to non-struct element { {op1_value} }")
+    if op1_type in defined_structs and op2_type in defined_structs:
+        op1_nil = isinstance(op1_value, Element) and op1_value.elem_type == 'nil'
+        op2_nil = isinstance(op2_value, Element) and op2_value.elem_type == 'nil'
+        return (op1_value == op2_value) or (op1_nil and op2_nil)
+    if op1_type != op2_type:
+        if (op1_type == 'bool' and op2_type == 'int') or (op1_type == 'int' and op2_type == 'bool'):
+            return bool(op1_value) == bool(op2_value)
+        return False
+    return op1_value == op2_value
+
+
+# Compile every function once, then run main
+def run_program(interpreter, main_node):
+    # (imported here: interpreterv3 imports this module)
+    from interpreterv3 import ReturnValue
+
+    compiler = ClosureCompiler(interpreter, ReturnValue)
+    for funcs in interpreter.defined_functions.values():
+        for func in funcs:
+            compiler.compile_function(func)
+    return compiler.compile_function(main_node)([])
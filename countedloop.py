@@ -0,0 +1,122 @@
+import operator
+from element import Element
+
+# Load-time recognition of counted for loops for the v2/v3/v4 interpreters
+#   Most loops look like
+#       for (i = <init>; i < <bound>; i = i + <step>) { ... }
+#   where <bound> is an int constant or a variable, <step> is an int constant, and the body never assigns
+#   (or redeclares) i or the bound variable. Functions can't write their caller's variables either, so once
+#   the first condition check has seen two ints, every later update + condition check is plain int arithmetic
+#
+#   annotate_loops() runs once at load time (after the optimizer, which may have folded the step / bound)
+#   and sets .counted on every for node: a CountedLoop for that shape, else None
+#   run_for_loop still runs the init + first condition check the usual way, so the errors they raise
+#   (undeclared variable, non-int bound, ...) don't change. Then run_counted_loop takes over if i + the
+#   bound really are ints, keeping i's variable up to date for the body
+
+# i <op> bound, and the same test with the bound on the left
+COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+class CountedLoop:
+    __slots__ = ("var", "compare", "bound", "step")
+
+    def __init__(self, var, compare, bound, step):
+        self.var = var              # the init's = node (its .addr is i's slot)
+        self.compare = compare      # compare(i, bound) -> keep looping
+        self.bound = bound          # int node or var node
+        self.step = step            # added to i after every iteration
+
+
+''' ---- Shape ---- '''
+def single_var(node):
+    # Plain variable with one possible slot (not a struct field, not maybe-declared)
+    return isinstance(node, Element) and node.elem_type == 'var' and '.' not in node.name and len(node.addr) == 1
+
+
+def assigned_names(statements, names=None):
+    # Names every = / vardef anywhere in statements (nested blocks + loops included) writes or declares
+    if names is None:
+        names = set()
+    for node in statements or ():
+        node_type = node.elem_type
+        if node_type in ('=', 'vardef'):
+            names.add(node.name)
+        elif node_type == 'if':
+            assigned_names(node.statements, names)
+            assigned_names(node.else_statements, names)
+        elif node_type == 'for':
+            assigned_names([node.init, node.update], names)
+            assigned_names(node.statements, names)
+        elif node_type == 'try':
+            assigned_names(node.statements, names)
+            for catcher in node.catchers:
+                assigned_names(catcher.statements, names)
+    return names
+
+
+def counted_loop(node):
+    # CountedLoop for a for node of the counted shape, else None
+    init = node.init
+    condition = node.condition
+    update = node.update
+    if init.elem_type != '=' or update.elem_type != '=' or '.' in init.name or len(init.addr) != 1:
+        return None
+    name = init.name
+    addr = init.addr
+
+    def is_counter(operand):
+        return single_var(operand) and operand.name == name and operand.addr == addr
+
+    # Condition: i < bound or bound > i (any of < <= > >=)
+    if condition.elem_type not in COMPARISONS:
+        return None
+    op = condition.elem_type
+    if is_counter(condition.op1):
+        bound = condition.op2
+    elif is_counter(condition.op2):
+        bound = condition.op1
+        op = FLIPPED[op]
+    else:
+        return None
+    if not (bound.elem_type == 'int' or (single_var(bound) and bound.name != name)):
+        return None
+
+    # Update: i = i + c, i = c + i or i = i - c
+    expression = update.expression
+    if update.name != name or update.addr != addr or expression.elem_type not in ('+', '-'):
+        return None
+    if is_counter(expression.op1) and expression.op2.elem_type == 'int':
+        step = expression.op2.val if expression.elem_type == '+' else -expression.op2.val
+    elif expression.elem_type == '+' and is_counter(expression.op2) and expression.op1.elem_type == 'int':
+        step = expression.op1.val
+    else:
+        return None
+
+    written = assigned_names(node.statements)
+    if name in written or (bound.elem_type == 'var' and bound.name in written):
+        return None
+    return CountedLoop(init, COMPARISONS[op], bound, step)
+
+
+def annotate_statements(statements):
+    for node in statements or ():
+        node_type = node.elem_type
+        if node_type == 'if':
+            annotate_statements(node.statements)
+            annotate_statements(node.else_statements)
+        elif node_type == 'for':
+            node.counted = counted_loop(node)
+            annotate_statements(node.statements)
+        elif node_type == 'try':
+            annotate_statements(node.statements)
+            for catcher in node.catchers:
+                annotate_statements(catcher.statements)
+
+
+# exported function: annotate every for node in a resolved program with .counted
+def annotate_loops(ast):
+    for func_node in ast.functions:
+        annotate_statements(func_node.statements)
+    return ast
@@ -1,14 +1,33 @@
+from collections.abc import MutableMapping
+
+
 class Element:
+    # Every parsed node is one of the slotted node classes below (see NODE_CLASSES)
+    #   Element(elem_type, **fields) picks the class for elem_type, so nodes only store their fixed fields
+    #   Fields can be read directly (node.op1) or through the old dict-style view (node.dict['op1'])
+    __slots__ = ("elem_type",)
+    FIELDS = ()
+
+    def __new__(cls, elem_type=None, **kwargs):
+        if cls is Element:
+            cls = NODE_CLASSES.get(elem_type, GenericElement)
+        return object.__new__(cls)
+
     def __init__(self, elem_type, **kwargs):
         self.elem_type = elem_type
-        self.dict = {}
         for key, value in kwargs.items():
-            self.dict[key] = value
+            setattr(self, key, value)
+
+    # Names of the fields that have been set on this node, in declaration order
+    def keys(self):
+        return [key for key in self.FIELDS if hasattr(self, key)]
+
+    @property
+    def dict(self):
+        return ElementDict(self)
 
     def get(self, key):
-        if key not in self.dict:
-            return None
-        return self.dict[key]
+        return getattr(self, key, None)
 
     def __str__(self):
         s = f"{self.elem_type}: "
@@ -27,3 +46,148 @@ class Element:
                 return "[" + s[0:-2] + "]"
             return "[" + s + "]"
         return str(v)
+
+
+class ElementDict(MutableMapping):
+    # Compatibility view: node.dict['op1'] reads/writes the node's op1 slot
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self.node, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self.node, key, value)
+        except AttributeError:
+            raise KeyError(f"{self.node.elem_type} node has no field {key}") from None
+
+    def __delitem__(self, key):
+        try:
+            delattr(self.node, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return isinstance(key, str) and hasattr(self.node, key)
+
+    def __iter__(self):
+        return iter(self.node.keys())
+
+    def __len__(self):
+        return len(self.node.keys())
+
+
+class GenericElement(Element):
+    # Fallback for node types without a fixed layout: fields live in __dict__
+    def keys(self):
+        return [key for key in self.__dict__]
+
+
+''' ---- Node classes ---- '''
+class ProgramNode(Element):
+    __slots__ = FIELDS = ("structs", "functions")
+
+class StructNode(Element):
+    __slots__ = FIELDS = ("name", "fields")
+
+class FieldDefNode(Element):
+    __slots__ = FIELDS = ("name", "var_type")
+
+class FuncNode(Element):
+    FIELDS = ("name", "args", "return_type", "statements")
+    __slots__ = FIELDS + ("nslots", "strict_param")
+
+class ArgNode(Element):
+    FIELDS = ("name", "var_type")
+    __slots__ = FIELDS + ("slot",)
+
+class VarDefNode(Element):
+    FIELDS = ("name", "var_type")
+    __slots__ = FIELDS + ("slot",)
+
+class AssignNode(Element):
+    FIELDS = ("name", "expression")
+    __slots__ = FIELDS + ("addr", "free", "leading", "strict", "checked", "field_cache")
+
+class IfNode(Element):
+    FIELDS = ("condition", "statements", "else_statements")
+    __slots__ = FIELDS + ("nslots", "checked")
+
+class ForNode(Element):
+    FIELDS = ("init", "condition", "update", "statements")
+    __slots__ = FIELDS + ("nslots", "checked", "counted")
+
+class TryNode(Element):
+    FIELDS = ("statements", "catchers")
+    __slots__ = FIELDS + ("nslots",)
+
+class CatchNode(Element):
+    __slots__ = FIELDS = ("exception_type", "statements")
+
+class RaiseNode(Element):
+    __slots__ = FIELDS = ("exception_type",)
+
+class ReturnNode(Element):
+    FIELDS = ("expression",)
+    __slots__ = FIELDS + ("free", "checked", "value_type")
+
+class FCallNode(Element):
+    FIELDS = ("name", "args")
+    __slots__ = FIELDS + ("target", "builtin", "free", "leading", "checked")
+
+class VarNode(Element):
+    FIELDS = ("name",)
+    __slots__ = FIELDS + ("addr", "field_cache")
+
+class NewNode(Element):
+    __slots__ = FIELDS = ("var_type",)
+
+class ValueNode(Element):
+    # int, bool, string constants
+    __slots__ = FIELDS = ("val",)
+
+class NilNode(Element):
+    __slots__ = FIELDS = ()
+
+class UnaryOpNode(Element):
+    # neg, !
+    __slots__ = FIELDS = ("op1",)
+
+class BinaryOpNode(Element):
+    # arithmetic, comparison, && and ||
+    FIELDS = ("op1", "op2")
+    __slots__ = FIELDS + ("compare_as", "eval_twice")
+
+
+NODE_CLASSES = {
+    "program": ProgramNode,
+    "struct": StructNode,
+    "fielddef": FieldDefNode,
+    "func": FuncNode,
+    "arg": ArgNode,
+    "vardef": VarDefNode,
+    "=": AssignNode,
+    "if": IfNode,
+    "for": ForNode,
+    "try": TryNode,
+    "catch": CatchNode,
+    "raise": RaiseNode,
+    "return": ReturnNode,
+    "fcall": FCallNode,
+    "var": VarNode,
+    "new": NewNode,
+    "int": ValueNode,
+    "bool": ValueNode,
+    "string": ValueNode,
+    "nil": NilNode,
+    "neg": UnaryOpNode,
+    "!": UnaryOpNode,
+}
+for _op in ("+", "-", "*", "/", "==", "!=", "<", "<=", ">", ">=", "&&", "||"):
+    NODE_CLASSES[_op] = BinaryOpNode
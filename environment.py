@@ -0,0 +1,133 @@
+from resolver import UNDECLARED
+from element import Element
+
+# Thunk environments for the v4 interpreter
+#   A thunk has to see the variables as they were when it was created. v4 used to snapshot whole scope
+#   stacks for that, which kept every variable in every enclosing scope alive for as long as the thunk was
+#
+#   annotate_program() runs once at load time (after resolver.py) and records the free variables of every
+#   expression that gets turned into a thunk, as the (depth, slot) pairs its var nodes can read:
+#       =  nodes      -> .free   (the assigned expression)
+#       return nodes  -> .free   (the returned expression)
+#       fcall nodes   -> .free   (all of the call's arguments, they share one environment)
+#   capture() then copies just those bindings into a small dict keyed by (depth, slot),
+#   so the thunk only holds on to what it can actually read
+#
+#   = and fcall nodes also get .leading (fcall nodes: one per argument): the var node that forcing the thunk
+#   evaluates first, before anything can be printed or raised, or None. interpreterv4 follows these links
+#   to force a chain like x = x + 1 bottom-up in a loop instead of recursing once per link
+#
+#   Forcing a thunk only reads variables, so captured environments are never written to:
+#   a call made while forcing one reuses it for its own arguments (they only read a subset of it)
+
+NO_BINDINGS = {}        # shared environment for expressions without variables (never written to)
+
+# Mirrors interpreterv4's evaluators (INT_OPERATIONS + the operand types run_int_operation accepts)
+INT_OPERATIONS = ('+', '-', '*', '/', 'neg')
+INT_OPERANDS = ('int', 'var', 'fcall') + INT_OPERATIONS
+
+
+def new_scope(nslots):
+    return [UNDECLARED] * nslots
+
+
+''' ---- Load time ---- '''
+# Every (depth, slot) pair the expression can read, in first-seen order
+def free_variables(node, pairs=None):
+    if pairs is None:
+        pairs = {}
+    if isinstance(node, Element):
+        if node.elem_type == 'var':
+            for pair in node.addr:
+                pairs[pair] = True
+        elif node.elem_type == 'fcall':
+            for arg in node.args:
+                free_variables(arg, pairs)
+        else:
+            free_variables(node.get('op1'), pairs)
+            free_variables(node.get('op2'), pairs)
+    return tuple(pairs)
+
+
+# Var node that evaluating node forces first, or None if something observable could happen before it
+#   mode = evaluator that node is handed to: 'expression' (evaluate_expression), 'operand' (eval_op),
+#   'int' (run_int_operation). Bool operations and calls are never followed
+def leading_var(node, mode='expression'):
+    if not isinstance(node, Element):
+        return None
+    node_type = node.elem_type
+    if node_type == 'var':
+        return node
+
+    if mode != 'int':
+        # evaluate_expression / eval_op: + is the overloaded operator (evaluates op1 first, checks types after)
+        if node_type == '+':
+            return leading_var(node.op1, 'operand')
+        if node_type in INT_OPERATIONS:
+            return leading_var(node, 'int')
+        return None
+
+    # run_int_operation checks the operand node types before evaluating anything
+    if node_type == 'neg':
+        if node.op1.elem_type not in INT_OPERANDS:
+            return None
+        return leading_var(node.op1, 'int')
+    if node_type in INT_OPERATIONS:
+        if node.op1.elem_type not in INT_OPERANDS or node.op2.elem_type not in INT_OPERANDS:
+            return None
+        return leading_var(node.op1, 'int')
+    return None
+
+
+def iter_nodes(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from iter_nodes(item)
+    elif isinstance(node, Element):
+        yield node
+        for key in node.keys():
+            yield from iter_nodes(getattr(node, key))
+
+
+# exported function: record free variables + leading vars on every thunk-building node
+def annotate_program(ast):
+    for func in ast.functions:
+        for node in iter_nodes(func.statements):
+            match node.elem_type:
+                case '=':
+                    node.free = free_variables(node.expression)
+                    node.leading = leading_var(node.expression)
+                case 'return':
+                    node.free = free_variables(node.expression)
+                case 'fcall':
+                    pairs = {}
+                    for arg in node.args:
+                        free_variables(arg, pairs)
+                    node.free = tuple(pairs)
+                    node.leading = tuple(leading_var(arg) for arg in node.args)
+    return ast
+
+
+''' ---- Run time ---- '''
+# Environment for a thunk that reads the (depth, slot) pairs in free, taken from scope_stack
+def capture(free, scope_stack):
+    # Already a captured environment (a thunk is being forced) -> share it
+    if type(scope_stack) is dict:
+        return scope_stack
+    if not free:
+        return NO_BINDINGS
+    env = {}
+    for pair in free:
+        value = scope_stack[-1 - pair[0]][pair[1]]
+        if value is not UNDECLARED:
+            env[pair] = value
+    return env
+
+
+# Binding node's variable had when env was captured, or None if it wasn't declared yet
+def lookup_captured(node, env):
+    for pair in node.addr:
+        value = env.get(pair)
+        if value is not None:
+            return value
+    return None
@@ -1,4 +1,4 @@
-from brewparse import parse_program
+from astcache import parse_program
 from intbase import *
 
 class Interpreter(InterpreterBase):
@@ -28,8 +28,8 @@ class Interpreter(InterpreterBase):
         
         # Search through program functions to find the MAIN node
         main_node = None
-        for func in self.ast.dict['functions']:
-            if (func.dict['name'] == 'main'):
+        for func in self.ast.functions:
+            if (func.name == 'main'):
                 main_node = func
         if (main_node == None):
             super().error(
@@ -49,12 +49,11 @@ class Interpreter(InterpreterBase):
                 "Non-function node passed into run_func"
             )
         
-        node_dict = func_node.dict
         if (self.trace_output == True):
-            print("\n-- Currently running function: ", node_dict['name'])
+            print("\n-- Currently running function: ", func_node.name)
 
         
-        func_name = node_dict['name']
+        func_name = func_node.name
 
         # Check that function has been defined
         # TODO: don't hard-code this when there are custom function calls
@@ -62,26 +61,26 @@ class Interpreter(InterpreterBase):
         if func_name not in allowable_functions:
             super().error(
                 ErrorType.NAME_ERROR,
-                f"Function {node_dict['name']} has not been defined"
+                f"Function {func_node.name} has not been defined"
             )
         
         # If INPUTI function
         if func_name == 'inputi':
             if (self.trace_output == True):
                 print("\tCalling inputi function")
-            if (len (node_dict['args']) > 1):
+            if (len (func_node.args) > 1):
                 super().error(
                     ErrorType.NAME_ERROR,
                     f"No inputi() function found that takes more than 1 parameter"
                 )
-            return self.inputi(node_dict['args'])
+            return self.inputi(func_node.args)
         
         if func_name == 'print':
-            return self.printout(node_dict['args'])
+            return self.printout(func_node.args)
 
         # IF not PRINT or INPUTI, go through statements (instead of returning value)
         ''' ---- Run statements in order ---- '''
-        for statement_node in node_dict['statements']:
+        for statement_node in func_node.statements:
             self.run_statement( statement_node )
     
 
@@ -115,7 +114,7 @@ class Interpreter(InterpreterBase):
     def run_vardef(self, node):
         if (self.trace_output == True):
             print("\tInside RUN_VARDEF")
-        var_name = node.dict['name']
+        var_name = node.name
 
         # Check if variable has already been defined
         if var_name in self.program_vars:
@@ -133,8 +132,7 @@ class Interpreter(InterpreterBase):
     def run_assign(self, node):
         if (self.trace_output == True):
             print("\tInside RUN_ASSIGN")
-        node_dict = node.dict
-        var_name = node_dict['name']
+        var_name = node.name
 
         # Check that variable has been declared
         if var_name not in self.program_vars:
@@ -145,7 +143,7 @@ class Interpreter(InterpreterBase):
 
 
         # Calculate expression
-        node_expression = node_dict['expression']
+        node_expression = node.expression
         node_type = node_expression.elem_type
         # If string value
         if (node_type == 'string'):
@@ -161,7 +159,7 @@ class Interpreter(InterpreterBase):
 
         # Function call
         elif (node_type == 'fcall'):
-            self.program_vars[var_name] = self.run_func(node.dict['expression'])
+            self.program_vars[var_name] = self.run_func(node.expression)
             if (self.trace_output == True):
                 print("\t\tUpdated program_vars: ", self.program_vars)
         else:
@@ -182,18 +180,18 @@ class Interpreter(InterpreterBase):
 
          # BASE: if operand is a VARIABLE --> return that variable's value
         if node_type == 'var':
-            if node.dict['name'] not in self.program_vars:
+            if node.name not in self.program_vars:
                 super().error(
                     ErrorType.NAME_ERROR,
-                    f"Variable {node.dict['name']} has not been declared"
+                    f"Variable {node.name} has not been declared"
                 )
             # Check that variable type isn't a string
-            if (isinstance( self.program_vars[ node.dict['name'] ], str)):
+            if (isinstance( self.program_vars[ node.name ], str)):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Incompatible types for arithmetic operation, attempted to use string (via existing variable {node.dict['name']} value)"
+                    f"Incompatible types for arithmetic operation, attempted to use string (via existing variable {node.name} value)"
                 )
-            return self.program_vars[ node.dict['name'] ]
+            return self.program_vars[ node.name ]
 
         # BASE: if operand is a VALUE --> return that value
         if node_type == 'int':
@@ -213,33 +211,33 @@ class Interpreter(InterpreterBase):
 
         # Try operation types, recursively call on operands
         if node_type == '+':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return self.run_operation(op1) + self.run_operation(op2)
         if node_type == '-':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return self.run_operation(op1) - self.run_operation(op2) 
         if node_type == '*':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return self.run_operation(op1) * self.run_operation(op2)   
         if node_type == '/':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return self.run_operation(op1) / self.run_operation(op2)
 
 
     # Return value of value nodes
     def get_value(self, node):
-        return node.dict['val']         # Maybe TODO: if this is None, add a check or throw an error instead of returning
+        return node.val         # Maybe TODO: if this is None, add a check or throw an error instead of returning
     
     ''' ---- INPUTI function ---- '''
     def inputi(self, prompt=[]):
         if (prompt == []):
             user_input = super().get_input()
         else:
-            prompt_string = prompt[0].dict['val']
+            prompt_string = prompt[0].val
             super().output(prompt_string)
             user_input = super().get_input()
 
@@ -257,20 +255,20 @@ class Interpreter(InterpreterBase):
                 print("\t", element)
             node_type = element.elem_type
             if node_type == 'string':
-                string_to_output += element.dict['val']
+                string_to_output += element.val
             elif (node_type in ['int', '+', '-', '*', '/']):
                 string_to_output += str (self.run_operation(element))
             # elif node_type == 'int':
-            #     string_to_output += str( element.dict['val'] )
+            #     string_to_output += str( element.val )
             
             # # If variable, retrieve variable value
             elif node_type == 'var':
-                if element.dict['name'] not in self.program_vars:
+                if element.name not in self.program_vars:
                     super().error(
                         ErrorType.NAME_ERROR,
-                        f"Variable {element.dict['name']} has not been declared"
+                        f"Variable {element.name} has not been declared"
                     )
-                string_to_output += str( self.program_vars[element.dict['name']])
+                string_to_output += str( self.program_vars[element.name])
 
         super().output(string_to_output)
         return None
\ No newline at end of file
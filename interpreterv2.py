@@ -1,14 +1,27 @@
-from brewparse import parse_program
+from astcache import parse_program
+from resolver import resolve_program, find_slot, UNDECLARED
+from linker import build_function_table, link_program
+from optimizer import optimize_program
+from countedloop import annotate_loops
+from profiler import Profiler
 from intbase import *
 from element import Element
+import bytecodev2
 
-# Custom exception class to catch return values
-class ReturnValue(Exception):
+# Completion signal for return statements: run_statement hands it back up to run_func (no exception unwinding)
+class ReturnValue():
     def __init__(self, return_value):
         self.return_value = return_value
     def get_ret_value(self):
         return self.return_value
 
+# Completion signal for `return f(...)`: the arguments are evaluated, run_func runs f in place of the
+# function returning it (trampoline) instead of recursing into another run_func
+class TailCall():
+    def __init__(self, func_node, func_args):
+        self.func_node = func_node
+        self.func_args = func_args
+
 
 class Interpreter(InterpreterBase):
     program_vars = {}
@@ -20,9 +33,23 @@ class Interpreter(InterpreterBase):
     INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
     OVERLOADED_OPERATIONS = ['+']
    
-    def __init__(self, console_output=True, inp=None, trace_output=False):
+    def __init__(self, console_output=True, inp=None, trace_output=False, use_bytecode=False, profile=False, optimize=True, tail_calls=True):
         super().__init__(console_output, inp)   # call InterpreterBase's constructor
         self.trace_output = trace_output
+        self.use_bytecode = use_bytecode        # compile functions to bytecode + run on the VM (bytecodev2.py) instead of walking the AST
+        self.optimize = optimize                # optimizer passes to run first (optimizer.py): True = all, False = none, or a list of names
+        self.optimizations = {}
+        self.inlined_calls = []                 # (calling function, called function) of every call the optimizer inlined
+        # Run tail calls in the returning function's run_func (constant Python stack for accumulator recursion)
+            # (trace_output / profile: every call keeps its own run_func, so each one is printed / recorded)
+        self.tail_calls = tail_calls and not trace_output and not profile
+        self.tail_calls_eliminated = 0
+
+        # Per-function call counts / timings (profiler.py), only hooked into run_func when asked for
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler()
+            self.run_func = self.profiler.wrap(self.run_func)
 
     ''' ---- RUN PROGRAM ---- '''
     def run(self, program):
@@ -32,7 +59,10 @@ class Interpreter(InterpreterBase):
             ast = AST generated by parser
             self.program_vars = map to hold variables + their values
         '''
+        self.tail_calls_eliminated = 0
         self.ast = parse_program(program)
+        # Annotate variables with (depth, slot) addresses so scopes can be plain arrays
+        resolve_program(self.ast)
 
         ''' ---- Find Main Node ---- '''
         # Check program validity
@@ -45,15 +75,15 @@ class Interpreter(InterpreterBase):
         
         # Search through program functions to find the MAIN node
         main_node = None
-        for func in self.ast.dict['functions']:
+        for func in self.ast.functions:
             # Loop through all provided functions, add to dictionary of defined functions
-            func_name = func.dict['name']
+            func_name = func.name
             if func_name not in self.defined_functions:
                 self.defined_functions[func_name] = []
             self.defined_functions[func_name].append(func)
             
             # Identify main_node to run aftter
-            if (func.dict['name'] == 'main'):
+            if (func.name == 'main'):
                 main_node = func
         if (main_node == None):
             super().error(
@@ -61,48 +91,63 @@ class Interpreter(InterpreterBase):
                 "No MAIN node found in program"
             )
         
+        # Bind every call site to its builtin handler / (name, arity) overload once, up front
+        self.function_table = build_function_table(self.ast.functions)
+        link_program(self.ast, self.function_table, self.builtin_funcs())
+
+        # Inlining / constant propagation / folding (optimizer.py): returns how many rewrites each pass made
+            # (trace_output: leave the program as written, the trace follows it node by node)
+        self.optimizations = {}
+        self.inlined_calls = []
+        if self.optimize and not self.trace_output:
+            self.optimizations = optimize_program(self.ast, '2', None if self.optimize is True else self.optimize, self.inlined_calls)
+
+        # Counted for loops (countedloop.py): after their first condition check they run on a plain int
+        annotate_loops(self.ast)
+
         # Run MAIN node
+        if self.use_bytecode:
+            return bytecodev2.run_program(self, main_node)
         return self.run_func(main_node, [])
 
-    def check_builtin_funcs(self, func_node, scope_stack):
-        node_dict = func_node.dict
-        func_name = node_dict['name']
+    ''' ---- Builtin functions (bound to fcall nodes at load time, see linker.py) ---- '''
+    def builtin_inputi(self, func_node, scope_stack):
+        if (self.trace_output == True):
+            print("\tCalling inputi function")
+        if (len (func_node.args) > 1):
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"No inputi() function found that takes more than 1 parameter"
+            )
+        return self.inputi(func_node.args)
 
-        ''' PRINT + INPTUTI + INPUTS handling'''
-        # Separate handling for: PRINT, INPUTI
-        if func_name == 'inputi':
-            if (self.trace_output == True):
-                print("\tCalling inputi function")
-            if (len (node_dict['args']) > 1):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"No inputi() function found that takes more than 1 parameter"
-                )
-            return self.inputi(node_dict['args'])
-        
-        if func_name == 'inputs':
-            if (self.trace_output == True):
-                print("\tCalling inputs function")
-            if (len (node_dict['args']) > 1):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"No inputs() function found that takes more than 1 parameter"
-                )
-            return self.inputs(node_dict['args'])
-        
-        if func_name == 'print':
-            return self.printout(scope_stack, node_dict['args'])
-        ''' END OF SEPARATE HANDLING '''
+    def builtin_inputs(self, func_node, scope_stack):
+        if (self.trace_output == True):
+            print("\tCalling inputs function")
+        if (len (func_node.args) > 1):
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"No inputs() function found that takes more than 1 parameter"
+            )
+        return self.inputs(func_node.args)
+
+    def builtin_print(self, func_node, scope_stack):
+        return self.printout(scope_stack, func_node.args)
 
-        return None
+    def builtin_funcs(self):
+        return {
+            'inputi': self.builtin_inputi,
+            'inputs': self.builtin_inputs,
+            'print': self.builtin_print,
+        }
 
 
     ''' ---- HANDLE fcall ---- '''
-    def run_fcall(self, func_node, calling_func_vars):
+    def run_fcall(self, func_node, calling_func_vars, tail=False):
         # calling_func_vars = variables defined by the calling function (where the statement was)
-        node_dict = func_node.dict
-        func_name = node_dict['name']
-        func_args = node_dict['args']   # arguments passed into the function call
+        # tail = call is returned as is: hand run_func a TailCall instead of running it
+        func_name = func_node.name
+        func_args = func_node.args   # arguments passed into the function call
 
         if (self.trace_output):
             if (func_args == []):
@@ -113,29 +158,20 @@ class Interpreter(InterpreterBase):
                 for arg in func_args:
                     print("\t\t", arg)
 
-        # Check if Print, Inputi, or Inputs
-        builtin = self.check_builtin_funcs(func_node, calling_func_vars)
-        if builtin != None:
-            return builtin
+        # Print, Inputi, or Inputs (bound by linker.py)
+        if func_node.builtin is not None:
+            return func_node.builtin(func_node, calling_func_vars)
 
 
-        # For all other function calls: 
-        if (func_name not in self.defined_functions):
-            super().error(
-                ErrorType.NAME_ERROR,
-                f"Function {func_name} was not found / defined ",
-            )
-
-        # Based on the provided number of arguments in the function call
-            # Identify the correct (possibly overloaded) function definition to run
-        func_to_run = None
-        defined_funcs_found = self.defined_functions[func_name]
-        for func in defined_funcs_found:
-            args = func.dict['args']
-            if len(func_args) == len ( args ):
-                func_to_run = func
+        # For all other function calls: overload with matching number of args was linked at load time
+        func_to_run = func_node.target
+        if (func_to_run is None):
+            if (func_name not in self.defined_functions):
+                super().error(
+                    ErrorType.NAME_ERROR,
+                    f"Function {func_name} was not found / defined ",
+                )
 
-        if (func_to_run == None):
             # Wrong number of arguments for this function
             super().error(
                 ErrorType.NAME_ERROR, 
@@ -180,7 +216,8 @@ class Interpreter(InterpreterBase):
                 # print("***********************\n\t IN RUN_FCALL, don't know how to process arguments: ", arg)
         #         # TODO: if error, likely is in missing a case here
 
-
+        if tail:
+            return TailCall(func_to_run, func_arg_values)
         return self.run_func( func_to_run , func_arg_values )
 
 
@@ -193,45 +230,50 @@ class Interpreter(InterpreterBase):
                 "Non-function node passed into run_func"
             )
 
-        # Create dictionary to hold variables local to this function
-        scope_stack = []
-        func_vars = {}
-        
-        node_dict = func_node.dict
-        node_params = node_dict['args']
-        if (self.trace_output == True):
-            print("--------------------------------------------------------")
-            print("INSIDE RUN_FUNC: Currently running function: ", node_dict['name'])
+        # One pass per function run here: the first is func_node, the rest are tail calls it (transitively) returned
+        while True:
+            # Create scope (array indexed by resolver slots) to hold variables local to this function
+            scope_stack = []
+            func_vars = [UNDECLARED] * func_node.nslots
 
-            if node_params == []:
-                print("\tThis function has NO parameters")
-            else:
-                print("\tThis function has the following paramters: ")
-                for arg in node_params:
-                    print("\t\t", arg)
+            node_params = func_node.args
+            if (self.trace_output == True):
+                print("--------------------------------------------------------")
+                print("INSIDE RUN_FUNC: Currently running function: ", func_node.name)
 
-        # Map argument values to the parameter names
-        for var_name, var_value in zip(node_params, func_args):
-            func_vars[var_name.dict['name']] = var_value
+                if node_params == []:
+                    print("\tThis function has NO parameters")
+                else:
+                    print("\tThis function has the following paramters: ")
+                    for arg in node_params:
+                        print("\t\t", arg)
 
-        # Base parameter:argument pairs are the ENCLOSING environment defined variables
-        scope_stack.append( func_vars )
+            # Map argument values to the parameter names
+            for param, var_value in zip(node_params, func_args):
+                func_vars[param.slot] = var_value
 
-        # Loop through function statements in order
-        for statement_node in node_dict['statements']:
-            # Run each statement
-            try:
-                self.run_statement(statement_node, scope_stack)
-            # If RETURN is found, should throw an exception
-            except ReturnValue as rval:
-                # Remove all added scopes from inside function
-                while (len(scope_stack) > 1):
-                    scope_stack.pop()
+            # Base parameter:argument pairs are the ENCLOSING environment defined variables
+            scope_stack.append( func_vars )
 
+            # Loop through function statements in order
+            rval = None
+            for statement_node in func_node.statements:
+                # Run each statement
+                rval = self.run_statement(statement_node, scope_stack)
+                # If RETURN is found, run_statement hands back its ReturnValue (or TailCall)
+                if rval is not None:
+                    break
+
+            # If exit list of statements without reaching a return statement, return NIL
+            if rval is None:
+                return Element("nil")
+            if type(rval) is not TailCall:
                 return rval.return_value
 
-        # If exit list of statements without reaching a return statement, return NIL
-        return Element("nil")
+            # Tail call: its result is this function's result, run it in this frame
+            self.tail_calls_eliminated += 1
+            func_node = rval.func_node
+            func_args = rval.func_args
     
 
     ''' ---- RUN STATEMENT ---- '''
@@ -255,13 +297,13 @@ class Interpreter(InterpreterBase):
             case 'if':
                 if (self.trace_output == True):
                     print("\nRUN_STATEMENT: This node is an IF statement")
-                self.evaluate_if(statement_node, func_vars)
+                return self.evaluate_if(statement_node, func_vars)
             case 'for':
                 if (self.trace_output == True):
                     print("\nRUN_STATEMENT: This node is an FOR loop")
-                self.run_for_loop(statement_node, func_vars)
+                return self.run_for_loop(statement_node, func_vars)
             case 'return':
-                return_expression = statement_node.dict['expression']
+                return_expression = statement_node.expression
 
                 return_val = None
 
@@ -300,12 +342,14 @@ class Interpreter(InterpreterBase):
                         return_val = self.integer_compare( return_expression, func_vars )
                     
                     elif (return_exp_type == 'fcall'):
-                        return_val = self.run_fcall( return_expression, func_vars )
+                        return_val = self.run_fcall( return_expression, func_vars, self.tail_calls )
+                        if type(return_val) is TailCall:
+                            return return_val
 
                     if (return_val == None):  
                         print("ERR: no return value set")
 
-                raise ReturnValue(return_val)
+                return ReturnValue(return_val)
 
             case _:
                 super().error(
@@ -319,20 +363,20 @@ class Interpreter(InterpreterBase):
     def run_vardef(self, node, scope_stack):
         if (self.trace_output == True):
             print("\tInside RUN_VARDEF")
-        var_name = node.dict['name']
+        var_name = node.name
 
         # Retrieves top-most scope (within inner-most block)
         latest_scope = scope_stack[-1]
 
         # Check if variable has already been defined in this scope
-        if var_name in latest_scope:
+        if latest_scope[node.slot] is not UNDECLARED:
             super().error(
                 ErrorType.NAME_ERROR,
                 f"Variable {var_name} defined more than once"
             )
 
         # Add new variable to func_vars           Initial value: None
-        latest_scope[var_name] = "DIS IS THE INITIAL VARIABLE VALUE"
+        latest_scope[node.slot] = "DIS IS THE INITIAL VARIABLE VALUE"
         if (self.trace_output == True):
             print("\t\tCurrent func_vars: ", latest_scope)
 
@@ -341,19 +385,11 @@ class Interpreter(InterpreterBase):
     def run_assign(self, node, scope_stack):
         if (self.trace_output == True):
             print("\tInside RUN_ASSIGN")
-        node_dict = node.dict
-        var_name = node_dict['name']
+        var_name = node.name
 
 
-        scope_to_update = None
-
-        # Traverse stack in reverse order
-        for scope in scope_stack[::-1]:
-            # If variable exists in this scope, this is the one you want to update
-            # ONLY EDIT TOPMOST SCOPE
-            if var_name in scope:
-                scope_to_update = scope
-                break
+        # Scope + slot were resolved at load time (resolver.py)
+        scope_to_update, slot = find_slot(node, scope_stack)
 
         # If not found in any scope
         if scope_to_update == None:
@@ -364,59 +400,59 @@ class Interpreter(InterpreterBase):
 
 
         # Calculate expression
-        node_expression = node_dict['expression']
+        node_expression = node.expression
         node_type = node_expression.elem_type
         # If string, int, or boolean value
         if (node_type == 'string' or node_type == 'int' or node_type == 'bool'):
-            scope_to_update[var_name] = self.get_value(node_expression)
+            scope_to_update[slot] = self.get_value(node_expression)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
 
         # # If another variable
         elif (node_type == 'var'):
-            scope_to_update[var_name] = self.get_variable_value(node_expression, scope_stack)
+            scope_to_update[slot] = self.get_variable_value(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
 
         # Using an OVERLOADED operator
         elif (node_type in self.OVERLOADED_OPERATIONS):
-            scope_to_update[var_name] = self.overloaded_operator(node_expression, scope_stack)
+            scope_to_update[slot] = self.overloaded_operator(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
         
         # Integer Operation to be computed
         elif (node_type in self.INT_OPERATIONS):
-            scope_to_update[var_name] = self.run_int_operation(node_expression, scope_stack)
+            scope_to_update[slot] = self.run_int_operation(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
 
         # Boolean Operation to be computed
         elif (node_type in self.BOOL_OPERATIONS):
-            scope_to_update[var_name] = self.run_bool_operation(node_expression, scope_stack)
+            scope_to_update[slot] = self.run_bool_operation(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
 
         # Equality comparison
         elif (node_type in self.EQUALITY_COMPARISONS):
-            scope_to_update[var_name] = self.check_equality(node_expression, scope_stack)
+            scope_to_update[slot] = self.check_equality(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
 
         # Integer value comparison
         elif (node_type in self.INTEGER_COMPARISONS):
-            scope_to_update[var_name] = self.integer_compare(node_expression, scope_stack)
+            scope_to_update[slot] = self.integer_compare(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
 
         # Function call
         elif (node_type == 'fcall'):
-            scope_to_update[var_name] = self.run_fcall(node_expression, scope_stack)
+            scope_to_update[slot] = self.run_fcall(node_expression, scope_stack)
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
         
         # Nil value
         elif (node_type == 'nil'):
-            scope_to_update[var_name] = Element("nil")
+            scope_to_update[slot] = Element("nil")
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
         else:
@@ -448,7 +484,7 @@ class Interpreter(InterpreterBase):
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted (via existing variable {condition.dict['name']} value)"
+                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted (via existing variable {condition.name} value)"
                 )
 
         # If fcall
@@ -459,7 +495,7 @@ class Interpreter(InterpreterBase):
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted via fcall to {condition.dict['name']}"
+                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted via fcall to {condition.name}"
                 )
 
         elif (condition.elem_type in self.EQUALITY_COMPARISONS):
@@ -487,37 +523,44 @@ class Interpreter(InterpreterBase):
         if self.trace_output:
             print("** Inside EVALUATE_IF\tNode: ", node)
 
-        new_scope = {}
+        new_scope = [UNDECLARED] * node.nslots
         scope_stack.append( new_scope )
 
-        condition = node.dict['condition']
-        statements = node.dict['statements']
-        else_statements = node.dict['else_statements']
+        condition = node.condition
+        statements = node.statements
+        else_statements = node.else_statements
 
         eval_condition = self.check_condition(condition, scope_stack)
 
+        # signal = ReturnValue from a statement in the branch, None if it finished normally
+        signal = None
         if (eval_condition):
             # Loop through function statements in order
             for statement_node in statements:
-                self.run_statement( statement_node , scope_stack)
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
         else:
             if else_statements != None:
                 for statement_node in else_statements:
-                    self.run_statement( statement_node, scope_stack)
+                    signal = self.run_statement( statement_node, scope_stack)
+                    if signal is not None:
+                        break
 
         # Pop off new scope's variables
             # yup pop off
         scope_stack.pop()
+        return signal
         
     ''' --- For Loop ---- '''
     def run_for_loop(self, node, scope_stack):
         if self.trace_output:
             print("** Inside RUN FOR LOOP\tNode: ", node)
 
-        initialize = node.dict['init']
-        condition = node.dict['condition']
-        update = node.dict['update']
-        statements = node.dict['statements']
+        initialize = node.init
+        condition = node.condition
+        update = node.update
+        statements = node.statements
 
         # Initialize counter variable in variable dictionary
         self.run_assign(initialize, scope_stack)
@@ -525,26 +568,76 @@ class Interpreter(InterpreterBase):
         # Check condition is true to begin with
         eval_condition = self.check_condition(condition, scope_stack)
 
+        # for (i = a; i < b; i = i + c) (countedloop.py): the rest can run on a plain int if i + b are ints
+        if eval_condition and node.counted is not None and not self.trace_output:
+            counter = self.counted_value(node.counted.var, scope_stack)
+            bound = self.counted_value(node.counted.bound, scope_stack)
+            if counter is not None and bound is not None:
+                return self.run_counted_loop(node, scope_stack, counter, bound)
+
         # While condition is true, execute statements
         while (eval_condition):
             # Initialize new scope for this loop iteration
-            new_scope = {}
+            new_scope = [UNDECLARED] * node.nslots
             scope_stack.append( new_scope )
 
 
             # Loop through function statements in order
+            signal = None
             for statement_node in statements:
-                self.run_statement( statement_node , scope_stack)
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
 
             # Pop off new scope's variables when done running statements
             scope_stack.pop()
 
+            # return inside the body ends the loop
+            if signal is not None:
+                return signal
+
             # Update counter variable value
             self.run_assign(update, scope_stack)
 
             # Check condition again
             eval_condition = self.check_condition(condition, scope_stack)
 
+    def counted_value(self, node, scope_stack):
+        # Int held by a counted loop's counter / bound (already read by the first condition check), else None
+        if node.elem_type == 'int':
+            return node.val
+        scope, slot = find_slot(node, scope_stack)
+        value = scope[slot]
+        return value if type(value) is int else None
+
+    def run_counted_loop(self, node, scope_stack, counter, bound):
+        # Same iterations as run_for_loop: nothing in the body writes the counter or the bound,
+        # so the update is counter + step and the condition compare(counter, bound), both on ints
+        loop = node.counted
+        compare = loop.compare
+        step = loop.step
+        scope, slot = find_slot(loop.var, scope_stack)
+        statements = node.statements
+        nslots = node.nslots
+
+        while True:
+            scope_stack.append( [UNDECLARED] * nslots )
+            signal = None
+            for statement_node in statements:
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
+            scope_stack.pop()
+
+            # return inside the body ends the loop
+            if signal is not None:
+                return signal
+
+            counter += step
+            scope[slot] = counter
+            if not compare(counter, bound):
+                return None
+
 
 
     ''' ---- Overloaded Operation ---- '''
@@ -553,8 +646,8 @@ class Interpreter(InterpreterBase):
             print("IN OVERLOADED OPERATOR function")
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.eval_op(op1, func_vars)
@@ -603,7 +696,7 @@ class Interpreter(InterpreterBase):
             if not (isinstance(node_value, int)) or node_value is True or node_value is False:
                 super().error(
                 ErrorType.TYPE_ERROR,
-                f"Attempted to use string or bool or nil via existing variable {node.dict['name']} in integer operation"
+                f"Attempted to use string or bool or nil via existing variable {node.name} in integer operation"
             )
             
             # otherwise, it is an integer value
@@ -624,17 +717,17 @@ class Interpreter(InterpreterBase):
         
         # Unary negation
         if node_type == 'neg':
-            op1 = node.dict['op1']
+            op1 = node.op1
             if op1.elem_type not in allowable_types:
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Operand 1 is NOT of an allowable type for integer operation: op1 = {op1}"
                 )
-            return -( self.run_int_operation( node.dict['op1'], func_vars))
+            return -( self.run_int_operation( node.op1, func_vars))
         
         # Operation
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         if op1.elem_type not in allowable_types:
             super().error(
@@ -673,13 +766,13 @@ class Interpreter(InterpreterBase):
             if (isinstance( val , int)):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Incompatible types for STRING operation, attempted to use INTEGER (via existing variable {node.dict['name']} value)"
+                    f"Incompatible types for STRING operation, attempted to use INTEGER (via existing variable {node.name} value)"
                 )
 
             if ( val is True or val is False):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Incompatible types for STRING operation, attempted to use BOOLEAN (via existing variable {node.dict['name']} value)"
+                    f"Incompatible types for STRING operation, attempted to use BOOLEAN (via existing variable {node.name} value)"
                 )
             # Otherwise, return value
             return val
@@ -701,8 +794,8 @@ class Interpreter(InterpreterBase):
 
         # String concatenation
         if node_type == '+':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return ( self.run_string_operation(op1, func_vars) + self.run_string_operation(op2, func_vars) )
 
 
@@ -729,7 +822,7 @@ class Interpreter(InterpreterBase):
             if node_value is not True and node_value is not False:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use int, string, or nil via existing variable {node.dict['name']} in BOOL operation"
+                    f"Attempted to use int, string, or nil via existing variable {node.name} in BOOL operation"
                 )
             
             # Return variable value
@@ -752,16 +845,16 @@ class Interpreter(InterpreterBase):
         
         # Unary Boolean NOT
         if node_type == '!':
-            op1 = node.dict['op1']
+            op1 = node.op1
             if op1.elem_type not in allowable_types:
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = {op1}"
                 )
-            return not (self.run_bool_operation( node.dict['op1'], func_vars))
+            return not (self.run_bool_operation( node.op1, func_vars))
         
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # If not an allowable boolean operation
         if op1.elem_type not in allowable_types:
@@ -823,8 +916,8 @@ class Interpreter(InterpreterBase):
             print("CHECKING EQUALITY: ", node.elem_type)
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.eval_op(op1, func_vars)
@@ -882,8 +975,8 @@ class Interpreter(InterpreterBase):
             print("CHECKING EQUALITY: ", node.elem_type)
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.run_int_operation(op1, func_vars)
@@ -908,16 +1001,15 @@ class Interpreter(InterpreterBase):
 
     # Return value of value nodes
     def get_value(self, node):
-        return node.dict['val']
+        return node.val
     
 
     def get_variable_value(self, node, scope_stack):
         
-        var_name = node.dict['name']
-        for scope in scope_stack[::-1]:
-            # If variable exists in this scope, this is the value you want to return
-            if var_name in scope:
-                return scope[var_name]
+        var_name = node.name
+        scope, slot = find_slot(node, scope_stack)
+        if scope is not None:
+            return scope[slot]
         
         # If not found in any scope, error
         super().error(
@@ -932,7 +1024,7 @@ class Interpreter(InterpreterBase):
         if (prompt == []):
             user_input = super().get_input()
         else:
-            prompt_string = prompt[0].dict['val']
+            prompt_string = prompt[0].val
             super().output(prompt_string)
             user_input = super().get_input()
 
@@ -943,7 +1035,7 @@ class Interpreter(InterpreterBase):
         if (prompt == []):
             user_input = super().get_input()
         else:
-            prompt_string = prompt[0].dict['val']
+            prompt_string = prompt[0].val
             super().output(prompt_string)
             user_input = super().get_input()
 
@@ -961,15 +1053,15 @@ class Interpreter(InterpreterBase):
                 print("\t", element)
             node_type = element.elem_type
             if node_type == 'string':
-                string_to_output += element.dict['val']
+                string_to_output += element.val
             elif node_type == 'bool':
-                result = element.dict['val']
+                result = element.val
                 if result is True:
                     string_to_output += "true"
                 if result is False:
                     string_to_output += "false"
             elif node_type == 'int':
-                string_to_output += str(element.dict['val'])
+                string_to_output += str(element.val)
             # # If variable, retrieve variable value
             elif node_type == 'var':
                 # will raise error if variable hasn't been defined
@@ -1,19 +1,37 @@
-from brewparse import parse_program
+from astcache import parse_program
+from resolver import resolve_program, find_slot, UNDECLARED
+from linker import build_function_table, link_program
+from optimizer import optimize_program
+from countedloop import annotate_loops
+from structshape import build_shapes, annotate_fields
+from profiler import Profiler
+import stackeval
+import closurev3
+import transpilev3
+import typecheck
 from intbase import *
 from element import Element
 
-# Custom exception class to catch return values
-class ReturnValue(Exception):
+# Completion signal for return statements: run_statement hands it back up to run_func (no exception unwinding)
+class ReturnValue():
     def __init__(self, return_value, return_type):
         self.return_value = return_value
         self.return_type = return_type
 
+# Completion signal for `return f(...)`: the arguments are evaluated + checked, run_func runs f in place of the
+# function returning it (trampoline) when f's result would go through the same return type check
+class TailCall():
+    def __init__(self, func_node, func_args):
+        self.func_node = func_node
+        self.func_args = func_args
+
 NO_VALUE_DEFINED = object()     # This line is from ChatGPT: wanted a way to define my own version of 'None'
 
 
 class Interpreter(InterpreterBase):
     defined_functions = {}      # should map function name to list of func nodes (for overloading)
     defined_structs = {}
+    struct_shapes = {}          # struct name -> StructShape (structshape.py)
 
     INT_OPERATIONS = ['+', '-', '*', '/', 'neg']
     BOOL_OPERATIONS = ['!', '||', '&&']
@@ -22,70 +40,68 @@ class Interpreter(InterpreterBase):
     OVERLOADED_OPERATIONS = ['+']
     STRING_OPERATIONS = ['+']
 
-    class BrewinStruct():        
+    class BrewinStruct():
+        # Struct instance: its type's layout (structshape.py) + one value per field, in the layout's slot order
+        __slots__ = ("shape", "values")
+
         def __init__(self, interpreter, struct_node):
-            self.interpreter = interpreter
             # Struct_node: has var_type = struct name
-                # Need to find proper struct w/ fields and initialize
-            self.struct_name = struct_node.dict['var_type']
-
-            # Find proper struct to initialize
-            if (self.struct_name not in interpreter.defined_structs):
+            shape = interpreter.struct_shapes.get(struct_node.var_type)
+            if (shape is None):
                 InterpreterBase.error(
                     ErrorType.TYPE_ERROR,
-                    f"STRUCT \"{self.struct_name}\" not defined"
+                    f"STRUCT \"{struct_node.var_type}\" not defined"
                 )
-            
-            struct_to_initialize = interpreter.defined_structs[self.struct_name]
-
-            # Create dictionary of struct field values
-            self.struct_fields = {}
+            # Field types were all checked when the structs were loaded
+            self.shape = shape
+            self.values = list(shape.defaults)
 
-            for field in struct_to_initialize.dict['fields']:
-                field_name = field.dict['name']
-                field_type = field.dict['var_type']
-                if (field_type not in ['int', 'bool', 'string']+ list(interpreter.defined_structs.keys())):
-                    InterpreterBase.error(
-                        ErrorType.TYPE_ERROR,
-                        f"Cannot initialize struct field of type \"{field_type}\" b/c it doesn't exist"
-                    )
-
-                self.struct_fields[field_name] = {'type':field_type, 'val':interpreter.default_values(field_type)}
-        
-        def get_fields(self):
-            return self.struct_fields
-            
-        def get_field(self, field):
-            if (field not in self.struct_fields):
-                InterpreterBase.error(
-                    ErrorType.NAME_ERROR,
-                    f"Field { {field} }  not defined for STRUCT \"{self.struct_name}\" "
-                )
-            else:
-                return self.struct_fields[field]
-            
         def __str__(self):
-            str_print = "\nStruct Type: " +  self.struct_name + "\n"
-            for field in self.struct_fields:
+            str_print = "\nStruct Type: " +  self.shape.name + "\n"
+            for field, field_type, value in zip(self.shape.fields, self.shape.types, self.values):
                 str_print += ("\t" + field + "\t\t")
-                str_print += ("Type = " + self.struct_fields[field]['type'] + "\tValue = " + str(self.struct_fields[field]['val']) + "\n")
+                str_print += ("Type = " + field_type + "\tValue = " + str(value) + "\n")
             return str_print
             
    
-    def __init__(self, console_output=True, inp=None, trace_output=False):
+    def __init__(self, console_output=True, inp=None, trace_output=False, explicit_stack=False, profile=False, use_closures=False, use_transpiler=False, strict_types=False, optimize=True, tail_calls=True):
         super().__init__(console_output, inp)   # call InterpreterBase's constructor
         self.trace_output = trace_output
+        self.explicit_stack = explicit_stack    # run on a heap-allocated frame stack (stackeval.py) so deep recursion doesn't hit Python's limit
+        self.use_closures = use_closures        # compile every node to a closure once (closurev3.py) instead of walking the AST
+        self.use_transpiler = use_transpiler    # translate the whole program to Python source + run it natively (transpilev3.py)
+        self.strict_types = strict_types        # raise TYPE_ERRORs the type checker finds before running anything (typecheck.py)
+                                                # (only in functions main can call: an unused bad function still runs,
+                                                # but a bad statement in a branch of a called function never taken doesn't)
+        self.type_errors = []
+        self.optimize = optimize                # optimizer passes to run first (optimizer.py): True = all, False = none, or a list of names
+        self.optimizations = {}
+        self.inlined_calls = []                 # (calling function, called function) of every call the optimizer inlined
+        # Run tail calls in the returning function's run_func (constant Python stack for accumulator recursion)
+            # (trace_output / profile: every call keeps its own run_func, so each one is printed / recorded)
+        self.tail_calls = tail_calls and not trace_output and not profile
+        self.tail_calls_eliminated = 0
+
+        # Per-function call counts / timings (profiler.py), only hooked into run_func when asked for
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler()
+            self.run_func = self.profiler.wrap(self.run_func)
 
     ''' ---- RUN PROGRAM ---- '''
     def run(self, program):
         self.defined_functions = {}
         self.defined_structs = {}
+        self.struct_shapes = {}
+        self.tail_calls_eliminated = 0
         ''' 
             program = array of strings containing program
             ast = AST generated by parser
             self.program_vars = map to hold variables + their values
         '''
         self.ast = parse_program(program)
+        # Annotate variables with (depth, slot) addresses so scopes can be plain arrays
+        resolve_program(self.ast)
 
         ''' ---- Find Main Node ---- '''
         # Check program validity
@@ -98,42 +114,45 @@ class Interpreter(InterpreterBase):
         allowable_types = ['int', 'string', 'bool', 'void']
         
         # Loop through all provided user-defined structs, add to dictionary of defined structs
-        for struct in self.ast.dict['structs']:
-            struct_name = struct.dict['name']
+        for struct in self.ast.structs:
+            struct_name = struct.name
             allowable_types.append(struct_name)
             # Check all types for fields are valid
-            for field in struct.dict['fields']:
-                if field.dict['var_type'] not in allowable_types or field.dict['var_type'] == 'void':
+            for field in struct.fields:
+                if field.var_type not in allowable_types or field.var_type == 'void':
                     super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Invalid type { {field.dict['var_type']} } in field for \"{struct_name}\""
+                        f"Invalid type { {field.var_type} } in field for \"{struct_name}\""
                     )
             self.defined_structs[struct_name] = struct
+
+        # Field layout of every struct, computed once (instances are just a list of values)
+        self.struct_shapes = build_shapes(self.defined_structs, self.default_values)
         
 
         # Search through program functions to find the MAIN node
         main_node = NO_VALUE_DEFINED
-        for func in self.ast.dict['functions']:
+        for func in self.ast.functions:
             # Loop through all provided functions, add to dictionary of defined functions
-            func_name = func.dict['name']
+            func_name = func.name
             if func_name not in self.defined_functions:
                 self.defined_functions[func_name] = []
             self.defined_functions[func_name].append(func)
             
             # Identify main_node to run aftter
-            if (func.dict['name'] == 'main'):
+            if (func.name == 'main'):
                 main_node = func
 
             # Check for valid return types and parameters
-            for arg in func.dict['args']:
-                arg_type = arg.dict['var_type']
+            for arg in func.args:
+                arg_type = arg.var_type
                 if (arg_type not in allowable_types) or arg_type == 'void':
                     super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Invalid type for argument \"{arg.dict['name']}\" of type { {arg_type} }"
+                        f"Invalid type for argument \"{arg.name}\" of type { {arg_type} }"
                     )
 
-            ret_type = func.dict['return_type']
+            ret_type = func.return_type
             if (ret_type not in allowable_types):
                 super().error(
                         ErrorType.TYPE_ERROR,
@@ -147,48 +166,85 @@ class Interpreter(InterpreterBase):
                 "No MAIN node found in program"
             )
         
+        # Bind every call site to its builtin handler / (name, arity) overload once, up front
+        self.function_table = build_function_table(self.ast.functions)
+        link_program(self.ast, self.function_table, self.builtin_funcs())
+
+        # Inlining / constant propagation / folding (optimizer.py): returns how many rewrites each pass made
+            # (trace_output: leave the program as written, the trace follows it node by node)
+        self.optimizations = {}
+        self.inlined_calls = []
+        if self.optimize and not self.trace_output:
+            self.optimizations = optimize_program(self.ast, '3', None if self.optimize is True else self.optimize, self.inlined_calls)
+
+        # Counted for loops (countedloop.py): after their first condition check they run on a plain int
+        annotate_loops(self.ast)
+
+        # Inline caches for the dotted var / = nodes (structshape.py)
+        annotate_fields(self.ast)
+
+        # Static types (typecheck.py): nodes proven type-safe are evaluated w/o the runtime checks
+            # (trace_output: keep every node on the checking evaluators, they print as they go)
+        self.type_errors = typecheck.check_program(self.ast, self.defined_structs, main_node, annotate=not self.trace_output)
+        if self.strict_types and self.type_errors:
+            super().error(
+                ErrorType.TYPE_ERROR,
+                self.type_errors[0]
+            )
+
         # Run MAIN node
+        if self.explicit_stack:
+            return stackeval.call(self, 'run_func', main_node, [])
+        # (programs the transpiler can't type check up front fall back to closures / the tree-walker)
+        if self.use_transpiler and not self.trace_output:
+            program = transpilev3.compile_program(self, main_node)
+            if program is not None:
+                return program()
+        # (closures recurse in Python like the tree-walker, and don't print the trace_output messages)
+        if self.use_closures and not self.trace_output:
+            return closurev3.run_program(self, main_node)
         return self.run_func(main_node, [])
 
-    def check_builtin_funcs(self, func_node, scope_stack):
-        node_dict = func_node.dict
-        func_name = node_dict['name']
+    ''' ---- Builtin functions (bound to fcall nodes at load time, see linker.py) ---- '''
+    def builtin_inputi(self, func_node, scope_stack):
+        if (self.trace_output == True):
+            print("\tCalling inputi function")
+        if (len (func_node.args) > 1):
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"No inputi() function found that takes more than 1 parameter"
+            )
+        return self.inputi(func_node.args)
 
-        ''' PRINT + INPTUTI + INPUTS handling'''
-        # Separate handling for: PRINT, INPUTI
-        if func_name == 'inputi':
-            if (self.trace_output == True):
-                print("\tCalling inputi function")
-            if (len (node_dict['args']) > 1):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"No inputi() function found that takes more than 1 parameter"
-                )
-            return self.inputi(node_dict['args'])
-        
-        if func_name == 'inputs':
-            if (self.trace_output == True):
-                print("\tCalling inputs function")
-            if (len (node_dict['args']) > 1):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"No inputs() function found that takes more than 1 parameter"
-                )
-            return self.inputs(node_dict['args'])
-        
-        if func_name == 'print':
-            return self.printout(scope_stack, node_dict['args'])
-        ''' END OF SEPARATE HANDLING '''
+    def builtin_inputs(self, func_node, scope_stack):
+        if (self.trace_output == True):
+            print("\tCalling inputs function")
+        if (len (func_node.args) > 1):
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"No inputs() function found that takes more than 1 parameter"
+            )
+        return self.inputs(func_node.args)
+
+    def builtin_print(self, func_node, scope_stack):
+        if func_node.checked:
+            return self.print_checked(scope_stack, func_node.args)
+        return self.printout(scope_stack, func_node.args)
 
-        return NO_VALUE_DEFINED
+    def builtin_funcs(self):
+        return {
+            'inputi': self.builtin_inputi,
+            'inputs': self.builtin_inputs,
+            'print': self.builtin_print,
+        }
 
 
     ''' ---- HANDLE fcall ---- '''
-    def run_fcall(self, func_node, calling_func_vars):
+    def run_fcall(self, func_node, calling_func_vars, tail=False):
         # calling_func_vars = variables defined by the calling function (where the statement was)
-        node_dict = func_node.dict
-        func_name = node_dict['name']
-        func_args = node_dict['args']   # arguments passed into the function call
+        # tail = call is returned as is: hand run_func a TailCall instead of running it
+        func_name = func_node.name
+        func_args = func_node.args   # arguments passed into the function call
 
         if (self.trace_output):
             if (func_args == []):
@@ -199,43 +255,43 @@ class Interpreter(InterpreterBase):
                 for arg in func_args:
                     print("\t\t", arg)
 
-        # Check if Print, Inputi, or Inputs
-        builtin = self.check_builtin_funcs(func_node, calling_func_vars)
-        if builtin is not NO_VALUE_DEFINED:
-            return builtin
+        # Print, Inputi, or Inputs (bound by linker.py)
+        if func_node.builtin is not None:
+            return func_node.builtin(func_node, calling_func_vars)
         
 
-        # For all other function calls: 
-        if (func_name not in self.defined_functions):
-            super().error(
-                ErrorType.NAME_ERROR,
-                f"Function {func_name} was not found / defined ",
-            )
-
-        # Based on the provided number of arguments in the function call
-            # Identify the correct (possibly overloaded) function definition to run
-        func_to_run = NO_VALUE_DEFINED
-        defined_funcs_found = self.defined_functions[func_name]
-        for func in defined_funcs_found:
-            args = func.dict['args']
-            if len(func_args) == len ( args ):
-                func_to_run = func
+        # For all other function calls: overload with matching number of args was linked at load time
+        func_to_run = func_node.target
+        if (func_to_run is None):
+            if (func_name not in self.defined_functions):
+                super().error(
+                    ErrorType.NAME_ERROR,
+                    f"Function {func_name} was not found / defined ",
+                )
 
-        if (func_to_run is NO_VALUE_DEFINED):
             # Wrong number of arguments for this function
             super().error(
                 ErrorType.NAME_ERROR, 
                 f"Function { {func_name} } with { len(func_args)} parameters was not found"
             )
 
-        function_formal_params = func_to_run.dict['args']
+        function_formal_params = func_to_run.args
         func_arg_values = []
 
         # Check that argument types match parameter type
         param_arg_zip = zip(function_formal_params, func_args)
 
+        # Every argument was proven to match its parameter at load time (typecheck.py): just evaluate them
+        if func_node.checked:
+            for param, arg in param_arg_zip:
+                arg_value = self.eval_checked(arg, calling_func_vars)
+                if (param.var_type == 'bool'):
+                    arg_value = bool(arg_value)
+                func_arg_values.append({'type':param.var_type, 'val':arg_value})
+            param_arg_zip = []
+
         for param, arg in param_arg_zip:
-            param_type = param.dict['var_type']
+            param_type = param.var_type
 
             arg_type = arg.elem_type
 
@@ -250,7 +306,7 @@ class Interpreter(InterpreterBase):
                     else:
                         super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Cannot assign type { { arg_type} } to parameter \"{param.dict['name']}\" of type { {param_type} }"
+                        f"Cannot assign type { { arg_type} } to parameter \"{param.name}\" of type { {param_type} }"
                     )
                 else:
                     func_arg_values.append({'type':arg_type, 'val':self.get_value(arg)})
@@ -265,7 +321,7 @@ class Interpreter(InterpreterBase):
                     else:
                         super().error(
                             ErrorType.TYPE_ERROR,
-                            f"Cannot assign type { { other_var_type } } to PARAMETER \"{param.dict['name']}\" of type { {param_type} }"
+                            f"Cannot assign type { { other_var_type } } to PARAMETER \"{param.name}\" of type { {param_type} }"
                         )
                 else:
                     # Add copy of variable value or obj ref if struct
@@ -276,7 +332,7 @@ class Interpreter(InterpreterBase):
                 if (fcall_ret is None):
                     super().error(
                             ErrorType.TYPE_ERROR,
-                            f"Cannot assign type NONE to PARAMETER \"{param.dict['name']}\" of type { {param_type} } via FUNCTION CALL RETURN VALUE"
+                            f"Cannot assign type NONE to PARAMETER \"{param.name}\" of type { {param_type} } via FUNCTION CALL RETURN VALUE"
                         )
                 if (fcall_ret['type'] != param_type):
                     if (param_type == 'bool' and fcall_ret['type'] == 'int'):
@@ -284,7 +340,7 @@ class Interpreter(InterpreterBase):
                     else:
                         super().error(
                             ErrorType.TYPE_ERROR,
-                            f"Cannot assign type { { fcall_ret['type'] } } to PARAMETER \"{param.dict['name']}\" of type { {param_type} } via FUNCTION CALL RETURN VALUE"
+                            f"Cannot assign type { { fcall_ret['type'] } } to PARAMETER \"{param.name}\" of type { {param_type} } via FUNCTION CALL RETURN VALUE"
                         )
                 else:
                     func_arg_values.append( fcall_ret )
@@ -307,7 +363,7 @@ class Interpreter(InterpreterBase):
 
             elif(arg_type == 'new'):
                 # Create new STRUCT + pass in dictionary mapping type to the obj ref
-                struct_type = arg.dict['var_type']
+                struct_type = arg.var_type
                 if (struct_type != param_type):
                     super().error(
                         ErrorType.TYPE_ERROR,
@@ -321,6 +377,8 @@ class Interpreter(InterpreterBase):
                 func_arg_values.append(arg)
 
 
+        if tail:
+            return TailCall(func_to_run, func_arg_values)
         function_ret_val = self.run_func( func_to_run , func_arg_values )
         
         # If void function
@@ -339,71 +397,88 @@ class Interpreter(InterpreterBase):
                 "Non-function node passed into run_func"
             )
 
-        # Create dictionary to hold variables local to this function
-        scope_stack = []
-        func_vars = {}
-        
-        node_dict = func_node.dict
-        node_params = node_dict['args']
-        expected_return_type = node_dict['return_type']
+        expected_return_type = func_node.return_type
 
+        # One pass per function run here: the first is func_node, the rest are tail calls it (transitively) returned
+        while True:
+            # Create scope (array indexed by resolver slots) to hold variables local to this function
+            scope_stack = []
+            func_vars = [UNDECLARED] * func_node.nslots
 
-        if (self.trace_output == True):
-            if node_params == []:
-                print("\tThis function has NO parameters")
-            else:
-                print("\tThis function has the following paramters: ")
-                for arg in node_params:
-                    print("\t\t", arg)
+            node_params = func_node.args
 
-        # Map argument values to the parameter names
-        for param, var_value in zip(node_params, func_args):
-            var_name = param.dict['name']
-            var_type = param.dict['var_type']
+            if (self.trace_output == True):
+                if node_params == []:
+                    print("\tThis function has NO parameters")
+                else:
+                    print("\tThis function has the following paramters: ")
+                    for arg in node_params:
+                        print("\t\t", arg)
 
-            func_vars[var_name] = {}
-            func_vars[var_name]['type'] = var_type
+            # Map argument values to the parameter names
+            for param, var_value in zip(node_params, func_args):
+                slot = param.slot
+                var_type = param.var_type
 
-            func_vars[var_name]['val'] = var_value['val']
-            
+                func_vars[slot] = {}
+                func_vars[slot]['type'] = var_type
 
-        # Base parameter:argument pairs are the ENCLOSING environment defined variables
-        scope_stack.append( func_vars )
-
-        # Loop through function statements in order
-        for statement_node in node_dict['statements']:
-            # Run each statement
-            try:
-                self.run_statement(statement_node, scope_stack)
-            # If RETURN is found, should throw an exception
-            except ReturnValue as rval:
-                # Remove all added scopes from inside function
-                while (len(scope_stack) > 1):
-                    scope_stack.pop()
-
-                if (expected_return_type == 'void'):
-                    if (rval.return_type != None or rval.return_value != None):
-                        super().error(
-                            ErrorType.TYPE_ERROR,
-                            f"Attempted to return a value from a VOID function"
-                        )
-                    return None
-                
-                if (rval.return_type == None and rval.return_value == None):
-                    return_val = self.default_values(expected_return_type)
-                    return ReturnValue(return_val, expected_return_type)
-                
-                if (rval.return_type == 'int' and expected_return_type == 'bool'):
-                        return ReturnValue( bool(rval.return_value), expected_return_type )
-                
-                if rval.return_type != expected_return_type:
+                func_vars[slot]['val'] = var_value['val']
+
+
+            # Base parameter:argument pairs are the ENCLOSING environment defined variables
+            scope_stack.append( func_vars )
+
+            # Loop through function statements in order
+            rval = None
+            for statement_node in func_node.statements:
+                # Run each statement
+                rval = self.run_statement(statement_node, scope_stack)
+                # If RETURN is found, run_statement hands back its ReturnValue (or TailCall)
+                if rval is not None:
+                    break
+
+            if type(rval) is not TailCall:
+                break
+            # Tail call with the same return type: checking its result again would change nothing, run it in this frame
+            if rval.func_node.return_type == expected_return_type:
+                self.tail_calls_eliminated += 1
+                func_node = rval.func_node
+                func_args = rval.func_args
+                continue
+            # Otherwise its result still goes through this function's check below
+            function_ret_val = self.run_func(rval.func_node, rval.func_args)
+            if function_ret_val is None:
+                rval = ReturnValue(None, None)
+            else:
+                rval = ReturnValue(function_ret_val.return_value, function_ret_val.return_type)
+            break
+
+        # RETURN found: check its value against the return type
+        if rval is not None:
+            if (expected_return_type == 'void'):
+                if (rval.return_type != None or rval.return_value != None):
                     super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Returned value { {rval.return_value} } does not match expected type \"{expected_return_type}\" "
+                        f"Attempted to return a value from a VOID function"
                     )
-                
-                # Otherwise, just return it w/ the value and type that are already set
-                return rval
+                return None
+            
+            if (rval.return_type == None and rval.return_value == None):
+                return_val = self.default_values(expected_return_type)
+                return ReturnValue(return_val, expected_return_type)
+            
+            if (rval.return_type == 'int' and expected_return_type == 'bool'):
+                    return ReturnValue( bool(rval.return_value), expected_return_type )
+            
+            if rval.return_type != expected_return_type:
+                super().error(
+                    ErrorType.TYPE_ERROR,
+                    f"Returned value { {rval.return_value} } does not match expected type \"{expected_return_type}\" "
+                )
+            
+            # Otherwise, just return it w/ the value and type that are already set
+            return rval
 
         if expected_return_type == 'void':
             return None
@@ -433,13 +508,13 @@ class Interpreter(InterpreterBase):
             case 'if':
                 if (self.trace_output == True):
                     print("\nRUN_STATEMENT: This node is an IF statement")
-                self.evaluate_if(statement_node, func_vars)
+                return self.evaluate_if(statement_node, func_vars)
             case 'for':
                 if (self.trace_output == True):
                     print("\nRUN_STATEMENT: This node is an FOR loop")
-                self.run_for_loop(statement_node, func_vars)
+                return self.run_for_loop(statement_node, func_vars)
             case 'return':
-                return_expression = statement_node.dict['expression']
+                return_expression = statement_node.expression
 
                 # print("\n--In RETURN statement handling in rUN_STATEMENT\n\tExpression to return: ", return_expression)
 
@@ -447,7 +522,15 @@ class Interpreter(InterpreterBase):
                 return_type = None
 
                 if return_expression == None:
-                    raise ReturnValue(None, None)
+                    return ReturnValue(None, None)
+
+                # Call to a user function: its arguments are evaluated here, run_func decides how to run it
+                if self.tail_calls and return_expression.elem_type == 'fcall' and return_expression.target is not None:
+                    return self.run_fcall(return_expression, func_vars, True)
+
+                # Expression + the type it gives were decided at load time (typecheck.py)
+                if statement_node.checked:
+                    return ReturnValue(self.eval_checked(return_expression, func_vars), statement_node.value_type)
 
                 if return_expression.elem_type == "nil":
                     return_val = Element("nil")
@@ -468,7 +551,7 @@ class Interpreter(InterpreterBase):
 
                     # If new struct
                     elif (return_exp_type == 'new'):
-                        return_type = str(return_expression.dict['var_type'])
+                        return_type = str(return_expression.var_type)
                         struct_OR = self.BrewinStruct(self, return_expression)
                         return_val = struct_OR
                     
@@ -504,7 +587,7 @@ class Interpreter(InterpreterBase):
                         return_val_fcall = self.run_fcall( return_expression, func_vars )
                         # TESTING BELOW
                         if (return_val_fcall is None):
-                            raise ReturnValue(None, None)
+                            return ReturnValue(None, None)
                         # TESTING ABOVE
                         return_val = return_val_fcall['val']
                         return_type = return_val_fcall['type']
@@ -512,7 +595,7 @@ class Interpreter(InterpreterBase):
                     # if (return_val == None):  
                     #     print("ERR: no return value set")
 
-                raise ReturnValue(return_val, return_type)
+                return ReturnValue(return_val, return_type)
 
             case _:
                 super().error(
@@ -542,15 +625,15 @@ class Interpreter(InterpreterBase):
     def run_vardef(self, node, scope_stack):
         if (self.trace_output == True):
             print("\tInside RUN_VARDEF")
-        var_name = node.dict['name']
-        var_type = node.dict['var_type']
+        var_name = node.name
+        var_type = node.var_type
 
 
         # Retrieves top-most scope (within inner-most block)
         latest_scope = scope_stack[-1]
 
         # Check if variable has already been defined in this scope
-        if var_name in latest_scope:
+        if latest_scope[node.slot] is not UNDECLARED:
             super().error(
                 ErrorType.NAME_ERROR,
                 f"Variable {var_name} defined more than once"
@@ -569,7 +652,7 @@ class Interpreter(InterpreterBase):
         # Add new variable to func_vars           Initial value: Default value, None if no default set (used for my checking)
         var_dict['val'] = self.default_values(var_type)
 
-        latest_scope[var_name] = var_dict
+        latest_scope[node.slot] = var_dict
 
         if (self.trace_output == True):
             print("\t\tCurrent func_vars: ", latest_scope)
@@ -579,37 +662,37 @@ class Interpreter(InterpreterBase):
     def run_assign(self, node, scope_stack):
         if (self.trace_output == True):
             print("\tInside RUN_ASSIGN")
-        node_dict = node.dict
-        var_name = node_dict['name']
+        var_name = node.name
 
         # print("\n-- In VAR ASSIGN\tNode = ", node)
 
-        scope_to_update = NO_VALUE_DEFINED
-
         # If updating a struct field, refer to special struct_updating function
         if ('.' in var_name):
             self.struct_update(node, scope_stack)         
             return
 
-        # Traverse stack in reverse order
-        for scope in scope_stack[::-1]:
-            # If variable exists in this scope, this is the one you want to update
-            # ONLY EDIT TOPMOST SCOPE
-            if var_name in scope:
-                scope_to_update = scope
-                break
+        # Scope + slot were resolved at load time (resolver.py)
+        scope_to_update, slot = find_slot(node, scope_stack)
 
         # If not found in any scope
-        if scope_to_update is NO_VALUE_DEFINED:
+        if scope_to_update is None:
             super().error(
                 ErrorType.NAME_ERROR,
                 f"Variable { {var_name} } not found in any scope"
             )
 
-        var_type = scope_to_update[var_name]['type']
+        var_type = scope_to_update[slot]['type']
+
+        # Expression was proven to fit this variable at load time (typecheck.py)
+        if node.checked:
+            new_value = self.eval_checked(node.expression, scope_stack)
+            if (var_type == 'bool'):
+                new_value = bool(new_value)
+            scope_to_update[slot]['val'] = new_value
+            return None
 
         # Calculate expression
-        node_expression = node_dict['expression']
+        node_expression = node.expression
         node_type = node_expression.elem_type
 
         # If string, int, or boolean value
@@ -619,14 +702,14 @@ class Interpreter(InterpreterBase):
                 # Coercion between int --> bool
                 if (var_type == 'bool' and node_type == 'int'):
                     int_val = self.get_value(node_expression)
-                    scope_to_update[var_name]['val'] = bool(int_val)
+                    scope_to_update[slot]['val'] = bool(int_val)
                 else:
                     super().error(
                         ErrorType.TYPE_ERROR,
                         f"Cannot assign type { { node_type} } to variable \"{var_name}\" of type { {var_type} }"
                     )
             else:
-                scope_to_update[var_name]['val'] = self.get_value(node_expression)
+                scope_to_update[slot]['val'] = self.get_value(node_expression)
             
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
@@ -641,15 +724,15 @@ class Interpreter(InterpreterBase):
             if (other_var_type != var_type):
                 # Coercion between int --> bool
                 if (var_type == 'bool' and other_var_type == 'int'):
-                    scope_to_update[var_name]['val'] = bool(other_var_val['val'])
+                    scope_to_update[slot]['val'] = bool(other_var_val['val'])
                 else:
                     super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Cannot assign type of variable  { { other_var_type} } of variable \"{node_expression.dict['name']}\" to variable \"{var_name}\" of type { {var_type} }"
+                        f"Cannot assign type of variable  { { other_var_type} } of variable \"{node_expression.name}\" to variable \"{var_name}\" of type { {var_type} }"
                     )
             else:
                 # Otherwise, update w/ new variable value       ( copy for primitives )
-                scope_to_update[var_name]['val'] = other_var_val['val']
+                scope_to_update[slot]['val'] = other_var_val['val']
             
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
@@ -661,18 +744,18 @@ class Interpreter(InterpreterBase):
             if (fcall_ret is None):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot assign VOID function { {node_expression.dict['name']} } to variable \"{var_name}\""
+                    f"Cannot assign VOID function { {node_expression.name} } to variable \"{var_name}\""
                 )
             if (fcall_ret['type'] != var_type):
                 if (var_type == 'bool' and fcall_ret['type'] == 'int'):
-                    scope_to_update[var_name]['val'] = bool(fcall_ret['val'])
+                    scope_to_update[slot]['val'] = bool(fcall_ret['val'])
                 else:
                     super().error(
                         ErrorType.TYPE_ERROR,
                         f"Cannot assign fcall return value of type  { { fcall_ret['val']} } to variable \"{var_name}\" of type { {var_type} }"
                     )
             else:
-                scope_to_update[var_name]['val'] = fcall_ret['val']
+                scope_to_update[slot]['val'] = fcall_ret['val']
             
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
@@ -680,13 +763,13 @@ class Interpreter(InterpreterBase):
 
         # If not another var or a constant, check all allowable operations for this type
         elif (var_type == 'int'):
-            scope_to_update[var_name]['val'] = self.int_types(node_expression, scope_stack)
+            scope_to_update[slot]['val'] = self.int_types(node_expression, scope_stack)
 
         elif (var_type == 'bool'):
-            scope_to_update[var_name]['val'] = self.bool_types(node_expression, scope_stack)
+            scope_to_update[slot]['val'] = self.bool_types(node_expression, scope_stack)
 
         elif (var_type == 'string'):
-            scope_to_update[var_name]['val'] = self.string_types(node_expression, scope_stack)
+            scope_to_update[slot]['val'] = self.string_types(node_expression, scope_stack)
         
         # Nil value
         elif (node_type == 'nil'):
@@ -695,20 +778,20 @@ class Interpreter(InterpreterBase):
                     ErrorType.TYPE_ERROR,
                     f"Cannot assign non-struct variable \"{var_name}\" to NIL value"
                 )
-            scope_to_update[var_name]['val'] = Element("nil")
+            scope_to_update[slot]['val'] = Element("nil")
             if (self.trace_output == True):
                 print("\t\tUpdated scope_stack: ", scope_stack)
         
         # Instantiating new struct object
         elif (node_type == 'new'):
-            struct_type = node_expression.dict['var_type']
-            if (struct_type != scope_to_update[var_name]['type']):
+            struct_type = node_expression.var_type
+            if (struct_type != scope_to_update[slot]['type']):
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Cannot assign non-struct variable \"{var_name}\" to STRUCT of type { {struct_type} } value"
                 )
             struct_OR = self.BrewinStruct(self, node_expression)
-            scope_to_update[var_name]['val'] = struct_OR
+            scope_to_update[slot]['val'] = struct_OR
         else:
             super().error(
                     ErrorType.TYPE_ERROR,
@@ -742,7 +825,7 @@ class Interpreter(InterpreterBase):
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot evaluate non bool/int in 'if' statement condition, attempted (via existing variable {condition.dict['name']} value)"
+                    f"Cannot evaluate non bool/int in 'if' statement condition, attempted (via existing variable {condition.name} value)"
                 )
 
         # If fcall
@@ -751,7 +834,7 @@ class Interpreter(InterpreterBase):
             if (fcall_return is None):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot use VOID function { {condition.dict['name']} } in CONDITION"
+                    f"Cannot use VOID function { {condition.name} } in CONDITION"
                 )
 
             if (fcall_return['type'] == 'bool' or fcall_return['type'] == 'int'):
@@ -759,7 +842,7 @@ class Interpreter(InterpreterBase):
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot evaluate NON-BOOL in 'if' statement condition, attempted via fcall to \" {condition.dict['name']} \""
+                    f"Cannot evaluate NON-BOOL in 'if' statement condition, attempted via fcall to \" {condition.name} \""
                 )
 
         elif (condition_type in self.EQUALITY_COMPARISONS):
@@ -781,68 +864,137 @@ class Interpreter(InterpreterBase):
         if self.trace_output:
             print("** Inside EVALUATE_IF\tNode: ", node)
 
-        new_scope = {}
+        new_scope = [UNDECLARED] * node.nslots
         scope_stack.append( new_scope )
 
-        condition = node.dict['condition']
-        statements = node.dict['statements']
-        else_statements = node.dict['else_statements']
+        condition = node.condition
+        statements = node.statements
+        else_statements = node.else_statements
 
-        eval_condition = self.check_condition(condition, scope_stack)
+        # Condition proven at load time (typecheck.py) -> no checks needed
+        if node.checked:
+            eval_condition = self.eval_checked(condition, scope_stack)
+        else:
+            eval_condition = self.check_condition(condition, scope_stack)
 
+        # signal = ReturnValue from a statement in the branch, None if it finished normally
+        signal = None
         if (eval_condition):
             # Loop through function statements in order
             for statement_node in statements:
-                self.run_statement( statement_node , scope_stack)
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
         else:
             if else_statements != None:
                 for statement_node in else_statements:
-                    self.run_statement( statement_node, scope_stack)
+                    signal = self.run_statement( statement_node, scope_stack)
+                    if signal is not None:
+                        break
 
         # Pop off new scope's variables
             # yup pop off
         scope_stack.pop()
 
-        return None
+        return signal
         
     ''' --- For Loop ---- '''
     def run_for_loop(self, node, scope_stack):
         if self.trace_output:
             print("** Inside RUN FOR LOOP\tNode: ", node)
 
-        initialize = node.dict['init']
-        condition = node.dict['condition']
-        update = node.dict['update']
-        statements = node.dict['statements']
+        initialize = node.init
+        condition = node.condition
+        update = node.update
+        statements = node.statements
 
         # Initialize counter variable in variable dictionary
         self.run_assign(initialize, scope_stack)
 
-        # Check condition is true to begin with
-        eval_condition = self.check_condition(condition, scope_stack)
+        # Check condition is true to begin with    (proven at load time if node.checked, see typecheck.py)
+        if node.checked:
+            eval_condition = self.eval_checked(condition, scope_stack)
+        else:
+            eval_condition = self.check_condition(condition, scope_stack)
+
+        # for (i = a; i < b; i = i + c) (countedloop.py): the rest can run on a plain int if i + b are ints
+        if eval_condition and node.counted is not None and not self.trace_output:
+            counter = self.counted_value(node.counted.var, scope_stack)
+            bound = self.counted_value(node.counted.bound, scope_stack)
+            if counter is not None and bound is not None:
+                return self.run_counted_loop(node, scope_stack, counter, bound)
 
         # While condition is true, execute statements
         while (eval_condition):
             # Initialize new scope for this loop iteration
-            new_scope = {}
+            new_scope = [UNDECLARED] * node.nslots
             scope_stack.append( new_scope )
 
 
             # Loop through function statements in order
+            signal = None
             for statement_node in statements:
-                self.run_statement( statement_node , scope_stack)
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
 
             # Pop off new scope's variables when done running statements
             scope_stack.pop()
 
+            # return inside the body ends the loop
+            if signal is not None:
+                return signal
+
             # Update counter variable value
             self.run_assign(update, scope_stack)
 
             # Check condition again
-            eval_condition = self.check_condition(condition, scope_stack)
+            if node.checked:
+                eval_condition = self.eval_checked(condition, scope_stack)
+            else:
+                eval_condition = self.check_condition(condition, scope_stack)
 
         return None
 
+    def counted_value(self, node, scope_stack):
+        # Int held by a counted loop's counter / bound (already read by the first condition check), else None
+        if node.elem_type == 'int':
+            return node.val
+        scope, slot = find_slot(node, scope_stack)
+        variable = scope[slot]
+        if variable['type'] != 'int' or type(variable['val']) is not int:
+            return None
+        return variable['val']
+
+    def run_counted_loop(self, node, scope_stack, counter, bound):
+        # Same iterations as run_for_loop: nothing in the body writes the counter or the bound,
+        # so the update is counter + step and the condition compare(counter, bound), both on ints
+        loop = node.counted
+        compare = loop.compare
+        step = loop.step
+        scope, slot = find_slot(loop.var, scope_stack)
+        variable = scope[slot]
+        statements = node.statements
+        nslots = node.nslots
+
+        while True:
+            scope_stack.append( [UNDECLARED] * nslots )
+            signal = None
+            for statement_node in statements:
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
+            scope_stack.pop()
+
+            # return inside the body ends the loop
+            if signal is not None:
+                return signal
+
+            counter += step
+            variable['val'] = counter
+            if not compare(counter, bound):
+                return None
+
 
 
     ''' ---- Overloaded Operation ---- '''
@@ -851,8 +1003,8 @@ class Interpreter(InterpreterBase):
             print("IN OVERLOADED OPERATOR function")
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # print("\n-- In OVERLOADED OPS\tOp1 = ", op1, "\top2 = ", op2)
 
@@ -911,7 +1063,7 @@ class Interpreter(InterpreterBase):
             if (other_var_type != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot assign type of variable { { other_var_type} } of variable \"{node_expression.dict['name']}\" INT variable  (Inside INT_TYPES)"
+                    f"Cannot assign type of variable { { other_var_type} } of variable \"{node_expression.name}\" INT variable  (Inside INT_TYPES)"
                 )
             
             return other_var_val['val']
@@ -926,7 +1078,7 @@ class Interpreter(InterpreterBase):
             if (fcall_ret is None or fcall_ret['type'] != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot use FCALL to \"{node_expression.dict['name']} \" w/ return type { { fcall_ret['type'] }} in INT_TYPES"
+                    f"Cannot use FCALL to \"{node_expression.name} \" w/ return type { { fcall_ret['type'] }} in INT_TYPES"
                 )
             return fcall_ret['val']
         
@@ -951,7 +1103,7 @@ class Interpreter(InterpreterBase):
             if (other_var_type != 'bool' and other_var_type != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot assign type of variable { { other_var_type} } of variable \"{node_expression.dict['name']}\" BOOL variable  (Inside BOOL_TYPES)"
+                    f"Cannot assign type of variable { { other_var_type} } of variable \"{node_expression.name}\" BOOL variable  (Inside BOOL_TYPES)"
                 )
             
             return bool(other_var_val['val'])
@@ -974,12 +1126,12 @@ class Interpreter(InterpreterBase):
             if fcall_ret is None:
                 super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Cannot use FCALL to \"{node_expression.dict['name']} \" w/ return type NONE in BOOL_TYPES"
+                        f"Cannot use FCALL to \"{node_expression.name} \" w/ return type NONE in BOOL_TYPES"
                     )
             if (fcall_ret['type'] != 'bool' and fcall_ret['type'] != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot use FCALL to \"{node_expression.dict['name']} \" w/ return type { { fcall_ret['type'] }} in BOOL_TYPES"
+                    f"Cannot use FCALL to \"{node_expression.name} \" w/ return type { { fcall_ret['type'] }} in BOOL_TYPES"
                 )
             return bool(fcall_ret['val'])
 
@@ -1008,7 +1160,7 @@ class Interpreter(InterpreterBase):
             if (other_var_type != 'string'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot assign type of variable { { other_var_type} } of variable \"{node_expression.dict['name']}\" STRING variable  (Inside STRING_TYPES)"
+                    f"Cannot assign type of variable { { other_var_type} } of variable \"{node_expression.name}\" STRING variable  (Inside STRING_TYPES)"
                 )
         
             return other_var_val['val']
@@ -1019,12 +1171,12 @@ class Interpreter(InterpreterBase):
             if (fcall_ret is None):     # Void function
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot use FCALL to \"{node_expression.dict['name']} \" w/ return type NONE in STRING_TYPES"
+                    f"Cannot use FCALL to \"{node_expression.name} \" w/ return type NONE in STRING_TYPES"
                 )
             if fcall_ret['type'] != 'string':
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot use FCALL to \"{node_expression.dict['name']} \" w/ return type { { fcall_ret['type'] }} in STRING_TYPES"
+                    f"Cannot use FCALL to \"{node_expression.name} \" w/ return type { { fcall_ret['type'] }} in STRING_TYPES"
                 )
             return fcall_ret['val']
         
@@ -1066,7 +1218,7 @@ class Interpreter(InterpreterBase):
             if (return_node_type != 'int'):
                 super().error(
                 ErrorType.TYPE_ERROR,
-                f"Attempted to use string or bool or nil via existing variable {node.dict['name']} in integer operation"
+                f"Attempted to use string or bool or nil via existing variable {node.name} in integer operation"
             )
             
             # otherwise, it is an integer value
@@ -1078,13 +1230,13 @@ class Interpreter(InterpreterBase):
             if (fcall_ret is None):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use NONE via fcall to \" {node.dict['name']} \" in INTEGER operation"
+                    f"Attempted to use NONE via fcall to \" {node.name} \" in INTEGER operation"
                 )
             # Check function returned an integer
             if (fcall_ret['type'] != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use TYPE \"{fcall_ret['type'] }\"  via fcall to \" {node.dict['name']} \" in INTEGER operation"
+                    f"Attempted to use TYPE \"{fcall_ret['type'] }\"  via fcall to \" {node.name} \" in INTEGER operation"
                 )
                 
             return fcall_ret['val']
@@ -1093,17 +1245,17 @@ class Interpreter(InterpreterBase):
         
         # Unary negation
         if node_type == 'neg':
-            op1 = node.dict['op1']
+            op1 = node.op1
             if op1.elem_type not in allowable_types:
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Operand 1 is NOT of an allowable type for integer operation: op1 = {op1}"
                 )
-            return -( self.run_int_operation( node.dict['op1'], func_vars))
+            return -( self.run_int_operation( node.op1, func_vars))
         
         # Operation
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         if op1.elem_type not in allowable_types:
             super().error(
@@ -1143,7 +1295,7 @@ class Interpreter(InterpreterBase):
             if (val_type != 'string'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Incompatible types for STRING operation, attempted to use INTEGER or BOOL (via existing variable {node.dict['name']} value)"
+                    f"Incompatible types for STRING operation, attempted to use INTEGER or BOOL (via existing variable {node.name} value)"
                 )
             # Otherwise, return value
             return val
@@ -1163,21 +1315,21 @@ class Interpreter(InterpreterBase):
             if (fcall_ret is None):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use NONE via fcall to \"{node.dict['name']}\" in STRING operation"
+                    f"Attempted to use NONE via fcall to \"{node.name}\" in STRING operation"
                 )
             # Check function returned a string
             if (fcall_ret['type'] != 'string'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use TYPE \"{fcall_ret['type'] }\"  via fcall to \" {node.dict['name']} \" in STRING operation"
+                    f"Attempted to use TYPE \"{fcall_ret['type'] }\"  via fcall to \" {node.name} \" in STRING operation"
                 )
                 
             return fcall_ret['val']
 
         # String concatenation
         if node_type == '+':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return ( self.run_string_operation(op1, func_vars) + self.run_string_operation(op2, func_vars) )
 
 
@@ -1207,7 +1359,7 @@ class Interpreter(InterpreterBase):
             if (return_node_type != 'bool' and return_node_type != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use string, or nil via existing variable {node.dict['name']} in BOOL operation"
+                    f"Attempted to use string, or nil via existing variable {node.name} in BOOL operation"
                 )
             
             # Return variable value
@@ -1221,13 +1373,13 @@ class Interpreter(InterpreterBase):
             if (fcall_ret is None):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use NONE via fcall to \"{node.dict['name']}\" in BOOL operation"
+                    f"Attempted to use NONE via fcall to \"{node.name}\" in BOOL operation"
                 )
             # Check function returned an integer
             if (fcall_ret['type'] != 'bool' and fcall_ret['type'] != 'int'):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use TYPE \"{fcall_ret['type'] }\"  via fcall to \" {node.dict['name']} \" in BOOL operation"
+                    f"Attempted to use TYPE \"{fcall_ret['type'] }\"  via fcall to \" {node.name} \" in BOOL operation"
                 )
                 
             return bool(fcall_ret['val'])
@@ -1245,16 +1397,16 @@ class Interpreter(InterpreterBase):
         
         # Unary Boolean NOT
         if node_type == '!':
-            op1 = node.dict['op1']
+            op1 = node.op1
             if op1.elem_type not in allowable_types:
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = {op1}"
                 )
-            return not (self.run_bool_operation( node.dict['op1'], func_vars))
+            return not (self.run_bool_operation( node.op1, func_vars))
         
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # If not an allowable boolean operation
         if op1.elem_type not in allowable_types:
@@ -1325,8 +1477,8 @@ class Interpreter(InterpreterBase):
 
     def check_equality(self, node, func_vars):
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1 = self.eval_op(op1, func_vars)
@@ -1365,7 +1517,7 @@ class Interpreter(InterpreterBase):
             if op2_type == 'nil':
                 same = True 
             elif op2_type in self.defined_structs:
-                same = ( type(op2_value) == Element and op2_value.elem_type == 'nil')
+                same = ( isinstance(op2_value, Element) and op2_value.elem_type == 'nil')
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
@@ -1374,7 +1526,7 @@ class Interpreter(InterpreterBase):
         elif op2_type == 'nil':
             # Should already be checked if they're both nil, don't need to check if op1 is nil here
             if op1_type in self.defined_structs:
-                same = (type(op1_value) == Element and op1_value.elem_type == 'nil' )
+                same = (isinstance(op1_value, Element) and op1_value.elem_type == 'nil' )
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
@@ -1383,8 +1535,8 @@ class Interpreter(InterpreterBase):
 
               # Compare structs
         elif (op1_type in self.defined_structs and op2_type in self.defined_structs):
-            op1_nil = ( type(op1_value) == Element and op1_value.elem_type == 'nil' )
-            op2_nil = ( type(op2_value) == Element and op2_value.elem_type == 'nil' )
+            op1_nil = ( isinstance(op1_value, Element) and op1_value.elem_type == 'nil' )
+            op2_nil = ( isinstance(op2_value, Element) and op2_value.elem_type == 'nil' )
 
             same = ( (op1_value == op2_value) or (op1_nil and op2_nil) )
 
@@ -1414,8 +1566,8 @@ class Interpreter(InterpreterBase):
             print("CHECKING EQUALITY: ", node.elem_type)
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.run_int_operation(op1, func_vars)
@@ -1446,24 +1598,23 @@ class Interpreter(InterpreterBase):
 
     # Return value of value nodes
     def get_value(self, node):
-        return node.dict['val']
+        return node.val
     
 
     def get_variable_value(self, node, scope_stack):
         # POSSIBLE PROBLEM CAUSE with structs
         # TODO (structs): might need to return struct_access()['val'] b/c need actual obj ref, not the Object thing that python stores
         
-        var_name = node.dict['name']
+        var_name = node.name
         # Check for struct access
         if ('.' in var_name):
             return self.struct_access(node, scope_stack)
 
         else:
             # Otherwise, look at regular variable names
-            for scope in scope_stack[::-1]:
-                # If variable exists in this scope, this is the value you want to return
-                if var_name in scope:
-                    return scope[var_name]
+            scope, slot = find_slot(node, scope_stack)
+            if scope is not None:
+                return scope[slot]
         
         # If not found in any scope, error
         super().error(
@@ -1472,107 +1623,112 @@ class Interpreter(InterpreterBase):
             )
         
     ''' ---- STRUCT PROCESSING  ---- '''
-    def struct_access(self, node, scope_stack):
-
-        var_access = node.dict['name']
-        parts = var_access.split('.')
-        var_name = parts[0]
-        temp_variable = Element("var")
-        temp_variable.dict['name'] = var_name
-
-        # print("\n--Inside STRUCT ACCESS\tNode = ", node)
-        # print("\tVariable name I'm looking for = ", var_name)
-
-        var_value = self.get_variable_value(temp_variable, scope_stack)     # returns dictionary w/ entry
-
-        # print("\tValue returned from GET_VAR_VALUE = ", var_value)
+    def field_slot(self, node, scope_stack):
+        # (struct, slot) holding the last field of node's a.b.c path
+            # node.field_cache remembers which slot each field was in last time (structshape.py)
+
+        # node's address points at the base variable (resolver.py)
+        scope, slot = find_slot(node, scope_stack)
+        if scope is None:
+            var_name = node.name.split('.')[0]
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"Variable {var_name} has not been declared w/in function scope"
+            )
+        var_value = scope[slot]     # returns dictionary w/ entry
 
         # Check it is a struct
         if (var_value['type'] not in self.defined_structs):
+            var_name = node.name.split('.')[0]
             super().error(
                 ErrorType.TYPE_ERROR,
                 f"Attempted to use dot operator on NON-STRUCT variable { {var_name} } of type \"{var_value['type']}\""
             )
 
-        
-        struct_object_ref = var_value['val']
-        accessing_from = struct_object_ref
-
-        # print("\n\tStruct OBJECT REFERENCE: ", struct_object_ref)
-
-        struct_val_dict = {}
+        cache = node.field_cache
+        shapes = cache.shapes
+        slots = cache.slots
+        accessing_from = var_value['val']
+        struct = None
+        field_slot = 0
 
         # Loop through dot accesses
             # Left-associative: For each access, get the value stored in that field and use that for the next access
-        for field_access in parts[1:]:
-            # print("Currently Accessing from : ", accessing_from)
-            if (type(accessing_from) == Element and accessing_from.elem_type == 'nil'):
-                super().error(
-                    ErrorType.FAULT_ERROR,
-                    f"Attempting to use dot operator on uninitialized struct via field \"{field_access}\""
-                )
+        for step, field_access in enumerate(cache.fields):
             if (type(accessing_from) != self.BrewinStruct):
+                if (isinstance(accessing_from, Element) and accessing_from.elem_type == 'nil'):
+                    super().error(
+                        ErrorType.FAULT_ERROR,
+                        f"Attempting to use dot operator on uninitialized struct via field \"{field_access}\""
+                    )
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Attempted to use dot operator on NON-STRUCT variable { {field_access} } of type \"{type(accessing_from)}\""
                 )
 
-            all_fields = accessing_from.get_fields()
-            if (field_access not in all_fields):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"Field \"{field_access}\" isn't defined for struct { {var_name} }"
-                )
-            struct_val_dict = all_fields[field_access]
-            # struct_val_dict = accessing_from.get_field(field_access)
-            # print("\tAfter calling 'get_field', this is what was returned\n\t", struct_val_dict)
-            returned_value = struct_val_dict['val']
-            accessing_from = returned_value
+            shape = accessing_from.shape
+            if (shape is shapes[step]):
+                field_slot = slots[step]
+            else:
+                field_slot = shape.index.get(field_access)
+                if (field_slot is None):
+                    var_name = node.name.split('.')[0]
+                    super().error(
+                        ErrorType.NAME_ERROR,
+                        f"Field \"{field_access}\" isn't defined for struct { {var_name} }"
+                    )
+                shapes[step] = shape
+                slots[step] = field_slot
+            struct = accessing_from
+            accessing_from = struct.values[field_slot]
 
-        # print("\n-- Returning from STRUCT ACCESS: ", struct_val_dict)
-        return struct_val_dict
+        return struct, field_slot
+
+    def struct_access(self, node, scope_stack):
+        # {'type', 'val'} of the field node's a.b.c path ends at
+        struct, field_slot = self.field_slot(node, scope_stack)
+        return {'type': struct.shape.types[field_slot], 'val': struct.values[field_slot]}
 
     def struct_update(self, node, scope_stack):
 
         # For scope_stack updating: need actual variable name, not whole string w/ '.'
-        var_access = node.dict['name']
+        var_access = node.name
         parts = var_access.split('.')
         var_name = parts[0]
 
-        node_dict = node.dict
-
-        scope_to_update = NO_VALUE_DEFINED
 
-        # Traverse stack in reverse order
-        for scope in scope_stack[::-1]:
-            # If variable exists in this scope, this is the one you want to update
-            # ONLY EDIT TOPMOST SCOPE
-            if var_name in scope:
-                scope_to_update = scope
-                break
+        # Scope + slot of the base variable were resolved at load time (resolver.py)
+        scope_to_update, slot = find_slot(node, scope_stack)
 
         # If not found in any scope
-        if scope_to_update is NO_VALUE_DEFINED:
+        if scope_to_update is None:
             super().error(
                 ErrorType.NAME_ERROR,
                 f"Struct variable { {var_name} } not found in any scope"
             )
 
-        if (scope_to_update[var_name]['type'] not in self.defined_structs):
+        if (scope_to_update[slot]['type'] not in self.defined_structs):
             super().error(
                 ErrorType.TYPE_ERROR,
-                f"Attempted to use dot operator on NON-STRUCT variable { {var_name} } of type \"{scope_to_update[var_name]['type']}\""
+                f"Attempted to use dot operator on NON-STRUCT variable { {var_name} } of type \"{scope_to_update[slot]['type']}\""
             )
 
-        # Get the actual object dictionary to update
-        temp_variable = Element("var")
-        temp_variable.dict['name'] = var_access
-        variable_dict_to_update = self.struct_access(temp_variable, scope_stack)
+        # Get the actual struct + slot to update
+        struct, field_slot = self.field_slot(node, scope_stack)
+        field_values = struct.values
 
         # Calculate expression
-        node_expression = node_dict['expression']
+        node_expression = node.expression
         node_type = node_expression.elem_type
-        var_type = variable_dict_to_update['type']
+        var_type = struct.shape.types[field_slot]
+
+        # Expression was proven to fit this field at load time (typecheck.py)
+        if node.checked:
+            new_value = self.eval_checked(node.expression, scope_stack)
+            if (var_type == 'bool'):
+                new_value = bool(new_value)
+            field_values[field_slot] = new_value
+            return
         # print("VAR TYPE: ", var_type)
 
         # print("\n\tPassed in EXPRESSION: ", node_expression)
@@ -1580,7 +1736,7 @@ class Interpreter(InterpreterBase):
         if (node_type == 'string' or node_type == 'int' or node_type == 'bool'):
             if (node_type != var_type):
                 if (var_type == 'bool' and node_type == 'int'):
-                    variable_dict_to_update['val'] = bool(self.get_value(node_expression))
+                    field_values[field_slot] = bool(self.get_value(node_expression))
                 else:
                     super().error(
                         ErrorType.TYPE_ERROR,
@@ -1588,7 +1744,7 @@ class Interpreter(InterpreterBase):
                     )
             else:
                 # Update actual dictionary entry
-                variable_dict_to_update['val'] = self.get_value(node_expression)
+                field_values[field_slot] = self.get_value(node_expression)
 
 
         elif node_type == 'var':
@@ -1598,14 +1754,14 @@ class Interpreter(InterpreterBase):
             # Check that this variable is of the right type
             if (other_var_type != var_type):
                 if (var_type == 'bool' and other_var_type == 'int'):
-                    variable_dict_to_update['val'] = bool(other_var_val['val'])
+                    field_values[field_slot] = bool(other_var_val['val'])
                 else:
                     super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Cannot assign type of variable  { { other_var_type} } of variable \"{node_expression.dict['name']}\" to variable \"{var_access}\" of type { {var_type} }"
+                        f"Cannot assign type of variable  { { other_var_type} } of variable \"{node_expression.name}\" to variable \"{var_access}\" of type { {var_type} }"
                     )
             else:
-                variable_dict_to_update['val'] = other_var_val['val']
+                field_values[field_slot] = other_var_val['val']
 
         elif node_type == 'fcall':
             fcall_ret = self.run_fcall(node_expression, scope_stack)
@@ -1616,24 +1772,24 @@ class Interpreter(InterpreterBase):
                     )
             if (fcall_ret['type'] != var_type):
                 if (var_type == 'bool' and fcall_ret['type'] == 'int'):
-                    variable_dict_to_update['val'] = bool(fcall_ret['val'])
+                    field_values[field_slot] = bool(fcall_ret['val'])
                 else:
                     super().error(
                         ErrorType.TYPE_ERROR,
                         f"Cannot assign fcall return value of type  { { fcall_ret['val']} } to variable \"{var_name}\" of type { {var_type} }"
                     )
             else:
-                variable_dict_to_update['val'] = fcall_ret['val']
+                field_values[field_slot] = fcall_ret['val']
 
         # If not another var, constant, or function call - check all allowable operations for this type
         elif (var_type == 'int'):
-            variable_dict_to_update['val'] = self.int_types(node_expression, scope_stack)
+            field_values[field_slot] = self.int_types(node_expression, scope_stack)
         
         elif (var_type == 'string'):
-            variable_dict_to_update['val'] = self.string_types(node_expression, scope_stack)
+            field_values[field_slot] = self.string_types(node_expression, scope_stack)
         
         elif (var_type == 'bool'):
-            variable_dict_to_update['val'] = self.bool_types(node_expression, scope_stack)
+            field_values[field_slot] = self.bool_types(node_expression, scope_stack)
 
         # Nil value
         elif (node_type == 'nil'):
@@ -1642,17 +1798,17 @@ class Interpreter(InterpreterBase):
                     ErrorType.TYPE_ERROR,
                     f"Cannot assign non-struct variable \"{var_name}\" to NIL value"
                 )
-            variable_dict_to_update['val'] = Element("nil")
+            field_values[field_slot] = Element("nil")
 
         elif (node_type == 'new'):
-            struct_type = node_expression.dict['var_type']
+            struct_type = node_expression.var_type
             if (struct_type != var_type):
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Cannot assign non-struct variable \"{var_access}\" to STRUCT of type { {struct_type} } value"
                 )
             struct_OR = self.BrewinStruct(self, node_expression)
-            variable_dict_to_update['val'] = struct_OR
+            field_values[field_slot] = struct_OR
         else:
             super().error(
                     ErrorType.TYPE_ERROR,
@@ -1661,12 +1817,92 @@ class Interpreter(InterpreterBase):
         
 
     
+    ''' ---- Evaluating expressions proven type-safe (typecheck.py) ---- '''
+    def eval_checked(self, node, scope_stack):
+        # Value of an expression whose whole subtree passed the type checker: no type checks needed
+        node_type = node.elem_type
+
+        if node_type == 'var':
+            if ('.' in node.name):
+                # Can still be a FAULT_ERROR (nil struct), field_slot raises it
+                struct, field_slot = self.field_slot(node, scope_stack)
+                return struct.values[field_slot]
+            scope, slot = find_slot(node, scope_stack)
+            return scope[slot]['val']
+
+        if node_type == 'int' or node_type == 'string' or node_type == 'bool':
+            return node.val
+
+        if node_type == 'fcall':
+            return self.run_fcall(node, scope_stack)['val']
+
+        # Arithmetic (+ is also string concatenation)
+        if node_type == '+':
+            if node.eval_twice:
+                # overloaded_operator evaluates both operands once just to find their types
+                self.eval_checked(node.op1, scope_stack)
+                self.eval_checked(node.op2, scope_stack)
+            return self.eval_checked(node.op1, scope_stack) + self.eval_checked(node.op2, scope_stack)
+        if node_type == '-':
+            return self.eval_checked(node.op1, scope_stack) - self.eval_checked(node.op2, scope_stack)
+        if node_type == '*':
+            return self.eval_checked(node.op1, scope_stack) * self.eval_checked(node.op2, scope_stack)
+        if node_type == '/':
+            return self.eval_checked(node.op1, scope_stack) // self.eval_checked(node.op2, scope_stack)
+        if node_type == 'neg':
+            return -( self.eval_checked(node.op1, scope_stack) )
+
+        # Integer comparisons
+        if node_type == '<':
+            return self.eval_checked(node.op1, scope_stack) < self.eval_checked(node.op2, scope_stack)
+        if node_type == '<=':
+            return self.eval_checked(node.op1, scope_stack) <= self.eval_checked(node.op2, scope_stack)
+        if node_type == '>':
+            return self.eval_checked(node.op1, scope_stack) > self.eval_checked(node.op2, scope_stack)
+        if node_type == '>=':
+            return self.eval_checked(node.op1, scope_stack) >= self.eval_checked(node.op2, scope_stack)
+
+        # Equality: node.compare_as says how check_equality would compare these operand types
+        if node_type == '==' or node_type == '!=':
+            op1_value = self.eval_checked(node.op1, scope_stack)
+            op2_value = self.eval_checked(node.op2, scope_stack)
+            compare_as = node.compare_as
+            if compare_as == 'value':
+                same = (op1_value == op2_value)
+            elif compare_as == 'bool':
+                same = (bool(op1_value) == bool(op2_value))
+            elif compare_as == 'struct':
+                # Same object, or both nil
+                same = (op1_value is op2_value) or (isinstance(op1_value, Element) and isinstance(op2_value, Element))
+            else:
+                same = False
+            if node_type == '==':
+                return same
+            return not same
+
+        # Boolean operations (no short-circuiting, same as run_bool_operation)
+        if node_type == '&&':
+            op1_value = bool(self.eval_checked(node.op1, scope_stack))
+            op2_value = bool(self.eval_checked(node.op2, scope_stack))
+            return op1_value and op2_value
+        if node_type == '||':
+            op1_value = bool(self.eval_checked(node.op1, scope_stack))
+            op2_value = bool(self.eval_checked(node.op2, scope_stack))
+            return op1_value or op2_value
+        if node_type == '!':
+            return not self.eval_checked(node.op1, scope_stack)
+
+        if node_type == 'nil':
+            return Element("nil")
+        if node_type == 'new':
+            return self.BrewinStruct(self, node)
+
     ''' ---- INPUTI function ---- '''
     def inputi(self, prompt=[]):
         if (prompt == []):
             user_input = super().get_input()
         else:
-            prompt_string = prompt[0].dict['val']
+            prompt_string = prompt[0].val
             super().output(prompt_string)
             user_input = super().get_input()
 
@@ -1677,7 +1913,7 @@ class Interpreter(InterpreterBase):
         if (prompt == []):
             user_input = super().get_input()
         else:
-            prompt_string = prompt[0].dict['val']
+            prompt_string = prompt[0].val
             super().output(prompt_string)
             user_input = super().get_input()
 
@@ -1695,15 +1931,15 @@ class Interpreter(InterpreterBase):
                 print("\t", element)
             node_type = element.elem_type
             if node_type == 'string':
-                string_to_output += element.dict['val']
+                string_to_output += element.val
             elif node_type == 'bool':
-                result = element.dict['val']
+                result = element.val
                 if result is True:
                     string_to_output += "true"
                 if result is False:
                     string_to_output += "false"
             elif node_type == 'int':
-                string_to_output += str(element.dict['val'])
+                string_to_output += str(element.val)
             # # If variable, retrieve variable value
             elif node_type == 'var':
                 # will raise error if variable hasn't been defined
@@ -1749,7 +1985,7 @@ class Interpreter(InterpreterBase):
                 if (fcall_ret is None):
                     super().error(
                         ErrorType.TYPE_ERROR,
-                        f"Cannot print NONE return type from function \"{element.dict['name']}\""
+                        f"Cannot print NONE return type from function \"{element.name}\""
                     )
                 fcall_ret_val = fcall_ret['val']
                 if fcall_ret['type'] == 'bool':
@@ -1760,5 +1996,23 @@ class Interpreter(InterpreterBase):
                 else:
                     string_to_output += str(fcall_ret_val)
 
+        super().output(string_to_output)
+        return None
+
+    # printout() for arguments the type checker proved (typecheck.py)
+    def print_checked(self, func_vars, lst):
+        string_to_output = ""
+        for element in lst:
+            # nil / new arguments print nothing (and aren't evaluated)
+            if element.elem_type == 'nil' or element.elem_type == 'new':
+                continue
+            val = self.eval_checked(element, func_vars)
+            if val is True:
+                string_to_output += "true"
+            elif val is False:
+                string_to_output += "false"
+            else:
+                string_to_output += str(val)
+
         super().output(string_to_output)
         return None
\ No newline at end of file
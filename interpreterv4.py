@@ -1,21 +1,32 @@
-from brewparse import parse_program
+from astcache import parse_program
+from resolver import resolve_program, find_slot, UNDECLARED
+from environment import new_scope, annotate_program, capture, lookup_captured, NO_BINDINGS
+from strictness import analyze_program
+from linker import build_function_table, link_program
+from optimizer import optimize_program
+from countedloop import annotate_loops
+from profiler import Profiler
+import stackeval
 from intbase import *
-from element import Element
+from element import Element, ValueNode
 import copy
 
-# Custom exception class to catch return values
-class ReturnValue(Exception):
+# Completion signal for return statements: run_statement hands it back up to run_func (no exception unwinding)
+class ReturnValue():
     def __init__(self, return_value):
         self.return_value = return_value
 
+# Brewin exceptions: returned from run_statement as a completion signal inside a function,
+#   only raised as a real Python exception to cross into the calling function
 class BrewinException(Exception):
     def __init__(self, type):
         self.exception_type = type
 
 class Expression():
-    def __init__(self, expression, program_state):
+    def __init__(self, expression, program_state, leading=None):
         self.expression = expression
         self.program_state = program_state 
+        self.leading = leading      # var node forced first when this is evaluated (environment.leading_var), or None
 
     def __str__(self):
         print("\n+Expression: \t", self.expression)
@@ -23,6 +34,7 @@ class Expression():
 
 
 NO_VALUE_DEFINED = object()
+STRICT_VALUE_TYPES = (int, str, bool)     # what a strict binding holds instead of an Expression
 
 class Interpreter(InterpreterBase):
     defined_functions = {}      # should map function name to list of func nodes (for overloading)
@@ -33,9 +45,19 @@ class Interpreter(InterpreterBase):
     INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
     OVERLOADED_OPERATIONS = ['+']
    
-    def __init__(self, console_output=True, inp=None, trace_output=False):
+    def __init__(self, console_output=True, inp=None, trace_output=False, explicit_stack=False, profile=False, optimize=True):
         super().__init__(console_output, inp)   # call InterpreterBase's constructor
         self.trace_output = trace_output
+        self.explicit_stack = explicit_stack    # run on a heap-allocated frame stack (stackeval.py) so deep recursion doesn't hit Python's limit
+        self.optimize = optimize                # optimizer passes to run first (optimizer.py): True = all, False = none, or a list of names
+        self.optimizations = {}
+        self.inlined_calls = []                 # (calling function, called function) of every call the optimizer inlined
+
+        # Per-function call counts / timings (profiler.py), only hooked into run_func when asked for
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler()
+            self.run_func = self.profiler.wrap(self.run_func)
 
     ''' ---- RUN PROGRAM ---- '''
     def run(self, program):
@@ -46,6 +68,8 @@ class Interpreter(InterpreterBase):
             self.program_vars = map to hold variables + their values
         '''
         self.ast = parse_program(program)
+        # Annotate variables with (depth, slot) addresses so scopes can be plain arrays
+        resolve_program(self.ast)
 
         ''' ---- Find Main Node ---- '''
         # Check program validity
@@ -58,15 +82,15 @@ class Interpreter(InterpreterBase):
         
         # Search through program functions to find the MAIN node
         main_node = NO_VALUE_DEFINED
-        for func in self.ast.dict['functions']:
+        for func in self.ast.functions:
             # Loop through all provided functions, add to dictionary of defined functions
-            func_name = func.dict['name']
+            func_name = func.name
             if func_name not in self.defined_functions:
                 self.defined_functions[func_name] = []
             self.defined_functions[func_name].append(func)
             
             # Identify main_node to run aftter
-            if (func.dict['name'] == 'main'):
+            if (func.name == 'main'):
                 main_node = func
         if (main_node is NO_VALUE_DEFINED):
             super().error(
@@ -74,8 +98,29 @@ class Interpreter(InterpreterBase):
                 "No MAIN node found in program"
             )
         
+        # Bind every call site to its builtin handler / (name, arity) overload once, up front
+        self.function_table = build_function_table(self.ast.functions)
+        link_program(self.ast, self.function_table, self.builtin_funcs())
+
+        # Inlining / constant propagation / folding (optimizer.py): returns how many rewrites each pass made
+            # (trace_output: leave the program as written, the trace follows it node by node)
+        self.optimizations = {}
+        self.inlined_calls = []
+        if self.optimize and not self.trace_output:
+            self.optimizations = optimize_program(self.ast, '4', None if self.optimize is True else self.optimize, self.inlined_calls)
+
+        # Counted for loops (countedloop.py): after their first condition check they run on a plain int
+        annotate_loops(self.ast)
+
+        # Record which variables each thunk can read, so it only captures those (environment.py)
+        annotate_program(self.ast)
+        # Mark assignments / params that are forced right away, they're evaluated on the spot (strictness.py)
+        analyze_program(self.ast)
+
         # Run MAIN node
         try:
+            if self.explicit_stack:
+                return stackeval.call(self, 'run_func', main_node, [])
             return self.run_func(main_node, [])
         except BrewinException as exception:
             super().error(
@@ -83,66 +128,55 @@ class Interpreter(InterpreterBase):
                 f"Error of type { {exception.exception_type} } was never caught in program"
             )
 
-    def check_builtin_funcs(self, func_node, scope_stack):
-        node_dict = func_node.dict
-        func_name = node_dict['name']
+    ''' ---- Builtin functions (bound to fcall nodes at load time, see linker.py) ---- '''
+    def builtin_inputi(self, func_node, scope_stack):
+        if (len (func_node.args) > 1):
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"No inputi() function found that takes more than 1 parameter"
+            )
+        return self.inputi(scope_stack, func_node.args)
 
-        ''' PRINT + INPTUTI + INPUTS handling'''
-        # Separate handling for: PRINT, INPUTI
-        if func_name == 'inputi':
-            if (len (node_dict['args']) > 1):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"No inputi() function found that takes more than 1 parameter"
-                )
-            return self.inputi(scope_stack, node_dict['args'])
-        
-        if func_name == 'inputs':
-            if (len (node_dict['args']) > 1):
-                super().error(
-                    ErrorType.NAME_ERROR,
-                    f"No inputs() function found that takes more than 1 parameter"
-                )
-            return self.inputs(scope_stack, node_dict['args'])
-        
-        if func_name == 'print':
-            return self.printout(scope_stack, node_dict['args'])
-        ''' END OF SEPARATE HANDLING '''
+    def builtin_inputs(self, func_node, scope_stack):
+        if (len (func_node.args) > 1):
+            super().error(
+                ErrorType.NAME_ERROR,
+                f"No inputs() function found that takes more than 1 parameter"
+            )
+        return self.inputs(scope_stack, func_node.args)
 
-        return NO_VALUE_DEFINED
+    def builtin_print(self, func_node, scope_stack):
+        return self.printout(scope_stack, func_node.args)
+
+    def builtin_funcs(self):
+        return {
+            'inputi': self.builtin_inputi,
+            'inputs': self.builtin_inputs,
+            'print': self.builtin_print,
+        }
 
 
     ''' ---- HANDLE fcall ---- '''
     def run_fcall(self, func_node, calling_func_vars):
         # calling_func_vars = variables defined by the calling function (where the statement was)
-        node_dict = func_node.dict
-        func_name = node_dict['name']
-        func_args = node_dict['args']   # arguments passed into the function call
-
+        func_name = func_node.name
+        func_args = func_node.args   # arguments passed into the function call
 
-        # Check if Print, Inputi, or Inputs
-        builtin = self.check_builtin_funcs(func_node, calling_func_vars)
-        if builtin is not NO_VALUE_DEFINED:
-            return builtin
 
+        # Print, Inputi, or Inputs (bound by linker.py)
+        if func_node.builtin is not None:
+            return func_node.builtin(func_node, calling_func_vars)
 
-        # For all other function calls: 
-        if (func_name not in self.defined_functions):
-            super().error(
-                ErrorType.NAME_ERROR,
-                f"Function {func_name} was not found / defined ",
-            )
 
-        # Based on the provided number of arguments in the function call
-            # Identify the correct (possibly overloaded) function definition to run
-        func_to_run = NO_VALUE_DEFINED
-        defined_funcs_found = self.defined_functions[func_name]
-        for func in defined_funcs_found:
-            args = func.dict['args']
-            if len(func_args) == len ( args ):
-                func_to_run = func
+        # For all other function calls: overload with matching number of args was linked at load time
+        func_to_run = func_node.target
+        if (func_to_run is None):
+            if (func_name not in self.defined_functions):
+                super().error(
+                    ErrorType.NAME_ERROR,
+                    f"Function {func_name} was not found / defined ",
+                )
 
-        if (func_to_run is NO_VALUE_DEFINED):
             # Wrong number of arguments for this function
             super().error(
                 ErrorType.NAME_ERROR, 
@@ -151,17 +185,17 @@ class Interpreter(InterpreterBase):
 
         func_arg_objs = []
 
-        for arg in func_args:
-            new_scope_stack = []
-            for scope in calling_func_vars:
-                new_scope = {}
-                for var in scope:
-                    new_scope[var] = scope[var]     # Point this new variable value at the old one
-                new_scope_stack.append(new_scope)
-
-            expr_object = Expression(arg, new_scope_stack)
+        # Every argument shares one environment holding just the variables the arguments read (environment.py)
+        new_scope_stack = capture(func_node.free, calling_func_vars)
+        for arg, leading in zip(func_args, func_node.leading):
+            expr_object = Expression(arg, new_scope_stack, leading)
             func_arg_objs.append(expr_object)
 
+        # The callee forces this param before doing anything else: pass the value itself
+        strict_param = func_to_run.strict_param
+        if strict_param is not None:
+            func_arg_objs[strict_param] = self.evaluate_strict(func_args[strict_param], calling_func_vars)
+
 
         return self.run_func( func_to_run , func_arg_objs )
 
@@ -175,32 +209,32 @@ class Interpreter(InterpreterBase):
                 "Non-function node passed into run_func"
             )
 
-        # Create dictionary to hold variables local to this function
+        # Create scope (array indexed by resolver slots) to hold variables local to this function
         scope_stack = []
-        func_vars = {}
+        func_vars = new_scope(func_node.nslots)
         
-        node_dict = func_node.dict
-        node_params = node_dict['args']
+        node_params = func_node.args
 
         # Map argument values to the parameter names
-        for var_name, expr_object in zip(node_params, func_args):
-            func_vars[var_name.dict['name']] = expr_object
+        for param, expr_object in zip(node_params, func_args):
+            func_vars[param.slot] = expr_object
 
         # Base parameter:argument pairs are the ENCLOSING environment defined variables
         scope_stack.append( func_vars )
 
         # Loop through function statements in order
-        for statement_node in node_dict['statements']:
+        for statement_node in func_node.statements:
             # Run each statement
-            try:
-                self.run_statement(statement_node, scope_stack)
-            # If RETURN is found, should throw an exception
-            except ReturnValue as rval:
-                # Remove all added scopes from inside function
-                while (len(scope_stack) > 1):
-                    scope_stack.pop()
+            signal = self.run_statement(statement_node, scope_stack)
+            if signal is None:
+                continue
 
-                return rval.return_value         # Returns an Expression instance
+            # Uncaught raise: leave this function as a real exception so the caller's try blocks see it
+            if type(signal) is BrewinException:
+                raise signal
+
+            # If RETURN is found, run_statement hands back its ReturnValue
+            return signal.return_value         # Returns an Expression instance
 
         # If exit list of statements without reaching a return statement, return NIL
         return Expression(Element("nil"), scope_stack)
@@ -219,56 +253,64 @@ class Interpreter(InterpreterBase):
             case 'fcall':
                 self.run_fcall(statement_node, func_vars)
             case 'if':
-                self.evaluate_if(statement_node, func_vars)
+                return self.evaluate_if(statement_node, func_vars)
             case 'for':
-                self.run_for_loop(statement_node, func_vars)
+                return self.run_for_loop(statement_node, func_vars)
             case 'try':
-                new_scope = {}
-                func_vars.append( new_scope )
-                for st in statement_node.dict['statements']:
+                try_depth = len(func_vars)
+                func_vars.append( new_scope(statement_node.nslots) )
+                signal = None
+                for st in statement_node.statements:
                     try:
-                        self.run_statement(st, func_vars)
+                        signal = self.run_statement(st, func_vars)
                     except BrewinException as excpt:
-                        func_vars.pop()
-                        
-                        exception_type = excpt.exception_type
-                        
-                        for catcher in statement_node.dict['catchers']:
-                            catcher_type = catcher.dict['exception_type']
-                            if (catcher_type == exception_type):
-                                # Run statements in catcher
-                                for statement in catcher.dict['statements']:
-                                    self.run_statement(statement, func_vars)
-                                return                                          # TODO: put a real return value or something I can check other times I'm calling run_statemnet
-                            
-                        raise BrewinException(exception_type)
+                        # Raised from inside an expression or a called function
+                        signal = excpt
+                    if signal is not None:
+                        break
+
+                # Finished normally or returned
+                if type(signal) is not BrewinException:
+                    func_vars.pop()
+                    return signal
+
+                # Pop the try scope + any if/for scopes the exception escaped from
+                del func_vars[try_depth:]
+                
+                exception_type = signal.exception_type
+                
+                for catcher in statement_node.catchers:
+                    catcher_type = catcher.exception_type
+                    if (catcher_type == exception_type):
+                        # Run statements in catcher
+                        for statement in catcher.statements:
+                            signal = self.run_statement(statement, func_vars)
+                            if signal is not None:
+                                return signal
+                        return None
                     
-                func_vars.pop()
+                # Not caught here: pass it on to the enclosing try (or out of the function)
+                return BrewinException(exception_type)
                 
             case 'raise':
-                exception_type = self.evaluate_expression(statement_node.dict['exception_type'], func_vars)       # Get actual string value
+                exception_type = self.evaluate_expression(statement_node.exception_type, func_vars)       # Get actual string value
                 if ( type(exception_type) is not str):
                     super().error(
                         ErrorType.TYPE_ERROR,
                         f"Attempted to raise NON-STRING { {exception_type} } in raise statement"
                     )
-                raise BrewinException(exception_type)            
+                return BrewinException(exception_type)            
             
             case 'return':
-                return_expression = statement_node.dict['expression']
+                return_expression = statement_node.expression
                 if (return_expression == None or return_expression == 'nil'):
                     return_expression = Element("nil")
 
-                new_scope_stack = []
-                for scope in func_vars:
-                    new_scope = {}
-                    for var in scope:
-                        new_scope[var] = scope[var]     # Point this new variable value at the old one
-                    new_scope_stack.append(new_scope)
+                new_scope_stack = capture(statement_node.free, func_vars)       # Only the variables it reads
                 
                 expr_object = Expression(return_expression, new_scope_stack)
 
-                raise ReturnValue(expr_object)
+                return ReturnValue(expr_object)
 
             case _:
                 super().error(
@@ -318,20 +360,67 @@ class Interpreter(InterpreterBase):
 
     def evaluate_var(self, node, scope_stack):
         
-        var_name = node.dict['name']
+        var_name = node.name
 
-        expr_object = self.get_variable_assignment(node, scope_stack)       # Always returns an expression class instance
-        if type(expr_object) is not Expression:
+        expr_object = self.get_variable_assignment(node, scope_stack)       # Expression instance, or the value of a strict binding
+        if type(expr_object) is not Expression and type(expr_object) not in STRICT_VALUE_TYPES:
             super().error(
                 ErrorType.TYPE_ERROR,
                 f" MY ERRR -- Non-expression node returned from get_var_assignmnet, must've missed a dictionary assignment somewhere"
             )
 
+        # Strict binding: the slot holds the value itself
+        if type(expr_object) in STRICT_VALUE_TYPES:
+            return expr_object
+
+        # Already forced (or a constant): skip straight to the cached value
+        if type(expr_object.expression) is ValueNode:
+            return expr_object.expression.val
+
+        # Force the thunks this one is waiting on first (innermost first), so each link only recurses one level
+        if expr_object.leading is not None:
+            self.force_chain(expr_object)
+
+        return self.force_thunk(expr_object)
+
+    def force_chain(self, expr_object):
+        # Follow leading vars down the chain (x = x + 1 in a loop -> one thunk per iteration)
+        #   Each link forces its leading var before anything observable, so forcing the chain bottom-up
+        #   prints / raises in exactly the same order as the nested recursion would
+        chain = []
+        leading = expr_object.leading
+        program_state = expr_object.program_state
+        while leading is not None:
+            dependency = lookup_captured(leading, program_state)
+            if type(dependency) is not Expression or type(dependency.expression) is ValueNode:
+                break
+            chain.append(dependency)
+            leading = dependency.leading
+            program_state = dependency.program_state
+
+        for dependency in reversed(chain):
+            self.force_thunk(dependency)
+
+    def force_thunk(self, expr_object):
+        # Evaluate a thunk + cache its value in place (every variable holding it sees the value from now on)
         var_expression = expr_object.expression
         program_state = expr_object.program_state
 
         actual_value = self.evaluate_expression(var_expression, program_state)
 
+        expr_object.expression = self.value_element(actual_value)
+        expr_object.program_state = NO_BINDINGS     # Value is cached, drop the captured variables so they can be freed
+
+        return actual_value
+
+    def evaluate_strict(self, node_expression, scope_stack):
+        # Evaluate a strict binding now instead of building a thunk (strictness.py)
+        actual_value = self.evaluate_expression(node_expression, scope_stack)
+        if type(actual_value) not in STRICT_VALUE_TYPES:
+            self.value_element(actual_value)        # Fails the same way forcing the thunk would have
+        return actual_value
+
+    def value_element(self, actual_value):
         if (actual_value is True or actual_value is False):
             value_type = 'bool'
         elif (type(actual_value) == int):
@@ -340,61 +429,43 @@ class Interpreter(InterpreterBase):
             value_type = 'string'
 
         value_element = Element(value_type)
-        value_element.dict['val'] = actual_value
-
-        expr_object.expression = value_element
-
-        return actual_value
+        value_element.val = actual_value
+        return value_element
 
 
     ''' ---- Running Statement Types ---- '''
     # VARDEF
     def run_vardef(self, node, scope_stack):
-        var_name = node.dict['name']
+        var_name = node.name
 
         # Retrieves top-most scope (within inner-most block)
         latest_scope = scope_stack[-1]
 
         # Check if variable has already been defined in this scope
-        if var_name in latest_scope:
+        if latest_scope[node.slot] is not UNDECLARED:
             super().error(
                 ErrorType.NAME_ERROR,
                 f"Variable {var_name} defined more than once"
             )
         
         default_element = Element('string')
-        default_element.dict['val'] = "DIS IS THE INITIAL VARIABLE VALUE"
-
-        new_scope_stack = []
-        for scope in scope_stack:
-            new_scope = {}
-            for var in scope:
-                # print("Var = ", var, "\t Scope [var] = ", scope[var])
-                new_scope[var] = scope[var]     # Point this new variable value at the old one
-            new_scope_stack.append(new_scope)
+        default_element.val = "DIS IS THE INITIAL VARIABLE VALUE"
 
-        expr_object = Expression(default_element, new_scope_stack)
+        expr_object = Expression(default_element, NO_BINDINGS)     # Constant, reads no variables
 
         # Add new variable to func_vars           Initial value: None
-        latest_scope[var_name] = expr_object
+        latest_scope[node.slot] = expr_object
 
 
     ''' ---- Variable Assignment ---- '''
     def run_assign(self, node, scope_stack):
-        node_dict = node.dict
-        var_name = node_dict['name']
+        var_name = node.name
 
-        scope_to_update = NO_VALUE_DEFINED
-
-        # Traverse stack in reverse order
-        for scope in scope_stack[::-1]:
-            # If variable exists in this scope, this is the one you want to update
-            if var_name in scope:
-                scope_to_update = scope
-                break
+        # Scope + slot were resolved at load time (resolver.py)
+        scope_to_update, slot = find_slot(node, scope_stack)
 
         # If not found in any scope
-        if scope_to_update is NO_VALUE_DEFINED:
+        if scope_to_update is None:
             super().error(
                 ErrorType.NAME_ERROR,
                 f"Variable { {var_name} } not found in any scope"
@@ -402,20 +473,18 @@ class Interpreter(InterpreterBase):
 
 
         # Calculate expression
-        node_expression = node_dict['expression']
+        node_expression = node.expression
 
-        new_scope_stack = []
-        for scope in scope_stack:
-            new_scope = {}
-            for var in scope:
-                # print("Var = ", var, "\t Scope [var] = ", scope[var])
-                new_scope[var] = scope[var]     # Point this new variable value at the old one
-            new_scope_stack.append(new_scope)
+        # Forced right after this statement anyway (strictness.py): store the value, no thunk
+        if node.strict:
+            scope_to_update[slot] = self.evaluate_strict(node_expression, scope_stack)
+            return
 
+        new_scope_stack = capture(node.free, scope_stack)      # Only the variables the expression reads
 
-        expr_object = Expression(node_expression, new_scope_stack)
+        expr_object = Expression(node_expression, new_scope_stack, node.leading)
 
-        scope_to_update[var_name] = expr_object
+        scope_to_update[slot] = expr_object
 
 
     ''' ---- If Statement ---- '''
@@ -442,7 +511,7 @@ class Interpreter(InterpreterBase):
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted (via existing variable {condition.dict['name']} value)"
+                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted (via existing variable {condition.name} value)"
                 )
 
         # If fcall
@@ -457,7 +526,7 @@ class Interpreter(InterpreterBase):
             else:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted via fcall to {condition.dict['name']}"
+                    f"Cannot evaluate STRING or INT (or nil?) in 'if' statement condition, attempted via fcall to {condition.name}"
                 )
 
         elif (condition_type in self.EQUALITY_COMPARISONS):
@@ -476,35 +545,41 @@ class Interpreter(InterpreterBase):
 
     def evaluate_if(self, node, scope_stack):
 
-        new_scope = {}
-        scope_stack.append( new_scope )
+        scope_stack.append( new_scope(node.nslots) )
 
-        condition = node.dict['condition']
-        statements = node.dict['statements']
-        else_statements = node.dict['else_statements']
+        condition = node.condition
+        statements = node.statements
+        else_statements = node.else_statements
 
         eval_condition = self.check_condition(condition, scope_stack)
 
+        # signal = ReturnValue / BrewinException from a statement in the branch, None if it finished normally
+        signal = None
         if (eval_condition):
             # Loop through function statements in order
             for statement_node in statements:
-                self.run_statement( statement_node , scope_stack)
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
         else:
             if else_statements != None:
                 for statement_node in else_statements:
-                    self.run_statement( statement_node, scope_stack)
+                    signal = self.run_statement( statement_node, scope_stack)
+                    if signal is not None:
+                        break
 
         # Pop off new scope's variables
             # yup pop off
         scope_stack.pop()
+        return signal
         
     ''' --- For Loop ---- '''
     def run_for_loop(self, node, scope_stack):
 
-        initialize = node.dict['init']
-        condition = node.dict['condition']
-        update = node.dict['update']
-        statements = node.dict['statements']
+        initialize = node.init
+        condition = node.condition
+        update = node.update
+        statements = node.statements
 
         # Initialize counter variable in variable dictionary
         self.run_assign(initialize, scope_stack)
@@ -512,34 +587,86 @@ class Interpreter(InterpreterBase):
         # Check condition is true to begin with
         eval_condition = self.check_condition(condition, scope_stack)
 
+        # for (i = a; i < b; i = i + c) (countedloop.py): the rest can run on a plain int if i + b are ints
+        if eval_condition and node.counted is not None:
+            counter = self.counted_value(node.counted.var, scope_stack)
+            bound = self.counted_value(node.counted.bound, scope_stack)
+            if counter is not None and bound is not None:
+                return self.run_counted_loop(node, scope_stack, counter, bound)
+
         # While condition is true, execute statements
         while (eval_condition):
             # Initialize new scope for this loop iteration
-            new_scope = {}
-            scope_stack.append( new_scope )
+            scope_stack.append( new_scope(node.nslots) )
 
 
             # Loop through function statements in order
+            signal = None
             for statement_node in statements:
-                self.run_statement( statement_node , scope_stack)
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
 
             # Pop off new scope's variables when done running statements
             scope_stack.pop()
 
+            # return (or raise) inside the body ends the loop
+            if signal is not None:
+                return signal
+
             # Update counter variable value
             self.run_assign(update, scope_stack)
 
             # Check condition again
             eval_condition = self.check_condition(condition, scope_stack)
 
+    def counted_value(self, node, scope_stack):
+        # Int held by a counted loop's counter / bound (already forced by the first condition check), else None
+        if node.elem_type == 'int':
+            return node.val
+        scope, slot = find_slot(node, scope_stack)
+        value = scope[slot]
+        if type(value) is Expression and type(value.expression) is ValueNode:
+            value = value.expression.val
+        return value if type(value) is int else None
+
+    def run_counted_loop(self, node, scope_stack, counter, bound):
+        # Same iterations as run_for_loop: nothing in the body writes the counter or the bound,
+        # so the update is counter + step and the condition compare(counter, bound), both on ints
+        #   (the counter is stored as a strict binding: the update's thunk would be forced by the condition right away)
+        loop = node.counted
+        compare = loop.compare
+        step = loop.step
+        scope, slot = find_slot(loop.var, scope_stack)
+        statements = node.statements
+        nslots = node.nslots
+
+        while True:
+            scope_stack.append( new_scope(nslots) )
+            signal = None
+            for statement_node in statements:
+                signal = self.run_statement( statement_node , scope_stack)
+                if signal is not None:
+                    break
+            scope_stack.pop()
+
+            # return (or raise) inside the body ends the loop
+            if signal is not None:
+                return signal
+
+            counter += step
+            scope[slot] = counter
+            if not compare(counter, bound):
+                return None
+
 
 
     ''' ---- Overloaded Operation ---- '''
     def overloaded_operator(self, node, func_vars):
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.eval_op(op1, func_vars)
@@ -560,22 +687,22 @@ class Interpreter(InterpreterBase):
             # '+' is defined for INT and STRING
             if type(op1_value) == int:
                 op1_element = Element('int')
-                op1_element.dict['val'] = op1_value
+                op1_element.val = op1_value
                 op2_element = Element('int')
-                op2_element.dict['val'] = op2_value
+                op2_element.val = op2_value
 
-                operation_element.dict['op1'] = op1_element
-                operation_element.dict['op2'] = op2_element
+                operation_element.op1 = op1_element
+                operation_element.op2 = op2_element
                 
                 return self.run_int_operation(operation_element, func_vars)
             if type(op1_value) == str:
                 op1_element = Element('string')
-                op1_element.dict['val'] = op1_value
+                op1_element.val = op1_value
                 op2_element = Element('string')
-                op2_element.dict['val'] = op2_value
+                op2_element.val = op2_value
 
-                operation_element.dict['op1'] = op1_element
-                operation_element.dict['op2'] = op2_element
+                operation_element.op1 = op1_element
+                operation_element.op2 = op2_element
 
                 return self.run_string_operation(operation_element, func_vars)
             else:
@@ -608,7 +735,7 @@ class Interpreter(InterpreterBase):
             if not (isinstance(node_value, int)) or node_value is True or node_value is False:
                 super().error(
                 ErrorType.TYPE_ERROR,
-                f"Attempted to use string or bool or nil via existing variable {node.dict['name']} in integer operation"
+                f"Attempted to use string or bool or nil via existing variable {node.name} in integer operation"
             )
             
             # otherwise, it is an integer value
@@ -633,17 +760,17 @@ class Interpreter(InterpreterBase):
         
         # Unary negation
         if node_type == 'neg':
-            op1 = node.dict['op1']
+            op1 = node.op1
             if op1.elem_type not in allowable_types:
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Operand 1 is NOT of an allowable type for integer operation: op1 = {op1}"
                 )
-            return -( self.run_int_operation( node.dict['op1'], func_vars))
+            return -( self.run_int_operation( node.op1, func_vars))
         
         # Operation
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         if op1.elem_type not in allowable_types:
             super().error(
@@ -692,13 +819,13 @@ class Interpreter(InterpreterBase):
             if (isinstance( val , int)):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Incompatible types for STRING operation, attempted to use INTEGER (via existing variable {node.dict['name']} value)"
+                    f"Incompatible types for STRING operation, attempted to use INTEGER (via existing variable {node.name} value)"
                 )
 
             if ( val is True or val is False):
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Incompatible types for STRING operation, attempted to use BOOLEAN (via existing variable {node.dict['name']} value)"
+                    f"Incompatible types for STRING operation, attempted to use BOOLEAN (via existing variable {node.name} value)"
                 )
             # Otherwise, return value
             return val
@@ -715,8 +842,8 @@ class Interpreter(InterpreterBase):
 
         # String concatenation
         if node_type == '+':
-            op1 = node.dict['op1']
-            op2 = node.dict['op2']
+            op1 = node.op1
+            op2 = node.op2
             return ( self.run_string_operation(op1, func_vars) + self.run_string_operation(op2, func_vars) )
 
 
@@ -743,7 +870,7 @@ class Interpreter(InterpreterBase):
             if node_value is not True and node_value is not False:
                 super().error(
                     ErrorType.TYPE_ERROR,
-                    f"Attempted to use int, string, or nil via existing variable {node.dict['name']} in BOOL operation"
+                    f"Attempted to use int, string, or nil via existing variable {node.name} in BOOL operation"
                 )
             
             # Return variable value
@@ -775,16 +902,16 @@ class Interpreter(InterpreterBase):
         
         # Unary Boolean NOT
         if node_type == '!':
-            op1 = node.dict['op1']
+            op1 = node.op1
             if op1.elem_type not in allowable_types:
                 super().error(
                     ErrorType.TYPE_ERROR,
                     f"Operand 1 is NOT of an allowable type for BOOL operation: op1 = {op1}"
                 )
-            return not (self.run_bool_operation( node.dict['op1'], func_vars))
+            return not (self.run_bool_operation( node.op1, func_vars))
         
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # If not an allowable boolean operation
         if op1.elem_type not in allowable_types:
@@ -824,7 +951,7 @@ class Interpreter(InterpreterBase):
             returned_expression = fcall_ret.expression
             program_state = fcall_ret.program_state
             actual_value = self.evaluate_expression(returned_expression, program_state)
-            if (type(actual_value) == Element and actual_value.elem_type == 'nil'):
+            if (isinstance(actual_value, Element) and actual_value.elem_type == 'nil'):
                 actual_value = 'nil'
             return actual_value
         
@@ -852,8 +979,8 @@ class Interpreter(InterpreterBase):
     def check_equality(self, node, func_vars):   
         
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.eval_op(op1, func_vars)
@@ -906,8 +1033,8 @@ class Interpreter(InterpreterBase):
     def integer_compare(self, node, func_vars):
 
         node_type = node.elem_type
-        op1 = node.dict['op1']
-        op2 = node.dict['op2']
+        op1 = node.op1
+        op2 = node.op2
 
         # Get operator values 
         op1_value = self.run_int_operation(op1, func_vars)
@@ -932,16 +1059,22 @@ class Interpreter(InterpreterBase):
 
     # Return value of value nodes
     def get_value(self, node):
-        return node.dict['val']
+        return node.val
     
 
     def get_variable_assignment(self, node, scope_stack):
         
-        var_name = node.dict['name']
-        for scope in scope_stack[::-1]:
-            # If variable exists in this scope, this is the value you want to return
-            if var_name in scope:
-                return scope[var_name]
+        var_name = node.name
+
+        # Forcing a thunk: look in the variables it captured
+        if type(scope_stack) is dict:
+            expr_object = lookup_captured(node, scope_stack)
+            if expr_object is not None:
+                return expr_object
+        else:
+            scope, slot = find_slot(node, scope_stack)
+            if scope is not None:
+                return scope[slot]
         
         # If not found in any scope, error
         super().error(
@@ -963,16 +1096,9 @@ class Interpreter(InterpreterBase):
 
         result = int(user_input)
         result_elem = Element('int')
-        result_elem.dict['val'] = result
-        
-        new_scope_stack = []
-        for scope in scope_stack:
-            new_scope = {}
-            for var in scope:
-                new_scope[var] = scope[var]     # Point this new variable value at the old one
-            new_scope_stack.append(new_scope)
+        result_elem.val = result
         
-        expr_object = Expression(result_elem, new_scope_stack)
+        expr_object = Expression(result_elem, NO_BINDINGS)     # Constant, reads no variables
 
         return expr_object
 
@@ -989,16 +1115,9 @@ class Interpreter(InterpreterBase):
 
         result = str(user_input)
         result_elem = Element('string')
-        result_elem.dict['val'] = result
-
-        new_scope_stack = []
-        for scope in scope_stack:
-            new_scope = {}
-            for var in scope:
-                new_scope[var] = scope[var]     # Point this new variable value at the old one
-            new_scope_stack.append(new_scope)
-        
-        expr_object = Expression(result_elem, new_scope_stack)
+        result_elem.val = result
+
+        expr_object = Expression(result_elem, NO_BINDINGS)     # Constant, reads no variables
 
         return expr_object
 
@@ -1010,15 +1129,15 @@ class Interpreter(InterpreterBase):
         for element in lst:
             node_type = element.elem_type
             if node_type == 'string':
-                string_to_output += element.dict['val']
+                string_to_output += element.val
             elif node_type == 'bool':
-                result = element.dict['val']
+                result = element.val
                 if result is True:
                     string_to_output += "true"
                 if result is False:
                     string_to_output += "false"
             elif node_type == 'int':
-                string_to_output += str(element.dict['val'])
+                string_to_output += str(element.val)
             # # If variable, retrieve variable value
             elif node_type == 'var':
                 val = self.evaluate_var(element, func_vars)
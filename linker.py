@@ -0,0 +1,39 @@
+from element import Element
+
+# Load-time call-site linking for the v2/v3/v4 interpreters
+#   build_function_table() maps (name, arity) -> func node, so overload lookup is one dict probe
+#   link_program() then binds every fcall node in the program once:
+#       .builtin -> handler(func_node, scope_stack) for print / inputi / inputs, else None
+#       .target  -> the func node to run, or None if no function has that name + number of args
+#   Builtins are bound first, same as the old check_builtin_funcs() order
+#   Unlinked calls still raise their NAME_ERROR when they're reached, so output before the call is unchanged
+
+
+def build_function_table(functions):
+    function_table = {}
+    for func in functions:
+        # Later definitions with the same number of params win (same as the old linear scan)
+        function_table[(func.name, len(func.args))] = func
+    return function_table
+
+
+# Every fcall node under node (statements, expressions, call arguments)
+def iter_fcalls(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from iter_fcalls(item)
+    elif isinstance(node, Element):
+        if node.elem_type == 'fcall':
+            yield node
+        for key in node.keys():
+            yield from iter_fcalls(getattr(node, key))
+
+
+# exported function: bind each call site to its builtin handler or func node
+def link_program(ast, function_table, builtin_funcs):
+    for func in ast.functions:
+        for fcall in iter_fcalls(func.statements):
+            builtin = builtin_funcs.get(fcall.name)
+            fcall.builtin = builtin
+            fcall.target = None if builtin is not None else function_table.get((fcall.name, len(fcall.args)))
+    return ast
@@ -0,0 +1,1363 @@
+from element import Element
+from linker import iter_fcalls
+from resolver import Resolver, resolve_program
+from typecheck import TypeChecker
+
+# Load-time AST optimizer for the v2/v3/v4 interpreters
+#   optimize_program() runs once after linking (linker.py), before anything else looks at the expressions
+#   PASSES lists every pass in the order they run, the whole list is repeated until nothing changes:
+#       inline    -> calls to functions whose body is just `return <expression>;` become that expression
+#       propagate -> reads of a variable that is assigned a constant exactly once become that constant
+#       fold      -> +, -, *, /, neg, comparisons, == and != on constants become one constant
+#       bool      -> !, && and || with constant operands are simplified (true && e -> e, ...)
+#       hoist     -> operations a for loop would compute the same way every time are computed once before it
+#       cse       -> values a run of statements computes more than once (a.b.c, pure calls, ...) are computed once
+#       dead      -> unreachable statements, unread variables and constant-condition ifs are removed
+#   Any of them can be turned off (Interpreter(optimize=...)) to benchmark them one at a time
+#
+#   A rewrite can't change what the program prints or raises. The evaluators don't treat an operation and
+#   the constant it gives the same way everywhere (v2's eval_op returns None for <, v3's eval_op types a '+'
+#   as "<class 'int'>", v2's bool ops reject comparisons, ...), so every expression is only rewritten where
+#   the node that uses it would treat the constant exactly like it (CONTEXTS below)
+#   Division by 0 is never folded: it still raises at runtime (div0 in v4, ZeroDivisionError before that)
+
+INT_OPERATIONS = ['-', '*', '/', 'neg']
+INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
+EQUALITY_COMPARISONS = ['==', '!=']
+BOOL_OPERATIONS = ['!', '||', '&&']
+UNARY_OPERATIONS = ['neg', '!']
+CONSTANT_TYPES = ['int', 'string', 'bool']
+BUILTIN_INPUTS = ['inputi', 'inputs']
+
+# v4's run_bool_operation accepts these operands (checked before either one is evaluated)
+V4_BOOL_OPERANDS = ['bool', 'var', 'fcall'] + BOOL_OPERATIONS + EQUALITY_COMPARISONS + INTEGER_COMPARISONS
+
+# Context an operator evaluates its operands in
+OPERAND_CONTEXT = {'+': 'plus', '==': 'value', '!=': 'value'}
+for _op in INT_OPERATIONS + INTEGER_COMPARISONS:
+    OPERAND_CONTEXT[_op] = 'int'
+for _op in BOOL_OPERATIONS:
+    OPERAND_CONTEXT[_op] = 'bool'
+
+
+def context_of_operands(version, node_type, context):
+    # Context a node_type node evaluated in context evaluates its operands in
+    #   v2's run_bool_operation doesn't evaluate a comparison that is one of its operands: it only checks the
+    #   comparison's operand node types (bool / var / fcall / bool op / comparison), then gives None
+    if version == '2' and context == 'bool' and node_type in INTEGER_COMPARISONS + EQUALITY_COMPARISONS:
+        return 'compare_bool'
+    return OPERAND_CONTEXT[node_type]
+
+# Kinds of expression: operation with an int / string / bool result
+#   sum    -> '+' on ints       concat   -> '+' on strings
+#   arith  -> - * / neg         compare  -> < <= > >=
+#   logic  -> ! && ||           equality -> == !=
+ALL_KINDS = {'arith', 'sum', 'concat', 'compare', 'equality', 'logic'}
+BOOL_KINDS = {'compare', 'equality', 'logic'}
+
+# version -> context -> (kinds of operation that can become their constant, types of constant a var can become)
+#   int        operand of - * / neg < <= > >=        (run_int_operation / integer_compare)
+#   plus       operand of +                          (overloaded_operator, or run_int_operation / v3 run_string_operation
+#                                                    straight away: their operand type checks run before either is evaluated)
+#   value      operand of == !=, v4 raise / inputi   (eval_op / evaluate_expression)
+#   bool       operand of ! && ||                    (run_bool_operation)
+#   compare_bool  v2 operand of a comparison that is an operand of ! && ||  (node type checked, never evaluated)
+#   condition  if / for condition                    (check_condition)
+#   store      assigned, returned, printed or passed to a user function
+#   struct_arg v3 argument for a struct parameter    (operations are passed on unevaluated)
+#   raw        v2/v3 inputi / inputs prompt          (read straight off the node, or an unknown v3 function)
+CONTEXTS = {
+    '2': {
+        'int': ({'arith', 'sum'}, {'int'}),
+        'plus': ({'arith', 'sum'}, {'int'}),
+        'value': ({'arith', 'sum', 'concat', 'equality', 'logic'}, {'int', 'string', 'bool'}),
+        'bool': ({'logic'}, {'bool'}),
+        'compare_bool': ({'compare', 'equality', 'logic'}, {'bool'}),
+        'condition': ({'compare', 'equality', 'logic'}, {'bool'}),
+        'store': (ALL_KINDS, {'int', 'string', 'bool'}),
+        'raw': (set(), set()),
+    },
+    '3': {
+        'int': ({'arith', 'sum'}, {'int'}),
+        'plus': (set(), {'int'}),
+        'value': ({'arith', 'compare', 'equality', 'logic'}, {'int', 'string', 'bool'}),
+        'bool': ({'arith', 'sum', 'compare', 'equality', 'logic'}, {'int', 'bool'}),
+        'condition': ({'arith', 'sum', 'compare', 'equality', 'logic'}, {'int', 'bool'}),
+        'store': (ALL_KINDS, {'int', 'string', 'bool'}),
+        'struct_arg': (set(), {'int', 'string', 'bool'}),
+        'raw': (set(), set()),
+    },
+    '4': {
+        'int': ({'arith', 'sum'}, {'int'}),
+        'plus': ({'arith', 'sum'}, {'int'}),
+        'value': (ALL_KINDS, {'int', 'string', 'bool'}),
+        'bool': ({'compare', 'equality', 'logic'}, {'bool'}),
+        'condition': ({'compare', 'equality', 'logic'}, {'bool'}),
+        'store': (ALL_KINDS, {'int', 'string', 'bool'}),
+    },
+}
+
+
+''' ---- Constants ---- '''
+def is_constant(node, *types):
+    return isinstance(node, Element) and node.elem_type in (types or CONSTANT_TYPES)
+
+
+def constant(value):
+    if value is True or value is False:
+        return Element('bool', val=value)
+    if type(value) == int:
+        return Element('int', val=value)
+    return Element('string', val=value)
+
+
+# Kind of operation node is (see ALL_KINDS), None if it isn't one (or is a '+', that depends on its operands)
+def operation_kind(node):
+    node_type = node.elem_type
+    if node_type in INT_OPERATIONS:
+        return 'arith'
+    if node_type in INTEGER_COMPARISONS:
+        return 'compare'
+    if node_type in EQUALITY_COMPARISONS:
+        return 'equality'
+    if node_type in BOOL_OPERATIONS:
+        return 'logic'
+    return None
+
+
+# Kind of a node whose operands are all constants it can be computed from, else None
+def constant_kind(node):
+    node_type = node.elem_type
+    if node_type in UNARY_OPERATIONS:
+        operand_type = 'int' if node_type == 'neg' else 'bool'
+        return operation_kind(node) if is_constant(node.op1, operand_type) else None
+
+    if node_type == '+':
+        for operand_type, kind in (('int', 'sum'), ('string', 'concat')):
+            if is_constant(node.op1, operand_type) and is_constant(node.op2, operand_type):
+                return kind
+        return None
+    if node_type in INT_OPERATIONS or node_type in INTEGER_COMPARISONS:
+        if not (is_constant(node.op1, 'int') and is_constant(node.op2, 'int')):
+            return None
+        # x / 0 has to raise when it runs
+        if node_type == '/' and node.op2.val == 0:
+            return None
+        return operation_kind(node)
+    if node_type in EQUALITY_COMPARISONS:
+        # Mixed types compare differently in every version (v3 coerces int <-> bool), leave those alone
+        if is_constant(node.op1) and is_constant(node.op2) and node.op1.elem_type == node.op2.elem_type:
+            return 'equality'
+        return None
+    if node_type in BOOL_OPERATIONS:
+        if is_constant(node.op1, 'bool') and is_constant(node.op2, 'bool'):
+            return 'logic'
+    return None
+
+
+# Value of a node constant_kind() accepted (same Python operations as the evaluators)
+def compute(node):
+    node_type = node.elem_type
+    if node_type == 'neg':
+        return -node.op1.val
+    if node_type == '!':
+        return not node.op1.val
+
+    op1 = node.op1.val
+    op2 = node.op2.val
+    match node_type:
+        case '+':
+            return op1 + op2
+        case '-':
+            return op1 - op2
+        case '*':
+            return op1 * op2
+        case '/':
+            return op1 // op2
+        case '<':
+            return op1 < op2
+        case '<=':
+            return op1 <= op2
+        case '>':
+            return op1 > op2
+        case '>=':
+            return op1 >= op2
+        case '==':
+            return op1 == op2
+        case '!=':
+            return op1 != op2
+        case '&&':
+            return op1 and op2
+        case '||':
+            return op1 or op2
+
+
+''' ---- Passes ---- '''
+class Pass:
+    # Walks a function's statements + expressions in the order the resolver does,
+    # handing every expression (innermost first) to rewrite() with the context it's evaluated in
+    def __init__(self, version, program):
+        self.version = version
+        self.program = program
+        self.contexts = CONTEXTS[version]
+        self.rewrites = 0
+
+    def foldable(self, kind, context):
+        return kind in self.contexts[context][0]
+
+    def run(self, func_node):
+        self.statements(func_node.statements)
+
+    def statements(self, statements):
+        if statements is None:
+            return
+        for statement_node in statements:
+            self.statement(statement_node)
+
+    def statement(self, node):
+        match node.elem_type:
+            case '=':
+                node.expression = self.expression(node.expression, 'store')
+            case 'fcall':
+                self.call(node)
+            case 'if':
+                node.condition = self.expression(node.condition, 'condition')
+                self.statements(node.statements)
+                self.statements(node.else_statements)
+            case 'for':
+                self.statement(node.init)
+                node.condition = self.expression(node.condition, 'condition')
+                self.statement(node.update)
+                self.statements(node.statements)
+            case 'try':
+                self.statements(node.statements)
+                for catcher in node.catchers:
+                    self.statements(catcher.statements)
+            case 'raise':
+                node.exception_type = self.expression(node.exception_type, 'value')
+            case 'return':
+                node.expression = self.expression(node.expression, 'store')
+
+    def call(self, node):
+        for index, arg in enumerate(node.args):
+            node.args[index] = self.expression(arg, self.argument_context(node, index))
+
+    def argument_context(self, node, index):
+        if node.name == 'print':
+            return 'store'
+        if node.name in BUILTIN_INPUTS:
+            # v2 / v3 print the prompt node's .val as is, v4 evaluates it
+            return 'value' if self.version == '4' else 'raw'
+        if self.version != '3':
+            return 'store'
+        # v3 checks arguments against their parameter's type, operations for a struct parameter aren't evaluated
+        if node.target is None:
+            return 'raw'
+        if node.target.args[index].var_type in CONSTANT_TYPES:
+            return 'store'
+        return 'struct_arg'
+
+    def expression(self, node, context):
+        if not isinstance(node, Element):
+            return node
+        node_type = node.elem_type
+        if node_type == 'fcall':
+            self.call(node)
+        elif node_type in OPERAND_CONTEXT:
+            operand_context = context_of_operands(self.version, node_type, context)
+            node.op1 = self.expression(node.op1, operand_context)
+            if node_type not in UNARY_OPERATIONS:
+                node.op2 = self.expression(node.op2, operand_context)
+        return self.rewrite(node, context)
+
+    # Replacement for node (or node itself) when evaluated in context
+    def rewrite(self, node, context):
+        return node
+
+
+class FoldConstants(Pass):
+    def rewrite(self, node, context):
+        kind = constant_kind(node)
+        if kind is None or kind == 'logic' or not self.foldable(kind, context):
+            return node
+        self.rewrites += 1
+        return constant(compute(node))
+
+
+class SimplifyBooleans(Pass):
+    def rewrite(self, node, context):
+        node_type = node.elem_type
+        if node_type not in BOOL_OPERATIONS or not self.foldable('logic', context):
+            return node
+
+        if constant_kind(node) == 'logic':
+            self.rewrites += 1
+            return constant(compute(node))
+        if node_type == '!':
+            return node
+
+        # true && e, e && true, false || e, e || false -> e
+        #   (e is evaluated either way. Only comparisons + bool ops: as a bool op operand they give
+        #   the same value they give in context, an int operation would get coerced to bool in v3)
+        identity = (node_type == '&&')
+        for op, other in ((node.op1, node.op2), (node.op2, node.op1)):
+            kind = operation_kind(other)
+            if (is_constant(op, 'bool') and op.val is identity and kind in BOOL_KINDS
+                    and self.foldable(kind, 'bool') and self.foldable(kind, context)):
+                self.rewrites += 1
+                return other
+
+        # v4 short-circuits: true || e, false && e never evaluate e (its node type is still checked first)
+        if (self.version == '4' and is_constant(node.op1, 'bool') and node.op1.val is not identity
+                and node.op2.elem_type in V4_BOOL_OPERANDS):
+            self.rewrites += 1
+            return constant(node.op1.val)
+        return node
+
+
+class VariableFinder(Resolver):
+    # Resolves a function again, keying every variable by the (block, slot) it lives in, to find
+    #   the variables declared + assigned exactly once, both straight in the same statement list (propagate)
+    #   the variables nothing reads (dead)
+    def __init__(self):
+        super().__init__()
+        self.keys = {}              # id(vardef / var / = node) -> (block, slot)
+        self.definite = set()       # ids of var / = nodes whose variable is certainly declared when they run
+        self.declared = {}          # (block, slot) -> times a vardef / parameter declares it
+        self.declarations = {}      # (block, slot) -> vardef nodes
+        self.assignments = {}       # (block, slot) -> = nodes
+        self.read = set()           # (block, slot) of every variable something might read
+        self.statement_list = {}    # id(vardef / = node) -> id of the statement list it's directly in
+        self.function_block = None  # block holding the parameters
+        self.bases = {}             # id(a.b.c var / = node) -> (block, slot) of a
+
+    def push_block(self):
+        block = super().push_block()
+        if self.function_block is None:
+            self.function_block = block
+        return block
+
+    def declare(self, name):
+        slot = super().declare(name)
+        key = (self.blocks[-1], slot)
+        self.declared[key] = self.declared.get(key, 0) + 1
+        return slot
+
+    def key(self, node):
+        # Struct fields + variables that might resolve to more than one slot aren't tracked
+        if len(node.addr) != 1:
+            return None
+        depth, slot = node.addr[0]
+        block = self.blocks[-1 - depth]
+        key = (block, slot)
+        if '.' in node.name:
+            self.bases[id(node)] = key
+            return None
+        self.keys[id(node)] = key
+        if block.visible.get(node.name) is True:
+            self.definite.add(id(node))
+        return key
+
+    def reads(self, node):
+        for depth, slot in node.addr:
+            self.read.add((self.blocks[-1 - depth], slot))
+
+    def resolve_statements(self, statements):
+        if statements is None:
+            return
+        for statement_node in statements:
+            self.statement_list[id(statement_node)] = id(statements)
+            self.resolve_statement(statement_node)
+
+    def resolve_statement(self, node):
+        super().resolve_statement(node)
+        if node.elem_type == 'vardef':
+            key = (self.blocks[-1], node.slot)
+            self.keys[id(node)] = key
+            self.declarations.setdefault(key, []).append(node)
+        elif node.elem_type == '=':
+            key = self.key(node)
+            self.assignments.setdefault(key, []).append(node)
+            # a.b = ... reads a, an assignment that might go to one of several slots keeps all of them
+            if key is None:
+                self.reads(node)
+
+    def resolve_expression(self, node):
+        super().resolve_expression(node)
+        if isinstance(node, Element) and node.elem_type == 'var':
+            self.key(node)
+            self.reads(node)
+
+    def declared_once(self, key):
+        return key is not None and self.declared.get(key) == 1 and len(self.declarations.get(key, [])) == 1
+
+    # id(= node) -> (block, slot) for every assignment whose constant its variable can be replaced with
+    def sources(self):
+        sources = {}
+        for key, assignments in self.assignments.items():
+            if not self.declared_once(key) or len(assignments) != 1:
+                continue
+            assign = assignments[0]
+            in_list = self.statement_list.get(id(assign))
+            if in_list is not None and in_list == self.statement_list.get(id(self.declarations[key][0])):
+                sources[id(assign)] = key
+        return sources
+
+    # (block, slot) of every vardef'd variable nothing reads (its assignments may still have side effects)
+    def unread(self):
+        return [key for key in self.declarations if self.declared_once(key) and key not in self.read]
+
+    # First free number for a new variable: the passes that add variables name them <number>_<purpose>
+    # (a name can't start with a digit in the source, so they can't clash with the program's own)
+    def temporary_number(self):
+        number = 0
+        for declarations in self.declarations.values():
+            name = declarations[0].name
+            if name[0].isdigit():
+                number = max(number, int(name.split('_')[0]) + 1)
+        return number
+
+    # (block, slot) -> declared type (None before v3) of every variable one vardef / parameter of func_node declares
+    def declared_types(self, func_node):
+        var_types = {}
+        for arg in func_node.args:
+            var_types[(self.function_block, arg.slot)] = arg.var_type
+        for key, declarations in self.declarations.items():
+            var_types[key] = declarations[0].get('var_type')
+        for key, count in self.declared.items():
+            if count != 1:
+                var_types.pop(key, None)
+        return var_types
+
+
+class PropagateConstants(Pass):
+    # A read that comes after the assignment in the same statement list (or in a block nested in it)
+    # always sees the constant: nothing else writes the variable, and each run of the list starts a new scope
+    def run(self, func_node):
+        finder = VariableFinder()
+        finder.resolve_func(func_node)
+        self.keys = finder.keys
+        self.sources = finder.sources()
+        self.declared_type = {}
+        for key, declarations in finder.declarations.items():
+            self.declared_type[key] = declarations[0].get('var_type')
+        self.active = {}            # (block, slot) -> constant, while reads of it can be replaced
+        super().run(func_node)
+
+    def statements(self, statements):
+        if statements is None:
+            return
+        started = []
+        for statement_node in statements:
+            self.statement(statement_node)
+            key = self.sources.get(id(statement_node))
+            if key is None:
+                continue
+            value = self.stored_constant(statement_node.expression, self.declared_type[key])
+            if value is not None:
+                self.active[key] = value
+                started.append(key)
+        for key in started:
+            del self.active[key]
+
+    def stored_constant(self, expression, var_type):
+        # The constant a variable holds after being assigned expression, None if it isn't one
+        if not is_constant(expression):
+            return None
+        if self.version != '3' or expression.elem_type == var_type:
+            return expression
+        # v3 variables keep their declared type: int -> bool coercion, anything else is a TYPE_ERROR
+        if var_type == 'bool' and expression.elem_type == 'int':
+            return constant(bool(expression.val))
+        return None
+
+    def rewrite(self, node, context):
+        if node.elem_type != 'var':
+            return node
+        value = self.active.get(self.keys.get(id(node)))
+        if value is None or value.elem_type not in self.contexts[context][1]:
+            return node
+        self.rewrites += 1
+        return constant(value.val)
+
+
+def has_call(node):
+    if not isinstance(node, Element):
+        return False
+    if node.elem_type == 'fcall':
+        return True
+    return has_call(node.get('op1')) or has_call(node.get('op2'))
+
+
+def reads_variable(node):
+    # Operations on constants alone are the fold pass's job
+    if node.elem_type in ('var', 'fcall'):
+        return True
+    return any(reads_variable(operand) for operand in (node.get('op1'), node.get('op2')) if isinstance(operand, Element))
+
+
+def inlinable(node, params, fields):
+    # Only constants, parameters (+ their struct fields) and operations on them: nothing else from the function's scope
+    if not isinstance(node, Element):
+        return False
+    node_type = node.elem_type
+    if node_type in CONSTANT_TYPES:
+        return True
+    if node_type == 'var':
+        base, dot, _ = node.name.partition('.')
+        return base in params and (fields or not dot)
+    if node_type not in OPERAND_CONTEXT:
+        return False
+    if node_type in UNARY_OPERATIONS:
+        return inlinable(node.op1, params, fields)
+    return inlinable(node.op1, params, fields) and inlinable(node.op2, params, fields)
+
+
+class InlineCalls(Pass):
+    # func f(x, y) { return <expression>; } -> f(a, 1) becomes <expression> with a for x and 1 for y
+    #   The expression can only use constants + parameters (no calls, so f can't be recursive), so the only
+    #   locals it has are the parameters, and every one of them is replaced: nothing in it can be captured
+    #   by the caller's variables. Arguments have to be constants or variables:
+    #       v2  the variable has to be declared (run_fcall reads it even if f doesn't)
+    #       v3  it also has to have exactly the parameter's type, constants get the int -> bool coercion,
+    #           and f's return has to type check (typecheck.py) to exactly f's return type
+    #       v4  any variable: the parameter is a thunk of it, forced when f reads it, just like reading it inline
+    #   The call is only replaced where its context treats the expression like the value the call gives (CONTEXTS)
+    #   inlined: (calling function, called function) for every call site replaced
+    def run(self, func_node):
+        finder = VariableFinder()
+        finder.resolve_func(func_node)
+        self.keys = finder.keys
+        self.definite = finder.definite
+        self.var_types = finder.declared_types(func_node)
+        self.func_name = func_node.name
+        self.bodies = {}            # id(func node) -> (expression, result type) or None
+        self.printing = False
+        self.inlined = []
+        super().run(func_node)
+
+    def call(self, node):
+        # v2 prints a call's bool result as True / False, but a bool expression's as true / false
+        printing, self.printing = self.printing, node.name == 'print'
+        super().call(node)
+        self.printing = printing
+
+    def body(self, func_node):
+        if id(func_node) not in self.bodies:
+            self.bodies[id(func_node)] = self.inline_body(func_node)
+        return self.bodies[id(func_node)]
+
+    def inline_body(self, func_node):
+        # (expression, type it evaluates to if known) a call to func_node can become, None if it can't
+        statements = func_node.statements or []
+        if len(statements) != 1 or statements[0].elem_type != 'return':
+            return None
+        expression = statements[0].expression
+        params = [arg.name for arg in func_node.args]
+        # (only v3 has structs, a struct parameter is always passed a variable)
+        if len(set(params)) != len(params) or not inlinable(expression, params, self.version == '3'):
+            return None
+        if expression.elem_type == 'var':
+            return None
+        if self.version != '3':
+            return expression, None
+
+        # run_func checks (+ coerces) the returned value against the return type
+        structs = {struct.name: struct for struct in self.program.get('structs') or []}
+        TypeChecker(structs).check_func(func_node)
+        return_node = statements[0]
+        if not return_node.get('checked') or return_node.value_type != func_node.return_type:
+            return None
+        return expression, return_node.value_type
+
+    def fits(self, expression, value_type, context):
+        # Whether context treats expression like the call's result
+        if is_constant(expression):
+            result_type = expression.elem_type
+            if result_type not in self.contexts[context][1]:
+                return False
+        else:
+            kind = operation_kind(expression)
+            if kind is not None:
+                kinds = {kind}
+            elif value_type is not None:
+                kinds = {'sum' if value_type == 'int' else 'concat'}
+            else:
+                kinds = {'sum', 'concat'}
+            if not all(self.foldable(kind, context) for kind in kinds):
+                return False
+            result_type = 'bool' if kind in BOOL_KINDS else value_type
+        return not (self.version == '2' and self.printing and result_type == 'bool')
+
+    def binding(self, param, arg):
+        # What param is replaced with in the inlined expression, None if arg can't be inlined
+        if is_constant(arg):
+            if self.version != '3' or arg.elem_type == param.var_type:
+                return arg
+            if param.var_type == 'bool' and arg.elem_type == 'int':
+                return constant(bool(arg.val))
+            return None
+        if not isinstance(arg, Element) or arg.elem_type != 'var':
+            return None
+        key = self.keys.get(id(arg))
+        if key is None:
+            return None
+        if self.version != '4' and id(arg) not in self.definite:
+            return None
+        if self.version == '3' and self.var_types.get(key) != param.var_type:
+            return None
+        return arg
+
+    def substitute(self, node, bindings):
+        # Copy of node with every parameter replaced by its binding
+        node_type = node.elem_type
+        if node_type in CONSTANT_TYPES:
+            return constant(node.val)
+        if node_type == 'var':
+            base, dot, path = node.name.partition('.')
+            value = bindings[base]
+            if is_constant(value):
+                return constant(value.val)
+            return Element('var', name=value.name + dot + path, addr=value.addr)
+        if node_type in UNARY_OPERATIONS:
+            return Element(node_type, op1=self.substitute(node.op1, bindings))
+        return Element(node_type, op1=self.substitute(node.op1, bindings), op2=self.substitute(node.op2, bindings))
+
+    def rewrite(self, node, context):
+        if node.elem_type != 'fcall' or node.builtin is not None or node.target is None:
+            return node
+        body = self.body(node.target)
+        if body is None:
+            return node
+        expression, value_type = body
+        if not self.fits(expression, value_type, context):
+            return node
+
+        bindings = {}
+        for param, arg in zip(node.target.args, node.args):
+            value = self.binding(param, arg)
+            if value is None:
+                return node
+            bindings[param.name] = value
+        self.rewrites += 1
+        self.inlined.append((self.func_name, node.name))
+        return self.substitute(expression, bindings)
+
+
+def terminates(node):
+    # Statement never finishes normally, so nothing after it in its statement list can run
+    if node.elem_type in ('return', 'raise'):
+        return True
+    if node.elem_type == 'if' and node.else_statements is not None:
+        return any(map(terminates, node.statements)) and any(map(terminates, node.else_statements))
+    return False
+
+
+def declares(statements):
+    # Whether running statements declares anything in their own scope (catch bodies declare in the enclosing one)
+    for node in statements:
+        if node.elem_type == 'vardef':
+            return True
+        if node.elem_type == 'try' and any(declares(catcher.statements) for catcher in node.catchers):
+            return True
+    return False
+
+
+class EliminateDeadCode(Pass):
+    # Statement lists lose
+    #   statements after a return / raise (or an if whose branches both end in one)
+    #   vardefs of variables nothing reads, along with their assignments, when those can't print / raise
+    #   ifs with a constant condition: the branch that runs takes their place (or stays in an if (true)
+    #   of its own if it declares variables, they'd land in the enclosing scope otherwise)
+    # The blocks change shape, so optimize_program() resolves the program again afterwards
+    def run(self, func_node):
+        finder = VariableFinder()
+        finder.resolve_func(func_node)
+        self.keys = finder.keys
+        self.unused = set()
+        for key in finder.unread():
+            var_type = finder.declarations[key][0].get('var_type')
+            assignments = finder.assignments.get(key, [])
+            if self.removable_vardef(var_type) and all(self.removable_assign(finder, node, var_type) for node in assignments):
+                self.unused.add(key)
+        super().run(func_node)
+
+    def removable_vardef(self, var_type):
+        # v3 vardefs check their type (struct names aren't known here, so only primitives go)
+        return self.version != '3' or var_type in CONSTANT_TYPES
+
+    def removable_assign(self, finder, node, var_type):
+        # Only assignments straight in a statement list (not a for init / update) to a declared variable
+        if id(node) not in finder.statement_list or id(node) not in finder.definite:
+            return False
+        expression = node.expression
+        if has_call(expression):
+            return False
+        # v4 stores a thunk that nothing will ever force
+        if self.version == '4':
+            return True
+        # v2 evaluates the expression right away: only constants + declared variables can't fail
+        if self.version == '2':
+            if expression.elem_type == 'var':
+                return id(expression) in finder.definite
+            return is_constant(expression) or expression.elem_type == 'nil'
+        # v3 also checks the value's type against the variable's
+        return is_constant(expression) and (expression.elem_type == var_type or (var_type == 'bool' and expression.elem_type == 'int'))
+
+    def constant_condition(self, condition):
+        # Branch a constant condition always takes (v3 conditions also accept ints), None if it isn't constant
+        if is_constant(condition, 'bool') or (self.version == '3' and is_constant(condition, 'int')):
+            return bool(condition.val)
+        return None
+
+    def replacement(self, node):
+        # Statements that run in place of node
+        if node.elem_type in ('vardef', '=') and self.keys.get(id(node)) in self.unused:
+            self.rewrites += 1
+            return []
+        if node.elem_type != 'if':
+            return [node]
+
+        taken = self.constant_condition(node.condition)
+        if taken is None:
+            return [node]
+        branch = (node.statements if taken else node.else_statements) or []
+        if not declares(branch):
+            self.rewrites += 1
+            return branch
+        if node.condition.val is not True or node.else_statements is not None:
+            self.rewrites += 1
+            node.condition = constant(True)
+            node.statements = branch
+            node.else_statements = None
+        return [node]
+
+    def statements(self, statements):
+        if statements is None:
+            return
+        kept = []
+        for index, statement_node in enumerate(statements):
+            self.statement(statement_node)
+            replacement = self.replacement(statement_node)
+            for position, node in enumerate(replacement):
+                kept.append(node)
+                if terminates(node):
+                    break
+            else:
+                continue
+            # Unreachable from here on
+            if position + 1 < len(replacement) or index + 1 < len(statements):
+                self.rewrites += 1
+            break
+        statements[:] = kept
+
+
+def iter_statements(statements):
+    # Every statement in statements, nested ones included (a for's init + update count as statements)
+    for node in statements or ():
+        yield node
+        node_type = node.elem_type
+        if node_type == 'if':
+            yield from iter_statements(node.statements)
+            yield from iter_statements(node.else_statements)
+        elif node_type == 'for':
+            yield from iter_statements([node.init, node.update])
+            yield from iter_statements(node.statements)
+        elif node_type == 'try':
+            yield from iter_statements(node.statements)
+            for catcher in node.catchers:
+                yield from iter_statements(catcher.statements)
+
+
+def pure_functions(functions, version):
+    # ids of the func nodes whose calls give the same result every time they get the same arguments:
+    # they can't print or read input (nor call anything that does), and
+    #   v2/v4  always end in a return with a value or a raise (a nil result can't be stored the same way)
+    #   v3     return a primitive (never a struct someone could tell apart) and don't assign struct fields
+    calls = {}
+    for func_node in functions:
+        statements = func_node.statements or []
+        if version == '3':
+            if func_node.return_type not in CONSTANT_TYPES:
+                continue
+            if any(node.elem_type == '=' and '.' in node.name for node in iter_statements(statements)):
+                continue
+        else:
+            if not statements or not terminates(statements[-1]):
+                continue
+            returns = [node for node in iter_statements(statements) if node.elem_type == 'return']
+            if any(node.expression is None or node.expression.elem_type == 'nil' for node in returns):
+                continue
+        calls[id(func_node)] = list(iter_fcalls(statements))
+
+    pure = set(calls)
+    changed = True
+    while changed:
+        changed = False
+        for func_id, fcalls in calls.items():
+            if func_id in pure and any(fcall.builtin is not None or id(fcall.target) not in pure for fcall in fcalls):
+                pure.discard(func_id)
+                changed = True
+    return pure
+
+
+class Loop:
+    # What a for loop writes, for HoistInvariants (the init counts: it runs right before the first condition check)
+    def __init__(self, node, keys, assigned):
+        self.written = set()        # (block, slot) of every variable the loop assigns or declares
+        self.unknown = False        # the loop assigns a variable that might be in one of several slots
+        self.assigned = assigned    # (block, slot) of the variables certainly assigned before the loop starts
+        self.hoisted = []           # vardef + = nodes that go right before the loop
+        for statement_node in iter_statements([node]):
+            if statement_node.elem_type not in ('=', 'vardef'):
+                continue
+            key = keys.get(id(statement_node))
+            if key is not None:
+                self.written.add(key)
+            elif '.' not in statement_node.name:
+                self.unknown = True
+
+
+class HoistInvariants(Pass):
+    # Operations in a for loop's condition, update or body whose variables the loop never assigns are
+    # computed once, into a new variable declared + assigned right before the (outermost such) loop:
+    #   for (i = 0; i < n * 2; i = i + 1) { x = x + (n - 1); }
+    #       -> var 0_invariant; 0_invariant = n * 2; var 1_invariant; 1_invariant = n - 1;
+    #          for (i = 0; i < 0_invariant; i = i + 1) { x = x + 1_invariant; }
+    # Functions can't write their caller's variables, so the = / vardef nodes in the loop are all its definitions
+    #   v2/v3 compute the new variable before the loop even starts: only int arithmetic that can't fail
+    #         (no / by a variable) on int variables moves. v3 variables have their declared type, v2 ones have to be
+    #         vardef'd variables every = gives an int (int constant, inputi(), arithmetic) and that are certainly
+    #         assigned before the loop
+    #   v4    the new variable is a thunk, forced the first time the loop evaluates the expression, then cached:
+    #         any operation moves, and so do calls to functions that can't print or read input (pure_functions)
+    # The blocks change shape, so optimize_program() resolves the program again afterwards
+    def run(self, func_node):
+        finder = VariableFinder()
+        finder.resolve_func(func_node)
+        self.keys = finder.keys
+        self.definite = finder.definite
+        self.var_types = finder.declared_types(func_node)
+        self.ints = self.int_variables(finder) if self.version == '2' else set()
+        self.functions = pure_functions(self.program.functions, self.version) if self.version == '4' else set()
+        self.count = finder.temporary_number()
+        self.loops = []             # Loop of every for the walk is in, outermost first
+        self.hoisted = {}           # id(for node) -> its Loop's hoisted statements
+        self.assigned = set()       # (block, slot) assigned by a = statement before this point
+        super().run(func_node)
+
+    def int_variables(self, finder):
+        # v2: (block, slot) of the vardef'd variables that only ever get ints (a = b; b = a; gives neither: both
+        # could still hold the initial string)
+        candidates = [key for key in finder.declarations if finder.declared_once(key) and key in finder.assignments]
+        ints = set()
+        changed = True
+        while changed:
+            changed = False
+            for key in candidates:
+                if key not in ints and all(self.int_valued(node.expression, ints) for node in finder.assignments[key]):
+                    ints.add(key)
+                    changed = True
+        return ints
+
+    def int_valued(self, node, ints):
+        # Expression that can only give an int (if it gives anything: otherwise nothing is stored)
+        #   - * / neg only run on ints, + only on two values of the same type
+        node_type = node.elem_type
+        if node_type == 'int' or node_type in ('-', '*', '/', 'neg'):
+            return True
+        if node_type == 'var':
+            return self.keys.get(id(node)) in ints
+        if node_type == 'fcall':
+            return node.builtin is not None and node.name == 'inputi'
+        if node_type == '+':
+            return self.int_valued(node.op1, ints) or self.int_valued(node.op2, ints)
+        return False
+
+    def statements(self, statements):
+        if statements is None:
+            return
+        assigned = set(self.assigned)
+        kept = []
+        for statement_node in statements:
+            self.statement(statement_node)
+            kept.extend(self.hoisted.pop(id(statement_node), []))
+            kept.append(statement_node)
+            key = self.keys.get(id(statement_node))
+            if statement_node.elem_type == '=' and key is not None:
+                self.assigned.add(key)
+        statements[:] = kept
+        self.assigned = assigned
+
+    def statement(self, node):
+        if node.elem_type != 'for':
+            super().statement(node)
+            return
+        # The init runs once, before the loop starts (and before anything in it)
+        self.statement(node.init)
+        assigned = self.assigned
+        if self.keys.get(id(node.init)) is not None:
+            self.assigned = assigned | {self.keys[id(node.init)]}
+        loop = Loop(node, self.keys, set(self.assigned))
+        self.loops.append(loop)
+        self.hoisted[id(node)] = loop.hoisted
+        node.condition = self.expression(node.condition, 'condition')
+        self.statement(node.update)
+        self.statements(node.statements)
+        self.loops.pop()
+        self.assigned = assigned
+
+    def expression(self, node, context):
+        # Outermost operation first, so the largest invariant expression moves
+        if self.loops and isinstance(node, Element) and self.fits(node, context) and reads_variable(node):
+            for loop in self.loops:
+                if self.invariant(node, loop):
+                    return self.hoist(node, loop)
+        return super().expression(node, context)
+
+    def fits(self, node, context):
+        # Whether context treats a variable holding node's value like node
+        node_type = node.elem_type
+        if node_type == 'fcall':
+            # (v4's + hands a call operand's value to its string operation unchecked)
+            return node.builtin is None and id(node.target) in self.functions and context != 'plus'
+        if node_type not in OPERAND_CONTEXT:
+            return False
+        if self.version != '4':
+            kind = 'sum' if node_type == '+' else operation_kind(node)
+            return self.foldable(kind, context) and 'int' in self.contexts[context][1]
+        if node_type != '+':
+            return self.foldable(operation_kind(node), context)
+        # n + 1 is an int if it's anything at all
+        kinds = {'sum'} if is_constant(node.op1, 'int') or is_constant(node.op2, 'int') else {'sum', 'concat'}
+        return all(self.foldable(kind, context) for kind in kinds)
+
+    def invariant(self, node, loop):
+        # Whether node gives the same value every time loop evaluates it (v2/v3: and can't fail)
+        if loop.unknown:
+            return False
+        node_type = node.elem_type
+        if node_type == 'var':
+            key = self.keys.get(id(node))
+            if key is None or id(node) not in self.definite or key in loop.written:
+                return False
+            if self.version == '2':
+                return key in self.ints and key in loop.assigned
+            if self.version == '3':
+                return self.var_types.get(key) == 'int'
+            return True
+
+        if self.version != '4':
+            if node_type == 'int':
+                return True
+            if node_type not in ('+', '-', '*', '/', 'neg'):
+                return False
+            # Operand operations have to give an int the operator takes (v3's + rejects a + / - / ... operand)
+            operands = [node.op1] if node_type == 'neg' else [node.op1, node.op2]
+            for operand in operands:
+                kind = 'sum' if operand.elem_type == '+' else operation_kind(operand)
+                if kind is not None and not self.foldable(kind, OPERAND_CONTEXT[node_type]):
+                    return False
+            if node_type == '/' and not (is_constant(node.op2, 'int') and node.op2.val != 0):
+                return False
+            return all(self.invariant(operand, loop) for operand in operands)
+
+        if node_type in CONSTANT_TYPES:
+            return True
+        if node_type == 'fcall':
+            if node.builtin is not None or id(node.target) not in self.functions:
+                return False
+            return all(self.invariant(arg, loop) for arg in node.args)
+        if node_type not in OPERAND_CONTEXT:
+            return False
+        if node_type in UNARY_OPERATIONS:
+            return self.invariant(node.op1, loop)
+        return self.invariant(node.op1, loop) and self.invariant(node.op2, loop)
+
+    def hoist(self, node, loop):
+        name = f"{self.count}_invariant"
+        self.count += 1
+        vardef = Element('vardef', name=name)
+        if self.version == '3':
+            vardef.var_type = 'int'
+        loop.hoisted.extend([vardef, Element('=', name=name, expression=node)])
+        self.rewrites += 1
+        return Element('var', name=name, addr=())
+
+
+# Operand types v2's run_int_operation checks - * / neg operands against before evaluating either one
+V2_INT_OPERANDS = ['int', 'var', 'fcall', '+', '-', '*', '/', 'neg']
+
+
+class Occurrence:
+    # One evaluation of a value ShareSubexpressions numbered
+    def __init__(self, value, node, index, start, end, leads):
+        self.value = value          # value number: same tuple -> same value
+        self.node = node
+        self.index = index          # statement it's in (position in the basic block)
+        self.start = start          # clock when its evaluation starts / ends (nodes inside it fall in between)
+        self.end = end
+        self.leads = leads          # v2/v3: its statement evaluates nothing before it that it depends on to get there
+
+    def covers(self, other):
+        return self.start <= other.start and other.end <= self.end
+
+
+class ShareSubexpressions(Pass):
+    # Common subexpression elimination within basic blocks (runs of = / vardef / call statements, up to and
+    # including an if's condition or a return): a value computed twice is computed once, into a new variable
+    # declared + assigned right before the statement that first computes it:
+    #   x = a.b.c + a.b.c * k;  y = f(x) + f(x);
+    #       -> var 0_common; 0_common = a.b.c; x = 0_common + 0_common * k;
+    #          var 1_common; 1_common = f(x); y = 1_common + 1_common;
+    # Values are numbered in evaluation order: a variable's number changes when it's assigned (or redeclared),
+    # so only occurrences with nothing assigned to what they read in between share one
+    #   v2  calls to pure functions (pure_functions) that are the first thing their = computes
+    #   v3  struct fields, pure calls and operations in type checked statements (eval_checked, typecheck.py).
+    #       A field assignment changes every a.<...>.f.<...> read for that field name f, whatever variable it
+    #       goes through (struct variables alias), and a call that isn't pure might assign any field
+    #   v4  pure calls and operations anywhere: the new variable is a thunk, forced when the first occurrence
+    #       would have been evaluated
+    # v2/v3 compute the new variable before the statement: everything the statement evaluates before the first
+    # occurrence has to be unable to fail (or be shared itself), so nothing that runs moves ahead of an error
+    def run(self, func_node):
+        finder = VariableFinder()
+        finder.resolve_func(func_node)
+        self.keys = finder.keys
+        self.bases = finder.bases
+        self.definite = finder.definite
+        self.var_types = finder.declared_types(func_node)
+        self.functions = pure_functions(self.program.functions, self.version)
+        self.count = finder.temporary_number()
+        if self.version == '3':
+            # Marks the statements eval_checked will run (.checked)
+            structs = {struct.name: struct for struct in self.program.get('structs') or []}
+            checker = TypeChecker(structs)
+            checker.check_func(func_node)
+            self.layouts = checker.layouts
+        super().run(func_node)
+
+    def statements(self, statements):
+        if statements is None:
+            return
+        kept = []
+        block = []
+        for statement_node in statements:
+            node_type = statement_node.elem_type
+            if node_type in ('=', 'vardef', 'fcall'):
+                block.append(statement_node)
+                continue
+            if node_type in ('if', 'return'):
+                block.append(statement_node)
+            kept.extend(self.share(block))
+            if node_type not in ('if', 'return'):
+                kept.append(statement_node)
+            block = []
+            # Nested statement lists are blocks of their own
+            self.statement(statement_node)
+        kept.extend(self.share(block))
+        statements[:] = kept
+
+    ''' ---- Value numbering ---- '''
+    def share(self, block):
+        # block's statements, with the new variables declared + assigned where they go
+        self.versions = {}          # (block, slot) -> times assigned so far
+        self.unknown = 0            # assignments that might have gone to one of several slots
+        self.fields = {}            # v3: field name -> times a field of that name was assigned
+        self.calls = 0              # v3: calls that might have assigned any field
+        self.heap = 0               # v3: both of those
+        self.clock = 0
+        self.occurrences = []
+        self.noisy = []             # (statement index, start, end) of every node that can fail, v2/v3
+        for index, statement_node in enumerate(block):
+            self.index = index
+            self.scan(statement_node)
+
+        groups = {}
+        for occurrence in self.occurrences:
+            groups.setdefault(occurrence.value, []).append(occurrence)
+        # Outermost (earliest starting) first: a shared value's occurrences take the ones inside them along
+        shared = []
+        temporaries = {}            # statement index -> vardef + = nodes that go before it
+        replaced = {}               # id(node) -> name of the variable it becomes
+        for group in sorted(groups.values(), key=lambda group: group[0].start):
+            group = [occurrence for occurrence in group if not any(other.covers(occurrence) for other in shared)]
+            if len(group) < 2:
+                continue
+            first = group[0]
+            if self.version != '4' and not self.computed_first(first, shared):
+                continue
+            shared.extend(group)
+            name = f"{self.count}_common"
+            self.count += 1
+            temporaries.setdefault(first.index, []).extend(self.temporary(name, first.node))
+            for occurrence in group:
+                replaced[id(occurrence.node)] = name
+
+        if not replaced:
+            return block
+        self.rewrites += len(replaced)
+        kept = []
+        for index, statement_node in enumerate(block):
+            kept.extend(temporaries.get(index, []))
+            self.replace(statement_node, replaced)
+            kept.append(statement_node)
+        return kept
+
+    def scan(self, node):
+        # Number the values node computes, in the order it computes them, then what it assigns
+        node_type = node.elem_type
+        # v3 only rewrites statements eval_checked runs: no type checks to tell a variable from an expression
+        rewritable = self.version != '3' or bool(node.get('checked'))
+        if node_type == '=':
+            if self.version == '2':
+                leads = self.keys.get(id(node)) is not None and id(node) in self.definite
+            else:
+                # (struct_update walks the field path before evaluating the expression)
+                leads = '.' not in node.name
+            self.number(node.expression, 'store', rewritable, leads)
+            self.assign(node)
+        elif node_type == 'vardef':
+            key = self.keys[id(node)]
+            self.versions[key] = self.versions.get(key, 0) + 1
+        elif node_type == 'fcall':
+            printing = node.builtin is not None and node.name == 'print'
+            for index, arg in enumerate(node.args):
+                self.number(arg, self.argument_context(node, index), rewritable, self.version == '3', printing)
+            if self.version == '3' and node.builtin is None and id(node.target) not in self.functions:
+                self.calls += 1
+                self.heap += 1
+        elif node_type == 'return':
+            if node.expression is not None:
+                self.number(node.expression, 'store', rewritable, self.version == '3')
+        elif node_type == 'if':
+            self.number(node.condition, 'condition', rewritable, self.version == '3')
+
+    def assign(self, node):
+        if '.' in node.name:
+            field = node.name.split('.')[-1]
+            self.fields[field] = self.fields.get(field, 0) + 1
+            self.heap += 1
+            return
+        key = self.keys.get(id(node))
+        if key is None:
+            self.unknown += 1
+        else:
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def number(self, node, context, rewritable, leads, printed=False):
+        # Value number of node (None if it has none: impure, or reads something untracked)
+        #   leads: nothing before node in its statement stops it from being evaluated first
+        start = self.clock
+        self.clock += 1
+        node_type = node.elem_type
+        value = None
+        if node_type in CONSTANT_TYPES:
+            value = (node_type, node.val)
+        elif node_type == 'var':
+            value = self.variable(node)
+        elif node_type == 'fcall':
+            printing = node.builtin is not None and node.name == 'print'
+            args = []
+            for index, arg in enumerate(node.args):
+                args.append(self.number(arg, self.argument_context(node, index), rewritable, leads and self.version == '3', printing))
+            if node.builtin is None and id(node.target) in self.functions:
+                if None not in args:
+                    value = ('fcall', id(node.target), tuple(args), self.heap)
+            elif self.version == '3' and node.builtin is None:
+                # Might assign any struct field
+                self.calls += 1
+                self.heap += 1
+        elif node_type in OPERAND_CONTEXT:
+            operand_context = context_of_operands(self.version, node_type, context)
+            operand_leads = leads and (self.version != '2' or self.operands_first(node))
+            operands = [self.number(node.op1, operand_context, rewritable, operand_leads)]
+            if node_type not in UNARY_OPERATIONS:
+                operands.append(self.number(node.op2, operand_context, rewritable, operand_leads))
+            if None not in operands:
+                value = (node_type,) + tuple(operands)
+        end = self.clock
+        self.clock += 1
+
+        if rewritable:
+            if self.can_fail(node):
+                self.noisy.append((self.index, start, end))
+            if value is not None and self.shareable(node, context, printed):
+                self.occurrences.append(Occurrence(value, node, self.index, start, end, leads))
+        return value
+
+    def variable(self, node):
+        if '.' not in node.name:
+            key = self.keys.get(id(node))
+            if key is None or id(node) not in self.definite:
+                return None
+            return ('var', key, self.versions.get(key, 0), self.unknown)
+        base = self.bases.get(id(node))
+        if self.version != '3' or base is None:
+            return None
+        path = tuple(node.name.split('.')[1:])
+        fields = tuple(self.fields.get(field, 0) for field in path)
+        return ('field', base, self.versions.get(base, 0), self.unknown, path, fields, self.calls)
+
+    def operands_first(self, node):
+        # v2: whether node's evaluation starts with its operands (run_int_operation checks their node types first)
+        node_type = node.elem_type
+        if node_type == '+':
+            return True
+        if node_type == 'neg':
+            return node.op1.elem_type in V2_INT_OPERANDS
+        if node_type in ('-', '*', '/'):
+            return node.op1.elem_type in V2_INT_OPERANDS and node.op2.elem_type in V2_INT_OPERANDS
+        return False
+
+    def can_fail(self, node):
+        node_type = node.elem_type
+        if self.version == '2':
+            if node_type == 'var':
+                return '.' in node.name or id(node) not in self.definite
+            return node_type not in CONSTANT_TYPES and node_type != 'nil'
+        # v3 checked: nil struct fields, division by 0 + whatever a call does
+        if node_type == 'var':
+            return '.' in node.name
+        if node_type == '/':
+            return not (is_constant(node.op2, 'int') and node.op2.val != 0)
+        return node_type == 'fcall'
+
+    ''' ---- Sharing ---- '''
+    def shareable(self, node, context, printed):
+        # Whether node can become a variable holding its value where it is
+        node_type = node.elem_type
+        if node_type == 'var':
+            # (only v3 numbers struct fields, a prompt is read straight off its node)
+            return '.' in node.name and context != 'raw' and self.value_type(node) is not None
+        if node_type == 'fcall':
+            if self.version == '2':
+                # (v2 prints a call's bool result as True / False, a variable's as true / false)
+                return context in ('int', 'plus') or (context == 'store' and not printed)
+            if self.version == '3':
+                return context not in ('raw', 'struct_arg')
+            # (v4's + hands a call operand's value to its string operation unchecked)
+            return context != 'plus'
+        if self.version == '2' or node_type not in OPERAND_CONTEXT or not reads_variable(node):
+            return False
+
+        if self.version == '3':
+            value_type = self.value_type(node)
+            if value_type is None or value_type not in self.contexts[context][1]:
+                return False
+            kinds = {'sum' if value_type == 'int' else 'concat'} if node_type == '+' else {operation_kind(node)}
+        elif node_type == '+':
+            kinds = {'sum'} if is_constant(node.op1, 'int') or is_constant(node.op2, 'int') else {'sum', 'concat'}
+        else:
+            kinds = {operation_kind(node)}
+        return all(self.foldable(kind, context) for kind in kinds)
+
+    def value_type(self, node):
+        # v3: type of node's value (None if unknown)
+        node_type = node.elem_type
+        if node_type in CONSTANT_TYPES:
+            return node_type
+        if node_type == 'var':
+            if '.' not in node.name:
+                return self.var_types.get(self.keys.get(id(node)))
+            var_type = self.var_types.get(self.bases.get(id(node)))
+            for field in node.name.split('.')[1:]:
+                layout = self.layouts.get(var_type)
+                if layout is None or field not in layout:
+                    return None
+                var_type = layout[field]
+            return var_type
+        if node_type == 'fcall':
+            return node.target.return_type if node.target is not None else None
+        if node_type == '+':
+            value_type = self.value_type(node.op1)
+            return value_type if value_type in ('int', 'string') else None
+        kind = operation_kind(node)
+        if kind == 'arith':
+            return 'int'
+        if kind in BOOL_KINDS:
+            return 'bool'
+        return None
+
+    def computed_first(self, first, shared):
+        # v2/v3: whether first can be computed before its statement runs
+        if not first.leads:
+            return False
+        for index, start, end in self.noisy:
+            if index != first.index or end >= first.start:
+                continue
+            if not any(occurrence.start <= start and end <= occurrence.end for occurrence in shared):
+                return False
+        return True
+
+    def temporary(self, name, expression):
+        vardef = Element('vardef', name=name)
+        if self.version == '3':
+            vardef.var_type = self.value_type(expression)
+        return [vardef, Element('=', name=name, expression=expression)]
+
+    def replace(self, node, replaced):
+        match node.elem_type:
+            case '=':
+                node.expression = self.replaced(node.expression, replaced)
+            case 'fcall':
+                node.args = [self.replaced(arg, replaced) for arg in node.args]
+            case 'return':
+                if node.expression is not None:
+                    node.expression = self.replaced(node.expression, replaced)
+            case 'if':
+                node.condition = self.replaced(node.condition, replaced)
+
+    def replaced(self, node, replaced):
+        if id(node) in replaced:
+            return Element('var', name=replaced[id(node)], addr=())
+        node_type = node.elem_type
+        if node_type == 'fcall':
+            node.args = [self.replaced(arg, replaced) for arg in node.args]
+        elif node_type in OPERAND_CONTEXT:
+            node.op1 = self.replaced(node.op1, replaced)
+            if node_type not in UNARY_OPERATIONS:
+                node.op2 = self.replaced(node.op2, replaced)
+        return node
+
+
+# name -> pass, in the order they run
+PASSES = {
+    'inline': InlineCalls,
+    'propagate': PropagateConstants,
+    'fold': FoldConstants,
+    'bool': SimplifyBooleans,
+    'hoist': HoistInvariants,
+    'cse': ShareSubexpressions,
+    'dead': EliminateDeadCode,
+}
+
+
+# exported function: optimize a resolved + linked program in place, returns the rewrites each pass made
+#   inlined: list to add the (calling function, called function) of every inlined call site to
+def optimize_program(ast, version, passes=None, inlined=None):
+    if passes is None:
+        passes = list(PASSES)
+    for name in passes:
+        if name not in PASSES:
+            raise ValueError(f"Unknown optimizer pass {name!r} (passes: {', '.join(PASSES)})")
+
+    rewrites = {name: 0 for name in PASSES if name in passes}
+    changed = True
+    while changed:
+        changed = False
+        for name in rewrites:
+            for func_node in ast.functions:
+                optimizer_pass = PASSES[name](version, ast)
+                optimizer_pass.run(func_node)
+                if name == 'inline' and inlined is not None:
+                    inlined.extend(optimizer_pass.inlined)
+                if optimizer_pass.rewrites:
+                    rewrites[name] += optimizer_pass.rewrites
+                    changed = True
+
+    # Dead code elimination, hoisting + sharing move statements between blocks, inlined variables are copied from another spot:
+    # redo the (depth, slot) addresses
+    if any(rewrites.get(name) for name in ('inline', 'hoist', 'cse', 'dead')):
+        resolve_program(ast)
+    return rewrites
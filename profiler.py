@@ -0,0 +1,136 @@
+import json
+import marshal
+import time
+
+# Per-function profiler for Brewin programs (v2/v3/v4 Interpreter(profile=True))
+#   Records, for each user function (name + number of params, so overloads are kept apart):
+#       calls, inclusive + exclusive wall time, max recursion depth
+#   Inclusive time is only added when the outermost active call of a function returns,
+#   so recursive functions aren't counted once per level (same rule as cProfile's cumulative time)
+#
+#   When profiling is off nothing is installed at all: the interpreter only swaps in
+#   Profiler.wrap(run_func) when it's constructed with profile=True
+#   Note v4 is lazy: a call only covers the work done before its result thunk is returned,
+#   forcing the thunk later is charged to whichever function forces it
+
+PSTATS_FILENAME = "<brewin>"
+
+
+class FunctionStats:
+    __slots__ = ("name", "arity", "calls", "primitive_calls", "inclusive_time", "exclusive_time",
+                 "max_depth", "depth", "callers")
+
+    def __init__(self, name, arity):
+        self.name = name
+        self.arity = arity
+        self.calls = 0
+        self.primitive_calls = 0        # calls that weren't already inside this function (non-recursive)
+        self.inclusive_time = 0.0
+        self.exclusive_time = 0.0
+        self.max_depth = 0
+        self.depth = 0                  # active calls right now
+        self.callers = {}               # caller FunctionStats (None = the interpreter) -> [calls, primitive calls, exclusive, inclusive]
+
+    @property
+    def label(self):
+        return f"{self.name}/{self.arity}"
+
+
+class Profiler:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.functions = {}     # (name, arity) -> FunctionStats
+        self.active = []        # [stats, caller stats, start time, time spent in callees] per running call
+
+    ''' ---- Recording ---- '''
+    def enter(self, name, arity):
+        key = (name, arity)
+        stats = self.functions.get(key)
+        if stats is None:
+            stats = self.functions[key] = FunctionStats(name, arity)
+
+        stats.calls += 1
+        stats.depth += 1
+        if stats.depth == 1:
+            stats.primitive_calls += 1
+        if stats.depth > stats.max_depth:
+            stats.max_depth = stats.depth
+
+        caller = self.active[-1][0] if self.active else None
+        self.active.append([stats, caller, self.clock(), 0.0])
+
+    def exit(self):
+        stats, caller, start, callee_time = self.active.pop()
+        elapsed = self.clock() - start
+        exclusive = elapsed - callee_time
+        outermost = stats.depth == 1
+
+        stats.depth -= 1
+        stats.exclusive_time += exclusive
+        if outermost:
+            stats.inclusive_time += elapsed
+        if self.active:
+            self.active[-1][3] += elapsed
+
+        edge = stats.callers.get(caller)
+        if edge is None:
+            edge = stats.callers[caller] = [0, 0, 0.0, 0.0]
+        edge[0] += 1
+        edge[2] += exclusive
+        if outermost:
+            edge[1] += 1
+            edge[3] += elapsed
+
+    def unwind(self):
+        # Close calls left open by an error so the partial profile is still consistent
+        while self.active:
+            self.exit()
+
+    def wrap(self, run_func):
+        def profiled_run_func(func_node, func_args):
+            self.enter(func_node.name, len(func_node.args))
+            try:
+                return run_func(func_node, func_args)
+            finally:
+                self.exit()
+        return profiled_run_func
+
+    ''' ---- Reports ---- '''
+    def report(self):
+        return {
+            stats.label: {
+                "name": stats.name,
+                "arity": stats.arity,
+                "calls": stats.calls,
+                "inclusive_time": stats.inclusive_time,
+                "exclusive_time": stats.exclusive_time,
+                "max_depth": stats.max_depth,
+            }
+            for stats in sorted(self.functions.values(), key=lambda s: s.inclusive_time, reverse=True)
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+    # pstats compatibility: pstats.Stats(profiler) calls create_stats() and reads .stats, like cProfile.Profile
+    def pstats_key(self, stats):
+        if stats is None:
+            return ("~", 0, "<interpreter>")
+        return (PSTATS_FILENAME, 0, stats.label)
+
+    def create_stats(self):
+        self.stats = {}
+        for stats in self.functions.values():
+            callers = {self.pstats_key(caller): tuple(edge) for caller, edge in stats.callers.items()}
+            self.stats[self.pstats_key(stats)] = (
+                stats.primitive_calls, stats.calls, stats.exclusive_time, stats.inclusive_time, callers
+            )
+
+    def dump_stats(self, file):
+        self.create_stats()
+        with open(file, "wb") as f:
+            marshal.dump(self.stats, f)
+
+    def print_stats(self, sort="cumulative"):
+        import pstats
+        pstats.Stats(self).strip_dirs().sort_stats(sort).print_stats()
@@ -0,0 +1,153 @@
+from element import Element
+
+# Load-time lexical addressing for the v2/v3/v4 interpreters
+#   Every block (function body, if, for body, try) gets an array-backed scope at runtime instead of a dict
+#   resolve_program() walks each function once and annotates:
+#       vardef / arg nodes  -> .slot   (index into the innermost scope)
+#       var / = nodes       -> .addr   ((depth, slot) pairs, innermost first -- almost always exactly one)
+#       func / if / for / try nodes -> .nslots (size of the scope that node pushes)
+#   depth counts scopes up from the innermost one, so a lookup is just scope_stack[-1 - depth][slot]
+#
+#   Slots that haven't been declared yet hold UNDECLARED, so the usual runtime NAME_ERRORs still fire
+#   A reference only gets more than one (depth, slot) pair when a declaration might not have run
+#   (v4 catch bodies declare into the enclosing scope), then the lookup falls back outward like the old dict walk
+
+UNDECLARED = object()
+
+
+class Block:
+    __slots__ = ("slot_of", "visible")
+
+    def __init__(self):
+        self.slot_of = {}       # name -> slot in this block's scope (one slot per name, shared by redeclarations)
+        self.visible = {}       # names declared before the current point -> True if definitely declared
+
+
+class Resolver:
+    def __init__(self):
+        self.blocks = []
+
+    ''' ---- Blocks + names ---- '''
+    def push_block(self):
+        block = Block()
+        self.blocks.append(block)
+        return block
+
+    def declare(self, name):
+        block = self.blocks[-1]
+        slot = block.slot_of.setdefault(name, len(block.slot_of))
+        block.visible[name] = True
+        return slot
+
+    def lookup(self, name):
+        # Struct accesses (a.b.c) resolve through their base variable
+        name = name.split('.')[0]
+        addr = []
+        for depth, block in enumerate(reversed(self.blocks)):
+            definite = block.visible.get(name)
+            if definite is None:
+                continue
+            addr.append((depth, block.slot_of[name]))
+            if definite:
+                break
+        return tuple(addr)
+
+    ''' ---- Functions + statements ---- '''
+    def resolve_func(self, func_node):
+        # Parameters live in the same scope as the function's top-level statements
+        block = self.push_block()
+        for arg in func_node.args:
+            arg.slot = self.declare(arg.name)
+        self.resolve_statements(func_node.statements)
+        func_node.nslots = len(block.slot_of)
+        self.blocks.pop()
+
+    def resolve_statements(self, statements):
+        if statements is None:
+            return
+        for statement_node in statements:
+            self.resolve_statement(statement_node)
+
+    def resolve_statement(self, node):
+        match node.elem_type:
+            case 'vardef':
+                node.slot = self.declare(node.name)
+            case '=':
+                self.resolve_expression(node.expression)
+                node.addr = self.lookup(node.name)
+            case 'fcall':
+                self.resolve_expression(node)
+            case 'if':
+                # One scope holds the condition + whichever branch runs
+                block = self.push_block()
+                self.resolve_expression(node.condition)
+                before_branches = dict(block.visible)
+                self.resolve_statements(node.statements)
+                block.visible = before_branches
+                self.resolve_statements(node.else_statements)
+                node.nslots = len(block.slot_of)
+                self.blocks.pop()
+            case 'for':
+                # init / condition / update run in the enclosing scope, the body gets a fresh scope per iteration
+                self.resolve_statement(node.init)
+                self.resolve_expression(node.condition)
+                self.resolve_statement(node.update)
+                block = self.push_block()
+                self.resolve_statements(node.statements)
+                node.nslots = len(block.slot_of)
+                self.blocks.pop()
+            case 'try':
+                block = self.push_block()
+                self.resolve_statements(node.statements)
+                node.nslots = len(block.slot_of)
+                self.blocks.pop()
+                self.resolve_catchers(node.catchers)
+            case 'raise':
+                self.resolve_expression(node.exception_type)
+            case 'return':
+                self.resolve_expression(node.expression)
+
+    def resolve_catchers(self, catchers):
+        # Catch bodies run in the enclosing scope, but only if that exception was raised,
+        # so anything they declare is only *possibly* declared afterwards
+        block = self.blocks[-1]
+        before_catch = dict(block.visible)
+        maybe_declared = set()
+        for catcher in catchers:
+            block.visible = dict(before_catch)
+            self.resolve_statements(catcher.statements)
+            maybe_declared.update(name for name in block.visible if name not in before_catch)
+        block.visible = before_catch
+        for name in maybe_declared:
+            block.visible[name] = False
+
+    ''' ---- Expressions ---- '''
+    def resolve_expression(self, node):
+        if not isinstance(node, Element):
+            return
+        node_type = node.elem_type
+        if node_type == 'var':
+            node.addr = self.lookup(node.name)
+        elif node_type == 'fcall':
+            for arg in node.args:
+                self.resolve_expression(arg)
+        else:
+            self.resolve_expression(node.get('op1'))
+            self.resolve_expression(node.get('op2'))
+
+
+# exported function: annotate a parsed program in place
+def resolve_program(ast):
+    resolver = Resolver()
+    for func_node in ast.functions:
+        resolver.resolve_func(func_node)
+    return ast
+
+
+# (scope, slot) holding node's variable, or (None, None) if it hasn't been declared
+def find_slot(node, scope_stack):
+    for depth, slot in node.addr:
+        scope = scope_stack[-1 - depth]
+        if scope[slot] is not UNDECLARED:
+            return scope, slot
+    return None, None
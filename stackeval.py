@@ -0,0 +1,210 @@
+import ast
+import inspect
+import textwrap
+import warnings
+
+# Explicit-stack execution mode for the v3/v4 interpreters
+#   The tree-walkers recurse in Python: every Brewin call costs run_fcall -> run_func -> run_statement ->
+#   ... -> run_fcall Python frames, so deep Brewin recursion hits sys.getrecursionlimit()
+#
+#   Instead of keeping a second copy of every evaluator method, this module builds generator versions of
+#   them from the interpreter's own source:
+#       self.run_func(a, b)    ->  (yield _gen_run_func(self, a, b))
+#   Each generator yields the sub-evaluation it needs instead of calling it, and run_generator() keeps the
+#   suspended generators on a plain list. Python's stack stays a few frames deep no matter how deep the
+#   Brewin recursion goes, so depth is only bounded by memory.
+#
+#   Only methods that can (transitively) reach run_func are converted, everything else is called as-is
+#   Converting needs the interpreter's source (inspect.getsource): without it (only .pyc files, frozen installs)
+#   or for a method that can't be converted, call() warns + runs on the recursive evaluator instead
+
+ENTRY_METHOD = 'run_func'
+DYNAMIC_CALL_ATTRS = ('builtin',)       # fcall_node.builtin(...) -> bound builtin_* method set by linker.py
+GEN_PREFIX = '_gen_'
+
+# A yield inside one of these would belong to the nested scope, not the converted method
+NESTED_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+class ExplicitStackUnavailable(Exception):
+    pass
+
+
+''' ---- Driver ---- '''
+def run_generator(gen):
+    # stack = suspended callers, gen = generator currently running
+    stack = []
+    value = None
+    error = None
+    while True:
+        try:
+            if error is not None:
+                child = gen.throw(error)
+                error = None
+            else:
+                child = gen.send(value)
+        except StopIteration as done:
+            if not stack:
+                return done.value
+            gen = stack.pop()
+            value = done.value
+            continue
+        except BaseException as exc:
+            # Hand the exception to the caller at the point it was waiting (so Brewin try/catch still works)
+            if not stack:
+                raise
+            gen = stack.pop()
+            error = exc
+            value = None
+            continue
+
+        # The running generator asked for a sub-evaluation: suspend it and run the child
+        stack.append(gen)
+        gen = child
+        value = None
+
+
+''' ---- Method conversion ---- '''
+def _method_defs(interpreter_class):
+    try:
+        source = textwrap.dedent(inspect.getsource(interpreter_class))
+        line_offset = inspect.getsourcelines(interpreter_class)[1] - 1
+    except (OSError, TypeError) as e:
+        raise ExplicitStackUnavailable(f"source of {interpreter_class.__qualname__} isn't available ({e})") from e
+    class_def = ast.parse(source).body[0]
+    ast.increment_lineno(class_def, line_offset)
+    return {node.name: node for node in class_def.body if isinstance(node, ast.FunctionDef)}
+
+
+def _self_calls(func_def):
+    called = set()
+    for node in ast.walk(func_def):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            continue
+        if isinstance(node.func.value, ast.Name) and node.func.value.id == 'self':
+            called.add(node.func.attr)
+        elif node.func.attr in DYNAMIC_CALL_ATTRS:
+            called.add(node.func.attr)
+    return called
+
+
+def _recursive_methods(method_defs):
+    # Methods that can reach ENTRY_METHOD through self.* calls (run() is the entry point, it stays as-is)
+    #   A fcall_node.builtin(...) call reaches whichever builtin_* handlers are recursive (print evaluates its args)
+    calls = {name: _self_calls(func_def) for name, func_def in method_defs.items()}
+    builtin_handlers = {name for name in method_defs if name.startswith('builtin_')}
+    recursive = {ENTRY_METHOD}
+    changed = True
+    while changed:
+        changed = False
+        for name, called in calls.items():
+            if name in recursive or name == 'run':
+                continue
+            dynamic = any(attr in called for attr in DYNAMIC_CALL_ATTRS)
+            if (called & recursive) or (dynamic and (builtin_handlers & recursive)):
+                recursive.add(name)
+                changed = True
+
+    for name in recursive:
+        for node in ast.walk(method_defs[name]):
+            if node is not method_defs[name] and isinstance(node, NESTED_SCOPES):
+                raise ExplicitStackUnavailable(
+                    f"{name}: {type(node).__name__} on line {node.lineno} can't be converted to generator form"
+                )
+    return recursive
+
+
+class _YieldCalls(ast.NodeTransformer):
+    def __init__(self, recursive):
+        self.recursive = recursive
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Name) and func.id == 'super' and not node.args:
+            # Zero-arg super() needs a class cell, which a function compiled outside the class doesn't have
+            node.args = [ast.Name(id='_interpreter_class', ctx=ast.Load()), ast.Name(id='self', ctx=ast.Load())]
+            return node
+        if not isinstance(func, ast.Attribute):
+            return node
+        if isinstance(func.value, ast.Name) and func.value.id == 'self' and func.attr in self.recursive:
+            target = ast.Name(id=GEN_PREFIX + func.attr, ctx=ast.Load())
+            call = ast.Call(func=target, args=[func.value] + node.args, keywords=node.keywords)
+            return ast.copy_location(ast.Yield(value=call), node)
+        if func.attr in DYNAMIC_CALL_ATTRS:
+            dispatch = ast.Name(id='_gen_dispatch', ctx=ast.Load())
+            call = ast.Call(func=dispatch, args=[func] + node.args, keywords=node.keywords)
+            return ast.copy_location(ast.Yield(value=call), node)
+        return node
+
+
+def build_generator_methods(interpreter_class, profiled=False):
+    module = inspect.getmodule(interpreter_class)
+    method_defs = _method_defs(interpreter_class)
+    recursive = _recursive_methods(method_defs)
+
+    namespace = dict(vars(module))
+    namespace['_interpreter_class'] = interpreter_class
+    gen_methods = {}
+
+    def dispatch(bound_method, *args):
+        # Bound builtin handler -> its generator version (or a plain call wrapped as a generator)
+        name = bound_method.__name__
+        if name in gen_methods:
+            return gen_methods[name](bound_method.__self__, *args)
+        return _plain_call(bound_method, *args)
+
+    namespace['_gen_dispatch'] = dispatch
+
+    converted = []
+    for name in recursive:
+        func_def = _YieldCalls(recursive).visit(method_defs[name])
+        func_def.name = GEN_PREFIX + name
+        func_def.decorator_list = []
+        converted.append(func_def)
+    tree = ast.fix_missing_locations(ast.Module(body=converted, type_ignores=[]))
+    exec(compile(tree, inspect.getsourcefile(interpreter_class) or '<stackeval>', 'exec'), namespace)
+
+    if profiled:
+        # Generated code looks _gen_run_func up in namespace at call time, so replacing it profiles every call
+        namespace[GEN_PREFIX + ENTRY_METHOD] = _profiled_run_func(namespace[GEN_PREFIX + ENTRY_METHOD])
+
+    for name in recursive:
+        gen_methods[name] = namespace[GEN_PREFIX + name]
+    return gen_methods
+
+
+# Generator version of Profiler.wrap(): yield from passes the callee's sub-evaluations straight to the driver
+def _profiled_run_func(gen_run_func):
+    def run_func(self, func_node, func_args):
+        profiler = self.profiler
+        profiler.enter(func_node.name, len(func_node.args))
+        try:
+            return (yield from gen_run_func(self, func_node, func_args))
+        finally:
+            profiler.exit()
+    return run_func
+
+
+def _plain_call(func, *args):
+    return func(*args)
+    yield   # makes this a generator
+
+
+_GENERATOR_METHODS = {}
+
+
+# exported function: run interpreter.<method_name>(*args) on the explicit stack
+#   (or straight on the Python stack, with a warning, if the interpreter can't be converted)
+def call(interpreter, method_name, *args):
+    key = (type(interpreter), getattr(interpreter, 'profiler', None) is not None)
+    if key not in _GENERATOR_METHODS:
+        try:
+            _GENERATOR_METHODS[key] = build_generator_methods(*key)
+        except ExplicitStackUnavailable as e:
+            warnings.warn(f"explicit_stack unavailable, using the recursive evaluator: {e}", RuntimeWarning)
+            _GENERATOR_METHODS[key] = None
+    gen_methods = _GENERATOR_METHODS[key]
+    if gen_methods is None:
+        return getattr(interpreter, method_name)(*args)
+    return run_generator(gen_methods[method_name](interpreter, *args))
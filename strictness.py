@@ -0,0 +1,145 @@
+from environment import leading_var
+
+# Load-time strictness analysis for the v4 interpreter
+#   v4 makes every assignment + argument a thunk, but a lot of them are forced right away:
+#       for (i = 0; i < n; i = i + 1)          -> i = i + 1 is forced by the condition straight after
+#       x = x * 2;  print(x);                  -> print forces x before it outputs anything
+#       func fib(n) { if (n < 2) ... }         -> n is the first thing fib forces
+#   If nothing observable can happen between creating the thunk and forcing it (no output, no input,
+#   no error -- even a failed vardef or assignment counts), evaluating it on the spot gives exactly the
+#   same results in the same order, so those bindings are marked strict:
+#       = nodes    -> .strict        (True: run_assign stores the value itself, no Expression)
+#       func nodes -> .strict_param  (index of the param the body forces first, or None)
+#
+#   Statement lists are scanned backwards, tracking which variable (by name) the rest of the list
+#   forces first. Bodies of if / for / try start over with nothing known, so a strict binding is always
+#   forced in the same block + the same try as the assignment
+
+
+def var_name(var_node):
+    if var_node is None:
+        return None
+    return var_node.name
+
+
+# Var that check_condition() forces first
+def condition_leading(condition):
+    condition_type = condition.elem_type
+    if condition_type == 'var':
+        return condition
+    if condition_type in ('==', '!='):
+        return leading_var(condition.op1, 'operand')
+    if condition_type in ('<', '<=', '>', '>='):
+        return leading_var(condition.op1, 'int')
+    return None
+
+
+# Var that printout() forces first (constant args are just appended, nothing is output until the end)
+def print_leading(args):
+    for arg in args:
+        arg_type = arg.elem_type
+        if arg_type in ('int', 'string', 'bool', 'nil'):
+            continue
+        if arg_type == 'var':
+            return arg
+        if arg_type == '+':
+            return leading_var(arg.op1, 'operand')
+        if arg_type in ('-', '*', '/', 'neg'):
+            return leading_var(arg, 'int')
+        if arg_type in ('<', '<=', '>', '>=', '==', '!='):
+            return condition_leading(arg)
+        return None
+    return None
+
+
+# Names declared in a block: its own vardefs + the ones in its catch bodies (they declare into the block)
+def count_declarations(statements, counts):
+    for statement_node in statements or ():
+        if statement_node.elem_type == 'vardef':
+            counts[statement_node.name] = counts.get(statement_node.name, 0) + 1
+        elif statement_node.elem_type == 'try':
+            for catcher in statement_node.catchers:
+                count_declarations(catcher.statements, counts)
+    return counts
+
+
+class StrictnessAnalyzer:
+
+    ''' ---- Statements ---- '''
+    def analyze_statements(self, statements, declared=(), catch_body=False):
+        # upcoming = name of the variable the statements after this point force first (None if unknown)
+        #   declared = names already in the block before these statements (function params)
+        if statements is None:
+            return None
+        counts = count_declarations(statements, dict.fromkeys(declared, 1))
+        if catch_body:
+            # Declares into the enclosing block, which may already have the name
+            counts = {}
+        upcoming = None
+        for statement_node in reversed(statements):
+            upcoming = self.analyze_statement(statement_node, upcoming, counts)
+        return upcoming
+
+    def analyze_assign(self, node, upcoming):
+        node.strict = False
+        if upcoming != node.name:
+            # Could still fail (variable not declared), so nothing is known before it
+            return None
+        if len(node.addr) != 1:
+            # Might be assigning a catch-declared variable or an outer one, leave it lazy
+            return None
+        node.strict = True
+        # The expression is evaluated right here now, so its own leading var is forced first
+        return var_name(leading_var(node.expression))
+
+    def analyze_statement(self, node, upcoming, counts):
+        match node.elem_type:
+            case '=':
+                return self.analyze_assign(node, upcoming)
+            case 'vardef':
+                # Before this point the name means some other (outer) variable
+                if upcoming == node.name:
+                    return None
+                # Only declaration of the name in its block -> can't fail as "defined more than once"
+                if counts.get(node.name) != 1:
+                    return None
+                return upcoming
+            case 'fcall':
+                # print is always the builtin (linker.py binds builtins first)
+                if node.name == 'print':
+                    return var_name(print_leading(node.args))
+                return None
+            case 'if':
+                self.analyze_statements(node.statements)
+                self.analyze_statements(node.else_statements)
+                return var_name(condition_leading(node.condition))
+            case 'for':
+                self.analyze_statements(node.statements)
+                condition = var_name(condition_leading(node.condition))
+                # update runs right before the condition each time round, init right before the first check
+                self.analyze_assign(node.update, condition)
+                return self.analyze_assign(node.init, condition)
+            case 'try':
+                self.analyze_statements(node.statements)
+                for catcher in node.catchers:
+                    self.analyze_statements(catcher.statements, catch_body=True)
+                return None
+            case _:
+                # return / raise: nothing is known to be forced after these
+                return None
+
+    ''' ---- Functions ---- '''
+    def analyze_func(self, func_node):
+        first_forced = self.analyze_statements(func_node.statements, [arg.name for arg in func_node.args])
+        func_node.strict_param = None
+        for index, arg in enumerate(func_node.args):
+            if arg.name == first_forced:
+                func_node.strict_param = index
+
+
+# exported function: mark strict assignments + parameters in place
+def analyze_program(ast):
+    analyzer = StrictnessAnalyzer()
+    for func_node in ast.functions:
+        analyzer.analyze_func(func_node)
+    return ast
@@ -0,0 +1,50 @@
+from environment import iter_nodes
+
+# Struct layouts ("hidden classes") for the v3 interpreter
+#   A struct instance used to be a dict of {'type', 'val'} dicts, one per field, built (along with the list of
+#   valid field types) on every `new`, and every a.b.c read split its name + looked each field up by name
+#
+#   build_shapes() runs once at load time: one StructShape per struct, its fields in slot order + a
+#   field -> slot map. An instance (interpreterv3's BrewinStruct) is then just its shape + a list of values
+#   annotate_fields() gives every dotted var / = node a FieldCache (inline cache): for each field in its path,
+#   the shape it found last time + that field's slot. Each access site only ever sees one struct type per
+#   step (assignments are type checked), so after the first access the name lookups are skipped
+
+
+class StructShape:
+    __slots__ = ("name", "fields", "types", "index", "defaults")
+
+    def __init__(self, struct_node, default_value):
+        # A repeated field name keeps its first position + last type (same as the old field dict)
+        layout = {}
+        for field in struct_node.fields:
+            layout[field.name] = field.var_type
+        self.name = struct_node.name
+        self.fields = tuple(layout)                 # field names, in slot order
+        self.types = tuple(layout.values())         # field types, in slot order
+        self.index = {field: slot for slot, field in enumerate(self.fields)}
+        # Values a new instance starts with (nil for struct fields: nil is never modified, one Element will do)
+        self.defaults = tuple(default_value(field_type) for field_type in self.types)
+
+
+class FieldCache:
+    __slots__ = ("fields", "shapes", "slots")
+
+    def __init__(self, name):
+        self.fields = tuple(name.split('.')[1:])    # a.b.c -> ('b', 'c')
+        self.shapes = [None] * len(self.fields)     # shape the field was last found in
+        self.slots = [0] * len(self.fields)         # the field's slot in that shape
+
+
+# exported function: struct name -> StructShape for every (already validated) struct
+def build_shapes(defined_structs, default_value):
+    return {name: StructShape(struct, default_value) for name, struct in defined_structs.items()}
+
+
+# exported function: set .field_cache on every dotted var / = node
+def annotate_fields(ast):
+    for func in ast.functions:
+        for node in iter_nodes(func.statements):
+            if node.elem_type in ('var', '=') and '.' in node.name:
+                node.field_cache = FieldCache(node.name)
+    return ast
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The interpreters are flat modules in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep test runs out of the user's AST cache (test_astcache.py points it at a temp dir)
+os.environ.setdefault("BREWIN_AST_CACHE", "0")
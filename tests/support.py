@@ -0,0 +1,88 @@
+import importlib
+import os
+import re
+
+# Shared helpers for the interpreter tests
+#   Test programs are .br files in tests/programs (plus the benchmark programs in benchmarks/), each starting
+#   with the comment the benchmark harness uses to list the versions that can run it:
+#       /* versions: 2 4 ... */
+#   <name>.v<N>.exp next to the test programs holds what version N prints for <name>, one line per output
+#   line, then "!! <ERROR_TYPE>" if the program stops on an error. They were recorded with the baseline
+#   tree-walking interpreters (before any of the backends / load-time passes), except where a program needs
+#   one of the features to run at all (the .br file's comment says so)
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROGRAM_DIR = os.path.join(TESTS_DIR, "programs")
+BENCHMARK_DIR = os.path.join(os.path.dirname(TESTS_DIR), "benchmarks")
+
+VERSIONS_HEADER = re.compile(r"/\*\s*versions:([\d\s]+)")
+
+# label -> (version, extra Interpreter() kwargs): every backend + flag combination has to match the baseline
+CONFIGS = {
+    "v1": ("1", {}),
+    "v2": ("2", {}),
+    "v2-bytecode": ("2", {"use_bytecode": True}),
+    "v2-unoptimized": ("2", {"optimize": False}),
+    "v2-bytecode-unoptimized": ("2", {"use_bytecode": True, "optimize": False}),
+    "v2-no-tail-calls": ("2", {"tail_calls": False}),
+    "v2-profile": ("2", {"profile": True}),
+    "v3": ("3", {}),
+    "v3-closures": ("3", {"use_closures": True}),
+    "v3-python": ("3", {"use_transpiler": True}),
+    "v3-explicit-stack": ("3", {"explicit_stack": True}),
+    "v3-unoptimized": ("3", {"optimize": False}),
+    "v3-closures-unoptimized": ("3", {"use_closures": True, "optimize": False}),
+    "v3-no-tail-calls": ("3", {"tail_calls": False}),
+    "v3-profile": ("3", {"profile": True}),
+    "v4": ("4", {}),
+    "v4-explicit-stack": ("4", {"explicit_stack": True}),
+    "v4-unoptimized": ("4", {"optimize": False}),
+    "v4-profile": ("4", {"profile": True}),
+}
+
+
+def program_versions(source):
+    match = VERSIONS_HEADER.match(source.lstrip())
+    if match is None:
+        return []
+    return match.group(1).split()
+
+
+def load_programs():
+    # name -> (source, versions) for every test + benchmark program
+    programs = {}
+    for directory in (PROGRAM_DIR, BENCHMARK_DIR):
+        for file_name in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(file_name)
+            if ext != ".br":
+                continue
+            with open(os.path.join(directory, file_name)) as f:
+                source = f.read()
+            programs[name] = (source, program_versions(source))
+    return programs
+
+
+def expected_output(name, version):
+    with open(os.path.join(PROGRAM_DIR, f"{name}.v{version}.exp")) as f:
+        return f.read().splitlines()
+
+
+def run(version, source, inp=None, **kwargs):
+    # Output lines (+ "!! <ERROR_TYPE>" if the program stopped on an error), like the .exp files
+    _, output = run_interpreter(version, source, inp, **kwargs)
+    return output
+
+
+def run_interpreter(version, source, inp=None, **kwargs):
+    # (the Interpreter that ran the program, its run() output lines)
+    interpreter = importlib.import_module(f"interpreterv{version}").Interpreter(
+        console_output=False, inp=inp or [], **kwargs
+    )
+    try:
+        interpreter.run(source)
+    except Exception:
+        error_type, _ = interpreter.get_error_type_and_line()
+        if error_type is None:
+            raise
+        return interpreter, interpreter.get_output() + [f"!! {error_type.name}"]
+    return interpreter, interpreter.get_output()
@@ -0,0 +1,83 @@
+import marshal
+import os
+import zlib
+
+import pytest
+
+import astcache
+import brewlex
+import element
+
+SOURCE = "func main() { print(1); }"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "ast"
+    monkeypatch.setattr(astcache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(astcache, "CACHE_DIR", str(directory))
+    return directory
+
+
+def entry(cache_dir):
+    return cache_dir / (astcache.cache_key(SOURCE) + astcache.CACHE_SUFFIX)
+
+
+def test_cache_dir_is_private(cache_dir):
+    astcache.parse_program(SOURCE)
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+    assert entry(cache_dir).exists()
+
+
+def test_default_cache_dir_is_per_user(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert astcache._default_cache_dir() == os.path.join(str(tmp_path), "brewin", "ast")
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    assert astcache._default_cache_dir().startswith(os.path.expanduser("~"))
+
+
+def test_cached_tree_is_reused(cache_dir, monkeypatch):
+    first = astcache.parse_program(SOURCE)
+
+    def no_parse(program):
+        raise AssertionError("parsed again")
+    monkeypatch.setattr(astcache.brewparse, "parse_program", no_parse)
+    assert astcache.encode_tree(astcache.parse_program(SOURCE)) == astcache.encode_tree(first)
+
+
+@pytest.mark.parametrize("payload", [
+    b"",                                                                    # empty
+    b"not zlib at all",                                                     # corrupt
+    zlib.compress(marshal.dumps(("program", {"structs": []})))[:-4],        # truncated
+    zlib.compress(b"\x00\x01\x02"),                                         # not marshal data
+    zlib.compress(marshal.dumps(("program", {"old_field": []}))),          # older node layout
+    zlib.compress(marshal.dumps(("program", {}, "extra"))),                # older entry format
+])
+def test_bad_entry_is_dropped(cache_dir, payload):
+    cache_dir.mkdir(mode=0o700)
+    entry(cache_dir).write_bytes(payload)
+    assert astcache.load_cached(astcache.cache_key(SOURCE)) is None
+    assert not entry(cache_dir).exists()
+    # ... and the program is parsed again
+    assert astcache.parse_program(SOURCE).elem_type == "program"
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="no file owners")
+def test_entries_others_can_write_are_ignored(cache_dir):
+    astcache.parse_program(SOURCE)
+    key = astcache.cache_key(SOURCE)
+    os.chmod(entry(cache_dir), 0o666)
+    assert astcache.load_cached(key) is None
+    os.chmod(entry(cache_dir), 0o600)
+    os.chmod(cache_dir, 0o777)
+    assert astcache.load_cached(key) is None
+
+
+def test_fingerprint_covers_lexer_and_node_layout(tmp_path):
+    assert brewlex.__file__ in astcache.FINGERPRINT_SOURCES
+    assert element.__file__ in astcache.FINGERPRINT_SOURCES
+    source = tmp_path / "element.py"
+    source.write_text("FIELDS = ('name',)\n")
+    before = astcache._grammar_fingerprint((str(source),))
+    source.write_text("FIELDS = ('name', 'var_type')\n")
+    assert astcache._grammar_fingerprint((str(source),)) != before
@@ -0,0 +1,36 @@
+import pytest
+
+from support import CONFIGS, expected_output, load_programs, run
+
+# Every test + benchmark program, on every backend + flag combination of every version it lists
+PROGRAMS = load_programs()
+CASES = [
+    pytest.param(name, label, id=f"{name}-{label}")
+    for name, (source, versions) in PROGRAMS.items()
+    for label, (version, kwargs) in CONFIGS.items()
+    if version in versions
+]
+
+
+@pytest.mark.parametrize("name, label", CASES)
+def test_matches_baseline(name, label):
+    source, _ = PROGRAMS[name]
+    version, kwargs = CONFIGS[label]
+    assert run(version, source, **kwargs) == expected_output(name, version)
+
+
+def test_every_program_has_expected_output():
+    for name, (source, versions) in PROGRAMS.items():
+        assert versions, f"{name}.br has no /* versions: ... */ header"
+        for version in versions:
+            expected_output(name, version)
+
+
+def test_bytecode_recursion_is_not_bounded_by_python_stack():
+    # The VM keeps Brewin frames on its own frame stack: the tree-walker hits Python's recursion limit here
+    # (- not +: v2's + evaluates its operands twice, which makes this recursion exponential)
+    source = """
+    func down(n) { if (n == 0) { return 0; } return down(n - 1) - -1; }
+    func main() { print(down(20000)); }
+    """
+    assert run("2", source, use_bytecode=True) == ["20000"]
@@ -0,0 +1,44 @@
+import pytest
+
+from optimizer import PASSES
+from support import expected_output, load_programs, run, run_interpreter
+
+# Every program on v2-v4 with each optimizer pass on its own + with every pass but that one:
+#   a pass can't change what a program prints or which error stops it, whatever runs before / after it
+PROGRAMS = load_programs()
+OPTIMIZED_VERSIONS = ("2", "3", "4")
+PASS_SETS = {}
+for pass_name in PASSES:
+    PASS_SETS[f"only-{pass_name}"] = [pass_name]
+    PASS_SETS[f"without-{pass_name}"] = [other for other in PASSES if other != pass_name]
+
+CASES = [
+    pytest.param(name, version, label, id=f"{name}-v{version}-{label}")
+    for name, (source, versions) in PROGRAMS.items()
+    for version in OPTIMIZED_VERSIONS
+    if version in versions
+    for label in PASS_SETS
+]
+
+
+@pytest.mark.parametrize("name, version, label", CASES)
+def test_pass_set_matches_baseline(name, version, label):
+    source, _ = PROGRAMS[name]
+    assert run(version, source, optimize=PASS_SETS[label]) == expected_output(name, version)
+
+
+@pytest.mark.parametrize("version", OPTIMIZED_VERSIONS)
+def test_every_pass_is_exercised(version):
+    # Each pass has to rewrite something in the corpus, or the cases above don't test it on this version
+    rewrites = dict.fromkeys(PASSES, 0)
+    for source, versions in PROGRAMS.values():
+        if version in versions:
+            interpreter, _ = run_interpreter(version, source)
+            for pass_name, count in interpreter.optimizations.items():
+                rewrites[pass_name] += count
+    assert [pass_name for pass_name, count in rewrites.items() if count == 0] == []
+
+
+def test_unknown_pass_is_rejected():
+    with pytest.raises(ValueError, match="Unknown optimizer pass"):
+        run("2", "func main() { print(1); }", optimize=["fold", "nope"])
@@ -0,0 +1,46 @@
+import pstats
+
+import pytest
+
+from support import run_interpreter
+
+# main calls f three times, every f calls g twice, g recurses down from 2 (3 calls per outermost g call)
+#   optimize=False: the inliner would otherwise remove some of the calls being counted
+PROGRAMS = {
+    "2": """
+    func g(n) { if (n == 0) { return 0; } return g(n - 1); }
+    func f(x) { g(2); g(2); return x; }
+    func main() { f(1); f(2); f(3); print("done"); }
+    """,
+    "3": """
+    func g(n: int): int { if (n == 0) { return 0; } return g(n - 1); }
+    func f(x: int): int { g(2); g(2); return x; }
+    func main(): void { f(1); f(2); f(3); print("done"); }
+    """,
+}
+
+INTERPRETER = ("~", 0, "<interpreter>")
+MAIN = ("<brewin>", 0, "main/0")
+F = ("<brewin>", 0, "f/1")
+G = ("<brewin>", 0, "g/1")
+
+
+@pytest.mark.parametrize("version", sorted(PROGRAMS))
+def test_pstats_call_counts_and_callers(version):
+    interpreter, output = run_interpreter(version, PROGRAMS[version], profile=True, optimize=False)
+    assert output == ["done"]
+    stats = pstats.Stats(interpreter.profiler).stats
+
+    # (primitive calls, calls, exclusive time, inclusive time, callers)
+    assert set(stats) == {MAIN, F, G}
+    assert stats[MAIN][:2] == (1, 1)
+    assert stats[F][:2] == (3, 3)
+    assert stats[G][:2] == (6, 18)
+
+    # Callers: caller key -> (calls, primitive calls, exclusive time, inclusive time)
+    assert set(stats[MAIN][4]) == {INTERPRETER}
+    assert set(stats[F][4]) == {MAIN}
+    assert stats[F][4][MAIN][:2] == (3, 3)
+    assert set(stats[G][4]) == {F, G}
+    assert stats[G][4][F][:2] == (6, 6)
+    assert stats[G][4][G][:2] == (12, 0)
@@ -0,0 +1,62 @@
+import inspect
+
+import pytest
+
+import stackeval
+from support import run
+
+
+class Countdown:
+    # Stand-in interpreter: run_func is the method stackeval converts
+    def run_func(self, n):
+        if n == 0:
+            return 0
+        return self.run_func(n - 1) + 1
+
+
+class CountdownWithComprehension:
+    def run_func(self, n):
+        if n == 0:
+            return 0
+        return sum([self.run_func(n - 1) for _ in range(1)]) + 1
+
+
+def test_recursion_in_comprehension_is_rejected():
+    with pytest.raises(stackeval.ExplicitStackUnavailable, match="ListComp"):
+        stackeval.build_generator_methods(CountdownWithComprehension, False)
+
+
+def test_unconvertible_interpreter_falls_back_with_warning():
+    with pytest.warns(RuntimeWarning, match="explicit_stack unavailable"):
+        assert stackeval.call(CountdownWithComprehension(), "run_func", 5) == 5
+
+
+def test_missing_source_falls_back_with_warning(monkeypatch):
+    def no_source(obj):
+        raise OSError("could not get source code")
+
+    monkeypatch.setattr(inspect, "getsource", no_source)
+    monkeypatch.setattr(stackeval, "_GENERATOR_METHODS", {})
+    with pytest.warns(RuntimeWarning, match="source of Countdown"):
+        assert stackeval.call(Countdown(), "run_func", 10) == 10
+
+
+def test_converted_method_runs_past_recursion_limit():
+    assert stackeval.call(Countdown(), "run_func", 20000) == 20000
+
+
+DEEP_RECURSION = {
+    "3": """
+    func down(n: int): int { if (n == 0) { return 0; } return down(n - 1) - -1; }
+    func main(): void { print(down(20000)); }
+    """,
+    "4": """
+    func down(n) { if (n == 0) { return 0; } return down(n - 1) - -1; }
+    func main() { print(down(20000)); }
+    """,
+}
+
+
+@pytest.mark.parametrize("version", sorted(DEEP_RECURSION))
+def test_explicit_stack_recursion_is_not_bounded_by_python_stack(version):
+    assert run(version, DEEP_RECURSION[version], explicit_stack=True) == ["20000"]
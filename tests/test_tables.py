@@ -0,0 +1,13 @@
+import build_tables
+
+
+def test_frozen_tables_are_current():
+    # brewlex / brewparse load the frozen tables without checking them: rebuild with build_tables.py
+    assert build_tables.stale_tables() == []
+
+
+def test_frozen_lexer_is_loaded():
+    import brewlex
+
+    assert brewlex.frozen_lextab_available()
+    assert brewlex.lexer.lexoptimize
@@ -0,0 +1,42 @@
+import pytest
+
+from support import CONFIGS, run, run_interpreter
+
+# Deeper than Python's recursion limit: only the configurations that run `return f(...)` in place get through
+#   (closures, the transpiler, profile + tail_calls=False still make one Python call per Brewin call)
+TAIL_CALL_CONFIGS = [
+    "v2", "v2-bytecode", "v2-unoptimized", "v2-bytecode-unoptimized",
+    "v3", "v3-explicit-stack", "v3-unoptimized",
+]
+
+MUTUAL_RECURSION = {
+    "2": """
+    func is_even(n) { if (n == 0) { return true; } return is_odd(n - 1); }
+    func is_odd(n) { if (n == 0) { return false; } return is_even(n - 1); }
+    func main() { print(is_even(20000)); print(is_odd(20001)); }
+    """,
+    "3": """
+    func is_even(n: int): bool { if (n == 0) { return true; } return is_odd(n - 1); }
+    func is_odd(n: int): bool { if (n == 0) { return false; } return is_even(n - 1); }
+    func main(): void { print(is_even(20000)); print(is_odd(20001)); }
+    """,
+}
+EXPECTED = {"2": ["True", "True"], "3": ["true", "true"]}
+
+
+@pytest.mark.parametrize("label", TAIL_CALL_CONFIGS)
+def test_mutual_tail_recursion_is_not_bounded_by_python_stack(label):
+    version, kwargs = CONFIGS[label]
+    assert run(version, MUTUAL_RECURSION[version], **kwargs) == EXPECTED[version]
+
+
+@pytest.mark.parametrize("version", sorted(MUTUAL_RECURSION))
+def test_tail_calls_are_counted(version):
+    interpreter, output = run_interpreter(version, MUTUAL_RECURSION[version])
+    assert output == EXPECTED[version]
+    assert interpreter.tail_calls_eliminated >= 40000
+
+
+def test_tail_calls_can_be_turned_off():
+    with pytest.raises(RecursionError):
+        run("2", MUTUAL_RECURSION["2"], tail_calls=False)
@@ -0,0 +1,62 @@
+from support import run
+
+UNUSED_BAD_FUNCTION = """
+func unused(): int {
+  var s: string;
+  s = 5;
+  return 0;
+}
+
+func main(): void {
+  print("ok");
+}
+"""
+
+CALLED_BAD_FUNCTION = """
+func bad(): int {
+  var s: string;
+  s = 5;
+  return 0;
+}
+
+func middle(): int {
+  return bad();
+}
+
+func main(): void {
+  print("before");
+  print(middle());
+}
+"""
+
+UNTAKEN_BAD_BRANCH = """
+func check(n: int): int {
+  var s: string;
+  if (n > 5) {
+    s = 5;
+  }
+  return n;
+}
+
+func main(): void {
+  print(check(1));
+  print(check(2));
+}
+"""
+
+
+def test_strict_types_ignores_functions_main_never_calls():
+    assert run("3", UNUSED_BAD_FUNCTION, strict_types=True) == ["ok"]
+    assert run("3", UNUSED_BAD_FUNCTION) == ["ok"]
+
+
+def test_strict_types_rejects_functions_main_can_reach():
+    # Default mode runs up to the bad assignment, strict mode rejects the program before main starts
+    assert run("3", CALLED_BAD_FUNCTION) == ["before", "!! TYPE_ERROR"]
+    assert run("3", CALLED_BAD_FUNCTION, strict_types=True) == ["!! TYPE_ERROR"]
+
+
+def test_strict_types_checks_every_branch_of_a_reachable_function():
+    # Functions are filtered, statements aren't: the bad branch never runs, but check() is reachable
+    assert run("3", UNTAKEN_BAD_BRANCH) == ["1", "2"]
+    assert run("3", UNTAKEN_BAD_BRANCH, strict_types=True) == ["!! TYPE_ERROR"]
@@ -0,0 +1,690 @@
+from intbase import ErrorType
+
+# Brewin v3 -> Python source transpiler
+#   For programs where every type is known before they run, each Brewin function becomes a Python function,
+#   each struct a slotted class, each for loop a while loop, and the whole program is compile()d once and run
+#   natively by CPython:
+#       func sq(x: int): int { return x * x; }     ->   def fn_sq_0(v1_x):
+#                                                           return (v1_x * v1_x)
+#   Variables are plain Python locals (one per declaration, so inner blocks can shadow), nil is None
+#
+#   Types are checked while translating, with the same rules as interpreterv3's evaluators. Wherever the
+#   tree-walker would raise a TYPE_ERROR / NAME_ERROR (or crash on a malformed operand), translation stops
+#   with Untranslatable and the program runs on the interpreter instead. So the only errors left at run time
+#   are the ones that depend on values:
+#       nil.field          -> AttributeError on None, turned into FAULT_ERROR (see run_translated)
+#       x / 0              -> ZeroDivisionError, same as the tree-walker
+#       inputi / inputs    -> handled by the interpreter's own inputi() / inputs()
+#   Quirks that change output are kept: '+' in print / return / == evaluates its operands twice
+#   (overloaded_operator), && and || don't short-circuit
+
+INT_OPERATIONS = ['+', '-', '*', '/', 'neg']
+BOOL_OPERATIONS = ['!', '||', '&&']
+EQUALITY_COMPARISONS = ['==', '!=']
+INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
+PRIMITIVE_TYPES = ['int', 'bool', 'string']
+
+INT_ALLOWABLE = ['int', 'var', 'fcall'] + INT_OPERATIONS
+BOOL_ALLOWABLE = ['bool', 'var', 'fcall', 'int'] + BOOL_OPERATIONS + EQUALITY_COMPARISONS + INTEGER_COMPARISONS + INT_OPERATIONS
+
+ARITH_OPERATORS = {'+': '+', '-': '-', '*': '*', '/': '//'}
+DEFAULT_VALUES = {'int': '0', 'bool': 'False', 'string': "''"}
+
+# eval_op() type of an overloaded '+' result (str(type(val)))
+OVERLOADED_RESULT_TYPES = {'int': "<class 'int'>", 'string': "<class 'str'>"}
+
+INDENT = "    "
+
+
+class Untranslatable(Exception):
+    pass
+
+
+''' ---- Runtime support for the generated code ---- '''
+class BrewinObject:
+    # Base of the generated struct classes: prints like interpreterv3.Interpreter.BrewinStruct
+    __slots__ = ()
+    struct_name = ""
+    layout = ()         # (field name, field type, attribute) per field
+
+    def __str__(self):
+        str_print = "\nStruct Type: " + self.struct_name + "\n"
+        for field, field_type, attribute in self.layout:
+            str_print += ("\t" + field + "\t\t")
+            str_print += ("Type = " + field_type + "\tValue = " + struct_str(getattr(self, attribute)) + "\n")
+        return str_print
+
+
+def struct_str(value):
+    # nil is None here, the tree-walker's nil Element prints as "nil"
+    if value is None:
+        return "nil"
+    return str(value)
+
+
+''' ---- Translator ---- '''
+class Transpiler:
+    def __init__(self, interpreter):
+        self.interp = interpreter
+        # struct name -> {field: type} (later fields with the same name overwrite the type, like BrewinStruct)
+        self.layouts = {}
+        for name, struct in interpreter.defined_structs.items():
+            layout = {}
+            for field in struct.fields:
+                layout[field.name] = field.var_type
+            self.layouts[name] = layout
+        self.function_names = {}
+        for index, func in enumerate(interpreter.ast.functions):
+            self.function_names[id(func)] = f"fn_{func.name}_{index}"
+        self.builtin_args = []      # argument lists handed to inputi() / inputs() (generated code: _ARGS[i])
+        self.lines = []
+        self.depth = 0
+
+    ''' ---- Helpers ---- '''
+    def emit(self, line):
+        self.lines.append(INDENT * self.depth + line)
+
+    def fresh(self, name):
+        self.counter += 1
+        return f"v{self.counter}_{name}"
+
+    def declare(self, name, var_type):
+        py_name = self.fresh(name)
+        self.blocks[-1][name] = (py_name, var_type)
+        return py_name
+
+    def lookup(self, name):
+        for block in reversed(self.blocks):
+            if name in block:
+                return block[name]
+        raise Untranslatable(f"variable {name} is not declared here")
+
+    def has_call(self, node):
+        if node.elem_type == 'fcall':
+            return True
+        for field in ('op1', 'op2'):
+            operand = node.get(field)
+            if operand is not None and self.has_call(operand):
+                return True
+        return False
+
+    ''' ---- Program ---- '''
+    def translate(self):
+        self.emit("# generated by transpilev3.py")
+        for name, layout in self.layouts.items():
+            self.translate_struct(name, layout)
+        for func in self.interp.ast.functions:
+            self.translate_function(func)
+        return "\n".join(self.lines) + "\n"
+
+    def translate_struct(self, name, layout):
+        for field_type in layout.values():
+            if field_type not in PRIMITIVE_TYPES and field_type not in self.layouts:
+                raise Untranslatable(f"struct {name} has a field of unknown type {field_type}")
+        attributes = [f"f_{field}" for field in layout]
+        self.emit(f"class S_{name}(BrewinObject):")
+        self.depth += 1
+        self.emit(f"__slots__ = {tuple(attributes)!r}")
+        self.emit(f"struct_name = {name!r}")
+        self.emit(f"layout = {tuple((field, field_type, f'f_{field}') for field, field_type in layout.items())!r}")
+        self.emit("def __init__(self):")
+        self.depth += 1
+        if not layout:
+            self.emit("pass")
+        for field, field_type in layout.items():
+            self.emit(f"self.f_{field} = {self.default_value(field_type)}")
+        self.depth -= 2
+        self.emit("")
+
+    def default_value(self, var_type):
+        if var_type in DEFAULT_VALUES:
+            return DEFAULT_VALUES[var_type]
+        if var_type in self.layouts:
+            return "None"
+        raise Untranslatable(f"no default value for type {var_type}")
+
+    def translate_function(self, func_node):
+        self.counter = 0
+        self.blocks = [{}]
+        self.return_type = func_node.return_type
+
+        # Duplicate parameter names share one variable, the last argument wins
+        params = []
+        for index, param in enumerate(func_node.args):
+            if param.var_type not in PRIMITIVE_TYPES and param.var_type not in self.layouts:
+                raise Untranslatable(f"parameter {param.name} has unknown type {param.var_type}")
+            if any(later.name == param.name for later in func_node.args[index + 1:]):
+                params.append(f"_unused{index}")
+            else:
+                params.append(self.declare(param.name, param.var_type))
+
+        self.emit(f"def {self.function_names[id(func_node)]}({', '.join(params)}):")
+        self.depth += 1
+        self.translate_statements(func_node.statements)
+        if self.return_type != 'void':
+            self.emit(f"return {self.default_value(self.return_type)}")
+        self.depth -= 1
+        self.emit("")
+
+    ''' ---- Statements ---- '''
+    def translate_statements(self, statements):
+        if not statements:
+            # Empty body (e.g. all of it removed by dead code elimination)
+            self.emit("pass")
+        for statement_node in statements:
+            self.translate_statement(statement_node)
+
+    def translate_statement(self, node):
+        node_type = node.elem_type
+        if node_type == 'vardef':
+            if node.name in self.blocks[-1]:
+                raise Untranslatable(f"variable {node.name} defined more than once")
+            value = self.default_value(node.var_type)
+            self.emit(f"{self.declare(node.name, node.var_type)} = {value}")
+        elif node_type == '=':
+            self.translate_assign(node)
+        elif node_type == 'fcall':
+            code, _ = self.translate_fcall(node)
+            self.emit(code)
+        elif node_type == 'if':
+            self.translate_if(node)
+        elif node_type == 'for':
+            self.translate_for(node)
+        elif node_type == 'return':
+            self.translate_return(node)
+        else:
+            raise Untranslatable(f"unrecognized statement {node_type}")
+
+    def translate_assign(self, node):
+        if '.' not in node.name:
+            py_name, var_type = self.lookup(node.name)
+            self.emit(f"{py_name} = {self.assigned_value(node.expression, var_type)}")
+            return
+
+        # struct_update(): every struct on the way to the field is dereferenced before the expression runs
+        parts = node.name.split('.')
+        owner, owner_type = self.struct_path(parts[:-1], node.name)
+        field = parts[-1]
+        field_type = self.field_type(owner_type, field)
+        value = self.assigned_value(node.expression, field_type)
+        if '.' in owner:
+            temp = self.fresh("owner")
+            self.emit(f"{temp} = {owner}")
+            owner = temp
+        self.emit(f"{owner}.f_{field}")
+        self.emit(f"{owner}.f_{field} = {value}")
+
+    def assigned_value(self, expression, var_type):
+        # run_assign / struct_update: code for the value stored in a variable of type var_type
+        node_type = expression.elem_type
+        if node_type in ('string', 'int', 'bool'):
+            if node_type != var_type:
+                if var_type == 'bool' and node_type == 'int':
+                    return repr(bool(expression.val))
+                raise Untranslatable(f"can't assign {node_type} to {var_type}")
+            return repr(expression.val)
+
+        if node_type == 'var':
+            code, other_type = self.variable(expression)
+            return self.coerced(code, other_type, var_type)
+
+        if node_type == 'fcall':
+            code, return_type = self.translate_fcall(expression)
+            return self.coerced(code, return_type, var_type)
+
+        if var_type == 'int':
+            return self.int_types(expression)
+        if var_type == 'bool':
+            return self.bool_types(expression)
+        if var_type == 'string':
+            return self.string_types(expression)
+        if node_type == 'nil' and var_type in self.layouts:
+            return "None"
+        if node_type == 'new' and expression.var_type == var_type:
+            return f"S_{var_type}()"
+        raise Untranslatable(f"can't assign {node_type} to {var_type}")
+
+    def coerced(self, code, value_type, var_type):
+        # Value of a var / call stored as var_type: same type, or int -> bool
+        if value_type == var_type:
+            return code
+        if var_type == 'bool' and value_type == 'int':
+            return f"bool({code})"
+        raise Untranslatable(f"can't use {value_type} as {var_type}")
+
+    def translate_if(self, node):
+        block = {}
+        self.blocks.append(block)
+        self.emit(f"if {self.condition(node.condition)}:")
+        self.depth += 1
+        self.translate_statements(node.statements)
+        self.depth -= 1
+        if node.else_statements is not None:
+            # Condition + both branches share one scope, but the else branch can't see the if branch's variables
+            block.clear()
+            self.emit("else:")
+            self.depth += 1
+            self.translate_statements(node.else_statements)
+            self.depth -= 1
+        self.blocks.pop()
+
+    def translate_for(self, node):
+        self.translate_assign(node.init)
+        self.emit(f"while {self.condition(node.condition)}:")
+        self.depth += 1
+        self.blocks.append({})
+        self.translate_statements(node.statements)
+        self.blocks.pop()
+        self.translate_assign(node.update)
+        self.depth -= 1
+
+    def translate_return(self, node):
+        expression = node.expression
+        expected = self.return_type
+        if expression is None:
+            self.emit("return" if expected == 'void' else f"return {self.default_value(expected)}")
+            return
+
+        node_type = expression.elem_type
+        if node_type == 'fcall':
+            code, value_type = self.translate_fcall(expression)
+            if value_type is None:
+                # A void call returns nothing, so the function returns its default
+                self.emit(code)
+                self.emit("return" if expected == 'void' else f"return {self.default_value(expected)}")
+                return
+        elif node_type in ('int', 'string', 'bool'):
+            code, value_type = repr(expression.val), node_type
+        elif node_type == 'var':
+            code, value_type = self.variable(expression)
+        elif node_type == 'new' and expression.var_type in self.layouts:
+            code, value_type = f"S_{expression.var_type}()", expression.var_type
+        elif node_type == '+':
+            code, value_type = self.overloaded(expression)
+            value_type = 'int' if value_type == OVERLOADED_RESULT_TYPES['int'] else 'string'
+        elif node_type in INT_OPERATIONS:
+            code, value_type = self.int_operation(expression), 'int'
+        elif node_type in BOOL_OPERATIONS:
+            code, value_type = self.bool_operation(expression), 'bool'
+        elif node_type in EQUALITY_COMPARISONS:
+            code, value_type = self.equality(expression), 'bool'
+        elif node_type in INTEGER_COMPARISONS:
+            code, value_type = self.compare(expression), 'bool'
+        else:
+            raise Untranslatable(f"can't return {node_type}")
+
+        if expected == 'void':
+            raise Untranslatable("value returned from a void function")
+        self.emit(f"return {self.coerced(code, value_type, expected)}")
+
+    ''' ---- Calls ---- '''
+    def translate_fcall(self, node):
+        # (code, return type) -- return type None for void calls
+        func_name = node.name
+        if node.builtin is not None:
+            if func_name == 'print':
+                parts = [self.print_arg(arg) for arg in node.args]
+                if len(parts) == 1:
+                    return f"_output({parts[0]})", None
+                return f"_output(''.join(({', '.join(parts)},)))", None
+            # inputi / inputs: only the prompt constant is read, the interpreter's own handler does the rest
+            if len(node.args) > 1:
+                raise Untranslatable(f"{func_name}() with more than 1 parameter")
+            if node.args and node.args[0].elem_type not in ('int', 'string', 'bool'):
+                raise Untranslatable(f"{func_name}() prompt isn't a constant")
+            self.builtin_args.append(node.args)
+            value_type = 'int' if func_name == 'inputi' else 'string'
+            return f"_{func_name}(_ARGS[{len(self.builtin_args) - 1}])['val']", value_type
+
+        func_to_run = node.target
+        if func_to_run is None:
+            raise Untranslatable(f"function {func_name} with {len(node.args)} parameters not found")
+        args = [self.argument(param, arg) for param, arg in zip(func_to_run.args, node.args)]
+        return_type = func_to_run.return_type
+        code = f"{self.function_names[id(func_to_run)]}({', '.join(args)})"
+        return code, (None if return_type == 'void' else return_type)
+
+    def argument(self, param, arg):
+        # run_fcall's argument checks for one parameter
+        param_type = param.var_type
+        arg_type = arg.elem_type
+        if arg_type in ('string', 'int', 'bool'):
+            if param_type != arg_type:
+                if param_type == 'bool' and arg_type == 'int':
+                    return repr(bool(arg.val))
+                raise Untranslatable(f"can't pass {arg_type} as {param_type}")
+            return repr(arg.val)
+        if arg_type == 'var':
+            code, other_type = self.variable(arg)
+            return self.coerced(code, other_type, param_type)
+        if arg_type == 'fcall':
+            code, return_type = self.translate_fcall(arg)
+            return self.coerced(code, return_type, param_type)
+        if param_type == 'int':
+            return self.int_types(arg)
+        if param_type == 'string':
+            return self.string_types(arg)
+        if param_type == 'bool':
+            return self.bool_types(arg)
+        if arg_type == 'nil' and param_type in self.layouts:
+            return "None"
+        if arg_type == 'new' and arg.var_type == param_type:
+            return f"S_{param_type}()"
+        raise Untranslatable(f"can't pass {arg_type} as {param_type}")
+
+    def print_arg(self, node):
+        # Text printout() adds for one argument
+        node_type = node.elem_type
+        if node_type == 'string':
+            return repr(node.val)
+        if node_type == 'bool':
+            return repr("true" if node.val is True else "false" if node.val is False else "")
+        if node_type == 'int':
+            return repr(str(node.val))
+        if node_type == 'var':
+            return self.as_text(*self.variable(node))
+        if node_type == '+':
+            code, value_type = self.overloaded(node)
+            return code if value_type == OVERLOADED_RESULT_TYPES['string'] else f"str({code})"
+        if node_type in INT_OPERATIONS:
+            return f"str({self.int_operation(node)})"
+        if node_type in BOOL_OPERATIONS:
+            return self.as_text(self.bool_operation(node), 'bool')
+        if node_type in EQUALITY_COMPARISONS:
+            return self.as_text(self.equality(node), 'bool')
+        if node_type in INTEGER_COMPARISONS:
+            return self.as_text(self.compare(node), 'bool')
+        if node_type == 'fcall':
+            code, return_type = self.translate_fcall(node)
+            if return_type is None:
+                raise Untranslatable("printing a void call")
+            return self.as_text(code, return_type)
+        # nil / new print nothing (and aren't evaluated)
+        return "''"
+
+    def as_text(self, code, value_type):
+        if value_type == 'bool':
+            return f"('true' if {code} else 'false')"
+        if value_type == 'string':
+            return code
+        if value_type == 'int':
+            return f"str({code})"
+        return f"struct_str({code})"
+
+    ''' ---- Variables ---- '''
+    def variable(self, node):
+        # (code, type) of a variable or struct field read
+        if '.' not in node.name:
+            return self.lookup(node.name)
+        return self.struct_path(node.name.split('.'), node.name)
+
+    def struct_path(self, parts, full_name):
+        code, var_type = self.lookup(parts[0])
+        if var_type not in self.layouts:
+            raise Untranslatable(f"dot operator on non-struct {full_name}")
+        for field in parts[1:]:
+            var_type = self.field_type(var_type, field)
+            code = f"{code}.f_{field}"
+        return code, var_type
+
+    def field_type(self, struct_type, field):
+        if struct_type not in self.layouts:
+            raise Untranslatable(f"dot operator on non-struct field {field}")
+        layout = self.layouts[struct_type]
+        if field not in layout:
+            raise Untranslatable(f"field {field} isn't defined for struct {struct_type}")
+        return layout[field]
+
+    ''' ---- Expressions (one method per interpreterv3 evaluator) ---- '''
+    def int_types(self, node):
+        node_type = node.elem_type
+        if node_type == 'int':
+            return repr(node.val)
+        if node_type in ('var', 'fcall') or node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        raise Untranslatable(f"{node_type} in INT_TYPES")
+
+    def bool_types(self, node):
+        node_type = node.elem_type
+        if node_type in ('bool', 'int', 'var', 'fcall') or node_type in BOOL_OPERATIONS:
+            return self.bool_operation(node)
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type in INT_OPERATIONS:
+            return f"bool({self.int_operation(node)})"
+        raise Untranslatable(f"{node_type} in BOOL_TYPES")
+
+    def string_types(self, node):
+        node_type = node.elem_type
+        if node_type in ('string', 'var', 'fcall', '+'):
+            return self.string_operation(node)
+        raise Untranslatable(f"{node_type} in STRING_TYPES")
+
+    def typed_value(self, node, allowed):
+        # var / fcall whose type must be in allowed
+        if node.elem_type == 'var':
+            code, value_type = self.variable(node)
+        else:
+            code, value_type = self.translate_fcall(node)
+        if value_type not in allowed:
+            raise Untranslatable(f"{value_type} where {'/'.join(allowed)} was expected")
+        return code, value_type
+
+    def int_operation(self, node):
+        node_type = node.elem_type
+        if node_type == 'int':
+            return repr(node.val)
+        if node_type in ('var', 'fcall'):
+            return self.typed_value(node, ('int',))[0]
+        if node_type == 'neg':
+            if node.op1.elem_type not in INT_ALLOWABLE:
+                raise Untranslatable("operand of neg isn't an integer operand")
+            return f"(-{self.int_operation(node.op1)})"
+        if node_type in ARITH_OPERATORS:
+            if node.op1.elem_type not in INT_ALLOWABLE or node.op2.elem_type not in INT_ALLOWABLE:
+                raise Untranslatable(f"operand of {node_type} isn't an integer operand")
+            return f"({self.int_operation(node.op1)} {ARITH_OPERATORS[node_type]} {self.int_operation(node.op2)})"
+        raise Untranslatable(f"{node_type} in integer operation")
+
+    def string_operation(self, node):
+        node_type = node.elem_type
+        if node_type == 'string':
+            return repr(node.val)
+        if node_type in ('var', 'fcall'):
+            return self.typed_value(node, ('string',))[0]
+        if node_type == '+':
+            return f"({self.string_operation(node.op1)} + {self.string_operation(node.op2)})"
+        raise Untranslatable(f"{node_type} in string operation")
+
+    def bool_operation(self, node):
+        node_type = node.elem_type
+        if node_type in ('bool', 'int'):
+            return repr(bool(node.val))
+        if node_type in ('var', 'fcall'):
+            code, value_type = self.typed_value(node, ('bool', 'int'))
+            return code if value_type == 'bool' else f"bool({code})"
+        if node_type in INT_OPERATIONS:
+            return f"bool({self.int_operation(node)})"
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type == '!':
+            if node.op1.elem_type not in BOOL_ALLOWABLE:
+                raise Untranslatable("operand of ! isn't a bool operand")
+            return f"(not {self.bool_operation(node.op1)})"
+        if node_type in ('||', '&&'):
+            if node.op1.elem_type not in BOOL_ALLOWABLE or node.op2.elem_type not in BOOL_ALLOWABLE:
+                raise Untranslatable(f"operand of {node_type} isn't a bool operand")
+            # Both sides are always evaluated: | and & on two bools
+            operator = '|' if node_type == '||' else '&'
+            return f"({self.bool_operation(node.op1)} {operator} {self.bool_operation(node.op2)})"
+        raise Untranslatable(f"{node_type} in bool operation")
+
+    def eval_op(self, node):
+        # (code, type) like eval_op()'s {'type', 'val'}
+        op_type = node.elem_type
+        if op_type == 'var':
+            return self.variable(node)
+        if op_type in ('int', 'string', 'bool'):
+            return repr(node.val), op_type
+        if op_type == 'fcall':
+            code, return_type = self.translate_fcall(node)
+            if return_type is None:
+                raise Untranslatable("void call used as an operand")
+            return code, return_type
+        if op_type == 'nil':
+            return "None", 'nil'
+        if op_type == '+':
+            return self.overloaded(node)
+        if op_type in INT_OPERATIONS:
+            return self.int_operation(node), 'int'
+        if op_type in BOOL_OPERATIONS:
+            return self.bool_operation(node), 'bool'
+        if op_type in EQUALITY_COMPARISONS:
+            return self.equality(node), 'bool'
+        if op_type in INTEGER_COMPARISONS:
+            return self.compare(node), 'bool'
+        raise Untranslatable(f"{op_type} as an operand")
+
+    def overloaded(self, node):
+        # overloaded_operator: both operands are evaluated to check their types, then the whole node again
+        code1, type1 = self.eval_op(node.op1)
+        code2, type2 = self.eval_op(node.op2)
+        if type1 != type2:
+            raise Untranslatable(f"+ on different types {type1} and {type2}")
+        if type1 == 'int':
+            code = self.int_operation(node)
+        elif type1 == 'string':
+            code = self.string_operation(node)
+        else:
+            raise Untranslatable(f"no + operation for {type1}")
+        if self.has_call(node.op1) or self.has_call(node.op2):
+            code = f"({code1}, {code2}, {code})[2]"
+        return code, OVERLOADED_RESULT_TYPES[type1]
+
+    def equality(self, node):
+        code1, type1 = self.eval_op(node.op1)
+        code2, type2 = self.eval_op(node.op2)
+        structs = self.layouts
+        if type1 == 'nil':
+            if type2 == 'nil':
+                same = "True"
+            elif type2 in structs:
+                same = f"({code2} is None)"
+            else:
+                raise Untranslatable("nil compared to a non-struct")
+        elif type2 == 'nil':
+            if type1 not in structs:
+                raise Untranslatable("nil compared to a non-struct")
+            same = f"({code1} is None)"
+        elif type1 in structs and type2 in structs:
+            same = f"({code1} is {code2})"
+        elif type1 != type2:
+            if {type1, type2} == {'bool', 'int'}:
+                same = f"(bool({code1}) == bool({code2}))"
+            else:
+                same = f"({code1}, {code2}, False)[2]"
+        else:
+            same = f"({code1} == {code2})"
+        if node.elem_type == '!=':
+            return f"(not {same})"
+        return same
+
+    def compare(self, node):
+        op1 = self.int_operation(node.op1)
+        op2 = self.int_operation(node.op2)
+        return f"({op1} {node.elem_type} {op2})"
+
+    def condition(self, node):
+        # check_condition (only the truth value matters, so no bool() around ints)
+        node_type = node.elem_type
+        if node_type in ('bool', 'int'):
+            return repr(bool(node.val))
+        if node_type in ('var', 'fcall'):
+            return self.typed_value(node, ('bool', 'int'))[0]
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type in BOOL_OPERATIONS:
+            return self.bool_operation(node)
+        if node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        raise Untranslatable(f"{node_type} as a condition")
+
+
+''' ---- Running ---- '''
+# exported function: Python source for the interpreter's loaded program (None if it needs the interpreter)
+def transpile(interpreter):
+    try:
+        return Transpiler(interpreter).translate()
+    except Untranslatable:
+        return None
+
+
+# Translate + compile the program, returns a function that runs main (None if the program needs the interpreter)
+def compile_program(interpreter, main_node):
+    # main is run without arguments, so reading one of its params is a NAME_ERROR in the tree-walker
+    if main_node.args:
+        return None
+    transpiler = Transpiler(interpreter)
+    try:
+        source = transpiler.translate()
+    except Untranslatable:
+        return None
+
+    namespace = {
+        'BrewinObject': BrewinObject,
+        'struct_str': struct_str,
+        '_output': interpreter.output,
+        '_inputi': interpreter.inputi,
+        '_inputs': interpreter.inputs,
+        '_ARGS': transpiler.builtin_args,
+    }
+    exec(compile(source, "<brewin>", "exec"), namespace)
+
+    profiler = interpreter.profiler
+    if profiler is not None:
+        # Generated calls look functions up in namespace, so wrapping them there profiles every call
+        for func in interpreter.ast.functions:
+            py_name = transpiler.function_names[id(func)]
+            namespace[py_name] = profiled(profiler, func, namespace[py_name])
+
+    main = namespace[transpiler.function_names[id(main_node)]]
+    return lambda: run_translated(interpreter, main, main_node.return_type)
+
+
+def profiled(profiler, func_node, function):
+    name, arity = func_node.name, len(func_node.args)
+
+    def profiled_function(*args):
+        profiler.enter(name, arity)
+        try:
+            return function(*args)
+        finally:
+            profiler.exit()
+    return profiled_function
+
+
+def run_translated(interpreter, main, return_type):
+    # (imported here: interpreterv3 imports this module)
+    from interpreterv3 import ReturnValue
+
+    try:
+        return_value = main()
+    except AttributeError as e:
+        # Only a field read on None (nil) can fail this way in generated code
+        if e.obj is None and isinstance(e.name, str) and e.name.startswith("f_"):
+            interpreter.error(
+                ErrorType.FAULT_ERROR,
+                f"Attempting to use dot operator on uninitialized struct via field \"{e.name[2:]}\""
+            )
+        raise
+
+    # Same result as run_func(main_node, [])
+    if return_type == 'void':
+        return None
+    return ReturnValue(return_value, return_type)
@@ -0,0 +1,572 @@
+from environment import iter_nodes
+
+# Load-time static type checker for the v3 interpreter
+#   Every v3 variable, struct field, parameter and function result has a declared type, and the evaluators
+#   only ever store values of that type (after int -> bool coercion). So for most expressions the runtime
+#   checks in run_fcall / int_types / run_int_operation / check_equality / ... can be decided up front
+#
+#   check_program() runs once after linking (linker.py) and mirrors those evaluators' rules:
+#       = nodes            -> .checked     (the assigned expression can't raise a TYPE_ERROR / NAME_ERROR)
+#       fcall nodes        -> .checked     (user calls: every argument matches its parameter, print: every argument)
+#       if / for nodes     -> .checked     (the condition)
+#       return nodes       -> .checked + .value_type (the returned expression + the type run_statement reports)
+#       == / != nodes      -> .compare_as  (how check_equality compares the operand types: see equality())
+#       + nodes            -> .eval_twice  (evaluated through overloaded_operator with a call in an operand)
+#   interpreterv3 evaluates checked nodes with eval_checked(), which does no type checks at all.
+#   Errors that depend on values (nil field access, division by 0, bad input) still happen at runtime
+#
+#   It also returns the TYPE_ERRORs that are certain to happen if the node they're at runs, for the functions
+#   main can call: a function nothing calls is still annotated but never reported. The filter is per function,
+#   not per statement: every statement of a function main can call is reported, including ones in branches or
+#   loops that never run (or after a return), so strict_types rejects those programs even though the
+#   interpreter would only raise the error when it got there
+
+INT_OPERATIONS = ['+', '-', '*', '/', 'neg']
+BOOL_OPERATIONS = ['!', '||', '&&']
+EQUALITY_COMPARISONS = ['==', '!=']
+INTEGER_COMPARISONS = ['<', '<=', '>', '>=']
+PRIMITIVE_TYPES = ['int', 'bool', 'string']
+
+INT_ALLOWABLE = ['int', 'var', 'fcall'] + INT_OPERATIONS
+BOOL_ALLOWABLE = ['bool', 'var', 'fcall', 'int'] + BOOL_OPERATIONS + EQUALITY_COMPARISONS + INTEGER_COMPARISONS + INT_OPERATIONS
+
+# Type eval_op() reports for an overloaded '+' result (str(type(val)))
+OVERLOADED_RESULT_TYPES = {'int': "<class 'int'>", 'string': "<class 'str'>"}
+
+UNKNOWN = None          # type couldn't be decided (undeclared variable, failed subexpression, ...)
+VOID = 'void'           # result "type" of a void call
+
+
+def coercible(value_type, var_type):
+    # Value of value_type can be stored in a var_type (same type, or int -> bool)
+    return value_type == var_type or (var_type == 'bool' and value_type == 'int')
+
+
+def has_call(node):
+    if node.elem_type == 'fcall':
+        return True
+    for field in ('op1', 'op2'):
+        operand = node.get(field)
+        if operand is not None and has_call(operand):
+            return True
+    return False
+
+
+class TypeChecker:
+    def __init__(self, defined_structs):
+        # struct name -> {field: type} (a repeated field name keeps its last type, like BrewinStruct)
+        self.layouts = {}
+        for name, struct in defined_structs.items():
+            layout = {}
+            for field in struct.fields:
+                layout[field.name] = field.var_type
+            self.layouts[name] = layout
+        self.errors = []
+        self.reporting = True   # record the errors found in the current function
+
+    ''' ---- Helpers ---- '''
+    def fail(self, message):
+        # Record a certain TYPE_ERROR, the node isn't checked
+        if self.reporting:
+            self.errors.append(f"in function \"{self.func_name}\": {message}")
+        return False
+
+    def known_type(self, var_type):
+        return var_type in PRIMITIVE_TYPES or var_type in self.layouts
+
+    def declare(self, name, var_type):
+        self.blocks[-1][name] = var_type
+
+    def lookup(self, name):
+        for block in reversed(self.blocks):
+            if name in block:
+                return block[name]
+        return UNKNOWN
+
+    ''' ---- Functions + statements ---- '''
+    def check_func(self, func_node):
+        self.func_name = func_node.name
+        self.return_type = func_node.return_type
+        self.blocks = [{}]
+        for param in func_node.args:
+            self.declare(param.name, param.var_type)
+        self.check_statements(func_node.statements)
+
+    def check_statements(self, statements):
+        for statement_node in statements or ():
+            self.check_statement(statement_node)
+
+    def check_statement(self, node):
+        match node.elem_type:
+            case 'vardef':
+                # A second definition in the same block is a NAME_ERROR when it runs, keep the first type
+                if node.name in self.blocks[-1]:
+                    return
+                if not self.known_type(node.var_type):
+                    self.fail(f"variable \"{node.name}\" defined with unknown type {node.var_type}")
+                    return
+                self.declare(node.name, node.var_type)
+            case '=':
+                node.checked = self.check_assign(node)
+            case 'fcall':
+                self.call(node)
+            case 'if':
+                # Condition + both branches share one scope, the else branch can't see the if branch's variables
+                block = {}
+                self.blocks.append(block)
+                node.checked = self.condition(node.condition)
+                self.check_statements(node.statements)
+                block.clear()
+                self.check_statements(node.else_statements)
+                self.blocks.pop()
+            case 'for':
+                # init / condition / update run in the enclosing scope
+                node.init.checked = self.check_assign(node.init)
+                node.checked = self.condition(node.condition)
+                self.blocks.append({})
+                self.check_statements(node.statements)
+                self.blocks.pop()
+                node.update.checked = self.check_assign(node.update)
+            case 'return':
+                self.check_return(node)
+
+    def check_assign(self, node):
+        if '.' in node.name:
+            var_type = self.struct_path(node.name)
+        else:
+            var_type = self.lookup(node.name)
+        if var_type is UNKNOWN:
+            return False
+        return self.assigned(node.expression, var_type, node.name)
+
+    def check_return(self, node):
+        expression = node.expression
+        if expression is None:
+            return
+        node_type = expression.elem_type
+        if node_type == 'nil':
+            # run_statement reports no type for nil, so run_func never accepts it
+            self.fail("returning nil")
+            return
+
+        value_type = UNKNOWN
+        if node_type in PRIMITIVE_TYPES:
+            value_type = node_type
+        elif node_type == 'var':
+            value_type = self.variable(expression)
+        elif node_type == 'new':
+            value_type = self.new_struct(expression)
+        elif node_type == '+':
+            value_type = self.overloaded(expression)
+        elif node_type in INT_OPERATIONS:
+            value_type = 'int' if self.int_operation(expression) else UNKNOWN
+        elif node_type in BOOL_OPERATIONS:
+            value_type = 'bool' if self.bool_operation(expression) else UNKNOWN
+        elif node_type in EQUALITY_COMPARISONS:
+            value_type = 'bool' if self.equality(expression) else UNKNOWN
+        elif node_type in INTEGER_COMPARISONS:
+            value_type = 'bool' if self.compare(expression) else UNKNOWN
+        elif node_type == 'fcall':
+            # A void call returns the function's default, run_statement handles that itself
+            result_type = self.call(expression)
+            if result_type != VOID:
+                value_type = result_type
+        if value_type is UNKNOWN:
+            return
+
+        node.checked = True
+        node.value_type = value_type
+        if self.return_type == 'void':
+            self.fail("returning a value from a void function")
+        elif not coercible(value_type, self.return_type):
+            self.fail(f"returning {value_type} from a function of type {self.return_type}")
+
+    ''' ---- Calls ---- '''
+    def call(self, node):
+        # Result type of the call (VOID for void calls), UNKNOWN if it can't be checked
+        if node.builtin is not None:
+            if node.name == 'print':
+                checked = True
+                for arg in node.args:
+                    checked = self.print_arg(arg) and checked
+                node.checked = checked
+                return VOID if checked else UNKNOWN
+            # inputi / inputs always run their own handler
+            return 'int' if node.name == 'inputi' else 'string'
+
+        func_to_run = node.target
+        if func_to_run is None:
+            return UNKNOWN
+        checked = True
+        for param, arg in zip(func_to_run.args, node.args):
+            checked = self.argument(param, arg) and checked
+        node.checked = checked
+        if not checked:
+            return UNKNOWN
+        if func_to_run.return_type == 'void':
+            return VOID
+        return func_to_run.return_type
+
+    def argument(self, param, arg):
+        # run_fcall's checks for one argument
+        param_type = param.var_type
+        arg_type = arg.elem_type
+        if arg_type in PRIMITIVE_TYPES:
+            if not coercible(arg_type, param_type):
+                return self.fail(f"passing {arg_type} to parameter \"{param.name}\" of type {param_type}")
+            return True
+        if arg_type in ('var', 'fcall'):
+            return self.stored_value(arg, param_type, f"parameter \"{param.name}\"")
+        if param_type == 'int':
+            return self.int_types(arg)
+        if param_type == 'string':
+            return self.string_types(arg)
+        if param_type == 'bool':
+            return self.bool_types(arg)
+        if arg_type == 'nil':
+            if param_type not in self.layouts:
+                return self.fail(f"passing nil to parameter \"{param.name}\" of type {param_type}")
+            return True
+        if arg_type == 'new':
+            struct_type = self.new_struct(arg)
+            if struct_type is UNKNOWN:
+                return False
+            if struct_type != param_type:
+                return self.fail(f"passing new {struct_type} to parameter \"{param.name}\" of type {param_type}")
+            return True
+        return False
+
+    def print_arg(self, node):
+        # printout() never checks constants, and skips nil / new without evaluating them
+        node_type = node.elem_type
+        if node_type in PRIMITIVE_TYPES or node_type in ('nil', 'new'):
+            return True
+        if node_type == 'var':
+            return self.variable(node) is not UNKNOWN
+        if node_type == '+':
+            return self.overloaded(node) is not UNKNOWN
+        if node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        if node_type in BOOL_OPERATIONS:
+            return self.bool_operation(node)
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type == 'fcall':
+            result_type = self.call(node)
+            if result_type == VOID:
+                return self.fail(f"printing the result of void function \"{node.name}\"")
+            return result_type is not UNKNOWN
+        return False
+
+    ''' ---- Variables ---- '''
+    def variable(self, node):
+        if '.' in node.name:
+            return self.struct_path(node.name)
+        return self.lookup(node.name)
+
+    def struct_path(self, name):
+        # Type of a.b.c (UNKNOWN if a field isn't defined, struct_access raises NAME_ERROR for those)
+        parts = name.split('.')
+        var_type = self.lookup(parts[0])
+        if var_type is UNKNOWN:
+            return UNKNOWN
+        for field in parts[1:]:
+            if var_type not in self.layouts:
+                self.fail(f"dot operator on \"{field}\" of non-struct type {var_type} in {name}")
+                return UNKNOWN
+            layout = self.layouts[var_type]
+            if field not in layout:
+                return UNKNOWN
+            var_type = layout[field]
+        return var_type
+
+    def new_struct(self, node):
+        if node.var_type not in self.layouts:
+            self.fail(f"new of undefined struct {node.var_type}")
+            return UNKNOWN
+        return node.var_type
+
+    def stored_value(self, node, var_type, target):
+        # var / fcall value stored in something of type var_type (assignment / parameter)
+        if node.elem_type == 'var':
+            value_type = self.variable(node)
+        else:
+            value_type = self.call(node)
+            if value_type == VOID:
+                return self.fail(f"storing the result of void function \"{node.name}\" in {target}")
+        if value_type is UNKNOWN:
+            return False
+        if not coercible(value_type, var_type):
+            return self.fail(f"storing {value_type} in {target} of type {var_type}")
+        return True
+
+    ''' ---- Expressions (one method per interpreterv3 evaluator) ---- '''
+    def assigned(self, expression, var_type, var_name):
+        # run_assign / struct_update
+        node_type = expression.elem_type
+        if node_type in PRIMITIVE_TYPES:
+            if not coercible(node_type, var_type):
+                return self.fail(f"assigning {node_type} to \"{var_name}\" of type {var_type}")
+            return True
+        if node_type in ('var', 'fcall'):
+            return self.stored_value(expression, var_type, f"\"{var_name}\"")
+        if var_type == 'int':
+            return self.int_types(expression)
+        if var_type == 'bool':
+            return self.bool_types(expression)
+        if var_type == 'string':
+            return self.string_types(expression)
+        if node_type == 'nil':
+            return True
+        if node_type == 'new':
+            struct_type = self.new_struct(expression)
+            if struct_type is UNKNOWN:
+                return False
+            if struct_type != var_type:
+                return self.fail(f"assigning new {struct_type} to \"{var_name}\" of type {var_type}")
+            return True
+        return self.fail(f"assigning {node_type} to struct \"{var_name}\"")
+
+    def typed_operand(self, node, allowed, context):
+        # var / fcall operand whose type must be one of allowed
+        if node.elem_type == 'var':
+            value_type = self.variable(node)
+        else:
+            value_type = self.call(node)
+        if value_type is UNKNOWN:
+            return False
+        if value_type not in allowed:
+            return self.fail(f"using {value_type} \"{node.name}\" in {context}")
+        return True
+
+    def int_types(self, node):
+        node_type = node.elem_type
+        if node_type == 'int':
+            return True
+        if node_type == 'var':
+            return self.typed_operand(node, ('int',), "an int expression")
+        if node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        if node_type == 'fcall':
+            # (a void call crashes on its own error message here, so it isn't a TYPE_ERROR)
+            result_type = self.call(node)
+            if result_type in (UNKNOWN, VOID):
+                return False
+            if result_type != 'int':
+                return self.fail(f"using {result_type} \"{node.name}\" in an int expression")
+            return True
+        return self.fail(f"{node_type} used as an int")
+
+    def bool_types(self, node):
+        node_type = node.elem_type
+        if node_type in ('bool', 'int', 'var', 'fcall') or node_type in BOOL_OPERATIONS:
+            return self.bool_operation(node)
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        return self.fail(f"{node_type} used as a bool")
+
+    def string_types(self, node):
+        node_type = node.elem_type
+        if node_type in ('string', 'var', 'fcall', '+'):
+            return self.string_operation(node)
+        return self.fail(f"{node_type} used as a string")
+
+    def int_operation(self, node):
+        # run_int_operation
+        node_type = node.elem_type
+        if node_type == 'int':
+            return True
+        if node_type in ('string', 'bool', 'nil'):
+            return self.fail(f"{node_type} constant in an integer operation")
+        if node_type in ('var', 'fcall'):
+            return self.typed_operand(node, ('int',), "an integer operation")
+        if node_type == 'neg':
+            if node.op1.elem_type not in INT_ALLOWABLE:
+                return self.fail(f"{node.op1.elem_type} operand of neg")
+            return self.int_operation(node.op1)
+        if node_type in ('+', '-', '*', '/'):
+            if node.op1.elem_type not in INT_ALLOWABLE or node.op2.elem_type not in INT_ALLOWABLE:
+                return self.fail(f"non-integer operand of {node_type}")
+            if node_type == '+':
+                node.eval_twice = False
+            checked = self.int_operation(node.op1)
+            return self.int_operation(node.op2) and checked
+        return False
+
+    def string_operation(self, node):
+        # run_string_operation
+        node_type = node.elem_type
+        if node_type == 'string':
+            return True
+        if node_type in ('int', 'bool', 'nil'):
+            return self.fail(f"{node_type} constant in a string operation")
+        if node_type in ('var', 'fcall'):
+            return self.typed_operand(node, ('string',), "a string operation")
+        if node_type == '+':
+            node.eval_twice = False
+            checked = self.string_operation(node.op1)
+            return self.string_operation(node.op2) and checked
+        return False
+
+    def bool_operation(self, node):
+        # run_bool_operation
+        node_type = node.elem_type
+        if node_type in ('string', 'nil'):
+            return self.fail(f"{node_type} constant in a bool operation")
+        if node_type in ('bool', 'int'):
+            return True
+        if node_type in ('var', 'fcall'):
+            return self.typed_operand(node, ('bool', 'int'), "a bool operation")
+        if node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type == '!':
+            if node.op1.elem_type not in BOOL_ALLOWABLE:
+                return self.fail(f"{node.op1.elem_type} operand of !")
+            return self.bool_operation(node.op1)
+        if node_type in ('||', '&&'):
+            if node.op1.elem_type not in BOOL_ALLOWABLE or node.op2.elem_type not in BOOL_ALLOWABLE:
+                return self.fail(f"non-bool operand of {node_type}")
+            checked = self.bool_operation(node.op1)
+            return self.bool_operation(node.op2) and checked
+        return False
+
+    def eval_op(self, node):
+        # Type eval_op() gives node (UNKNOWN if it can't be checked)
+        op_type = node.elem_type
+        if op_type == 'var':
+            return self.variable(node)
+        if op_type in PRIMITIVE_TYPES:
+            return op_type
+        if op_type == 'fcall':
+            result_type = self.call(node)
+            if result_type == VOID:
+                self.fail(f"using the result of void function \"{node.name}\" as an operand")
+                return UNKNOWN
+            return result_type
+        if op_type == 'nil':
+            return 'nil'
+        if op_type == '+':
+            result_type = self.overloaded(node)
+            return UNKNOWN if result_type is UNKNOWN else OVERLOADED_RESULT_TYPES[result_type]
+        if op_type in INT_OPERATIONS:
+            return 'int' if self.int_operation(node) else UNKNOWN
+        if op_type in BOOL_OPERATIONS:
+            return 'bool' if self.bool_operation(node) else UNKNOWN
+        if op_type in EQUALITY_COMPARISONS:
+            return 'bool' if self.equality(node) else UNKNOWN
+        if op_type in INTEGER_COMPARISONS:
+            return 'bool' if self.compare(node) else UNKNOWN
+        return UNKNOWN
+
+    def overloaded(self, node):
+        # overloaded_operator: 'int' / 'string' result, UNKNOWN if it can't be checked
+        #   Both operands are evaluated once to find their types, then the whole node again
+        type1 = self.eval_op(node.op1)
+        type2 = self.eval_op(node.op2)
+        if type1 is UNKNOWN or type2 is UNKNOWN:
+            return UNKNOWN
+        if type1 != type2:
+            self.fail(f"+ on different types {type1} and {type2}")
+            return UNKNOWN
+        if type1 == 'int':
+            checked = self.int_operation(node)
+        elif type1 == 'string':
+            checked = self.string_operation(node)
+        else:
+            self.fail(f"+ on {type1}")
+            return UNKNOWN
+        if not checked:
+            return UNKNOWN
+        # (re-evaluating operands without calls can't be told apart from evaluating them once)
+        node.eval_twice = has_call(node.op1) or has_call(node.op2)
+        return type1
+
+    def equality(self, node):
+        # check_equality, .compare_as:
+        #   'value'  -> op1 == op2                 'bool'  -> bool(op1) == bool(op2) (bool vs int)
+        #   'struct' -> same object, or both nil   'never' -> different types, always unequal
+        type1 = self.eval_op(node.op1)
+        type2 = self.eval_op(node.op2)
+        if type1 is UNKNOWN or type2 is UNKNOWN:
+            return False
+        structs = self.layouts
+        if type1 == 'nil' or type2 == 'nil':
+            other_type = type2 if type1 == 'nil' else type1
+            if other_type != 'nil' and other_type not in structs:
+                return self.fail(f"comparing nil to {other_type}")
+            node.compare_as = 'struct'
+        elif type1 in structs and type2 in structs:
+            node.compare_as = 'struct'
+        elif type1 != type2:
+            node.compare_as = 'bool' if {type1, type2} == {'bool', 'int'} else 'never'
+        else:
+            node.compare_as = 'value'
+        return True
+
+    def compare(self, node):
+        # integer_compare
+        checked = self.int_operation(node.op1)
+        return self.int_operation(node.op2) and checked
+
+    def condition(self, node):
+        # check_condition
+        node_type = node.elem_type
+        if node_type in ('bool', 'int'):
+            return True
+        if node_type in ('var', 'fcall'):
+            return self.typed_operand(node, ('bool', 'int'), "a condition")
+        if node_type in EQUALITY_COMPARISONS:
+            return self.equality(node)
+        if node_type in INTEGER_COMPARISONS:
+            return self.compare(node)
+        if node_type in BOOL_OPERATIONS:
+            return self.bool_operation(node)
+        if node_type in INT_OPERATIONS:
+            return self.int_operation(node)
+        return self.fail(f"{node_type} used as a condition")
+
+
+def reachable_functions(main_node):
+    # ids of the func nodes main can call, directly or not (linker.py bound every user call site's .target)
+    reached = {id(main_node)}
+    pending = [main_node]
+    while pending:
+        func_node = pending.pop()
+        for node in iter_nodes(func_node.statements):
+            if node.elem_type == 'fcall' and node.target is not None and id(node.target) not in reached:
+                reached.add(id(node.target))
+                pending.append(node.target)
+    return reached
+
+
+def clear_checked(ast):
+    for func_node in ast.functions:
+        for node in iter_nodes(func_node.statements):
+            if node.elem_type in ('=', 'fcall', 'if', 'for', 'return'):
+                node.checked = False
+
+
+# exported function: annotate the (resolved + linked) program in place, returns the certain TYPE_ERRORs
+#   (with main_node: only the ones in functions main can call, see reachable_functions())
+#   in the functions main_node can reach (every function's if main_node is None)
+#   annotate=False leaves every node unchecked (trace_output: the evaluators print as they check)
+def check_program(ast, defined_structs, main_node=None, annotate=True):
+    clear_checked(ast)
+    checker = TypeChecker(defined_structs)
+    reported = None if main_node is None else reachable_functions(main_node)
+    for func_node in ast.functions:
+        checker.reporting = reported is None or id(func_node) in reported
+        checker.check_func(func_node)
+    if not annotate:
+        clear_checked(ast)
+    return checker.errors